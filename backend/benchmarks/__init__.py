@@ -0,0 +1,2 @@
+# Бенчмарки бэкенда: запускаются вручную из директории backend/, например
+#   python -m benchmarks.bench_client_pool
@@ -0,0 +1,27 @@
+"""Shared helpers for benchmark statistics."""
+from __future__ import annotations
+
+import statistics
+from typing import Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of *values* (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies_ms: List[float], wall_seconds: float) -> Dict[str, float]:
+    """Latency percentiles (ms) and throughput for one series of requests."""
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": statistics.mean(latencies_ms) if latencies_ms else 0.0,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "max_ms": max(latencies_ms) if latencies_ms else 0.0,
+        "rps": len(latencies_ms) / wall_seconds if wall_seconds else 0.0,
+    }
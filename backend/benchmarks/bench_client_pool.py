@@ -0,0 +1,76 @@
+"""Benchmark: per-request AsyncClient vs. pooled AsyncClient on GET /api/progress.
+
+Compares the request latency of ``GET /api/progress`` when ``get_db`` builds a
+new ``AsyncClient`` for every request (old behaviour) and when it hands out a
+client from the process-wide pool opened in the lifespan handler.
+
+Requires a reachable Firestore (the emulator is enough):
+    export FIRESTORE_EMULATOR_HOST=localhost:9090
+    export FIREBASE_AUTH_EMULATOR_HOST=localhost:9099
+    python -m benchmarks.bench_client_pool --requests 300 --concurrency 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+
+from main import app
+from shared.auth import get_current_user_id
+from shared.dependencies import _create_async_client, get_db
+from benchmarks._stats import summarize
+
+BENCH_USER_ID = "bench_client_pool_user"
+
+
+async def _run_mode(client: httpx.AsyncClient, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get("/api/progress", params={"days": 7})
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+
+    # Прогрев: первое обращение открывает gRPC-канал
+    await one_request()
+    latencies.clear()
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(requests)))
+    return summarize(latencies, time.perf_counter() - wall_start)
+
+
+async def main(requests: int, concurrency: int) -> None:
+    app.dependency_overrides[get_current_user_id] = lambda: BENCH_USER_ID
+    results: Dict[str, Dict[str, float]] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Старое поведение: новый AsyncClient на каждый запрос
+            app.dependency_overrides[get_db] = _create_async_client
+            results["per_request_client"] = await _run_mode(client, requests, concurrency)
+            app.dependency_overrides.pop(get_db)
+
+            results["pooled_client"] = await _run_mode(client, requests, concurrency)
+    app.dependency_overrides.clear()
+
+    print(f"GET /api/progress, {requests} requests, concurrency={concurrency}")
+    for mode, stats in results.items():
+        print(
+            f"  {mode:<20} mean={stats['mean_ms']:.2f}ms p50={stats['p50_ms']:.2f}ms "
+            f"p95={stats['p95_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms rps={stats['rps']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
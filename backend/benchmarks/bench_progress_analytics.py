@@ -0,0 +1,51 @@
+"""Benchmark: ``compute_analytics`` over long progress histories.
+
+Times the NumPy analytics behind ``GET /api/progress/analytics`` (dense day
+arrays, moving average, weekly deltas, percentiles, trend slopes) for 90-day,
+1-year and 3-year ranges with ~80% of days played. Firestore is not involved.
+
+Example (from backend/):
+    python -m benchmarks.bench_progress_analytics --repeats 200
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import random
+import time
+
+from benchmarks._stats import summarize
+
+RANGES_DAYS = (90, 365, 1095)
+
+
+def main(repeats: int) -> None:
+    from domain.progress import ProgressRecord
+    from services.progress_analytics import compute_analytics
+
+    rng = random.Random(42)
+    end = datetime.date.today()
+    print(f"repeats={repeats}")
+    print(f"{'days':>5} {'records':>8} {'mean_ms':>9} {'p50_ms':>9} {'p95_ms':>9}")
+    for days in RANGES_DAYS:
+        start = end - datetime.timedelta(days=days - 1)
+        records = [
+            ProgressRecord(user_id="bench", date=start + datetime.timedelta(days=i), score=rng.randint(0, 50),
+                           correct_answers=3, total_answers=5, time_spent=rng.uniform(30, 300))
+            for i in range(days) if rng.random() < 0.8
+        ]
+        compute_analytics(records, start, end)  # прогрев
+        latencies = []
+        wall_start = time.perf_counter()
+        for _ in range(repeats):
+            started = time.perf_counter()
+            compute_analytics(records, start, end)
+            latencies.append((time.perf_counter() - started) * 1000)
+        s = summarize(latencies, time.perf_counter() - wall_start)
+        print(f"{days:>5} {len(records):>8} {s['mean_ms']:>9.3f} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=100)
+    main(parser.parse_args().repeats)
@@ -0,0 +1,116 @@
+"""Benchmark: score sums by document scan vs. aggregation query vs. stats document.
+
+For users with 30, 365 and 1000 progress days, times ``sum_total_score`` and
+``sum_scores_for_week`` of ``ProgressRepository`` with each ``sum_source``:
+
+- ``scan``      — stream every progress document and add ``score`` in Python;
+- ``aggregate`` — Firestore ``sum``/``count`` aggregation query;
+- ``stats``     — one read of the ``user_stats/{uid}`` document.
+
+Also reports the Firestore reads per call (aggregations are billed one read per
+1000 index entries).
+
+Examples (from backend/):
+    python -m benchmarks.bench_score_sums --backend memory --latency-ms 2
+    FIRESTORE_EMULATOR_HOST=localhost:9090 python -m benchmarks.bench_score_sums --backend emulator
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import os
+import time
+from typing import Dict, List
+
+from benchmarks._stats import summarize
+
+HISTORY_LENGTHS = (30, 365, 1000)
+SUM_SOURCES = ("scan", "aggregate", "stats")
+
+
+async def _seed_user(db, user_id: str, days: int) -> None:
+    """Writes *days* progress documents directly, then one write through the repository builds user_stats."""
+    from domain.progress import ProgressRecord
+    from repositories.progress_repository import ProgressRepository
+
+    today = datetime.date.today()
+    collection = db.collection("progress")
+    batch = db.batch()
+    for days_ago in range(1, days):
+        day = today - datetime.timedelta(days=days_ago)
+        batch.set(collection.document(f"{user_id}_{day.isoformat()}"), {
+            "user_id": user_id, "date": day.isoformat(), "score": days_ago % 50,
+            "correct_answers": 5, "total_answers": 10, "time_spent": 60.0,
+        })
+        if len(batch) == 500:
+            await batch.commit()
+            batch = db.batch()
+    if len(batch):
+        await batch.commit()
+    await ProgressRepository(db=db).record_daily_score(ProgressRecord(
+        user_id=user_id, date=today, score=10, correct_answers=5, total_answers=10, time_spent=60.0))
+
+
+async def _time_calls(repo, user_id: str, repeats: int) -> Dict[str, Dict[str, float]]:
+    from shared.firestore_stats import begin_request, end_request
+
+    week_ago = datetime.datetime.now() - datetime.timedelta(days=7)
+    calls = {
+        "sum_total_score": lambda: repo.sum_total_score(user_id),
+        "sum_scores_for_week": lambda: repo.sum_scores_for_week(user_id, week_ago),
+    }
+    results = {}
+    for name, call in calls.items():
+        await call()  # прогрев
+        latencies: List[float] = []
+        fs_stats, token = begin_request()
+        wall_start = time.perf_counter()
+        try:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                await call()
+                latencies.append((time.perf_counter() - start) * 1000)
+        finally:
+            end_request(token)
+        summary = summarize(latencies, time.perf_counter() - wall_start)
+        summary["reads_per_call"] = (fs_stats.reads + fs_stats.query_docs) / repeats
+        results[name] = summary
+    return results
+
+
+async def main(repeats: int) -> None:
+    from repositories.progress_repository import ProgressRepository
+    from shared.dependencies import _create_async_client
+
+    db = _create_async_client()
+    print(f"backend={os.environ.get('FIRESTORE_BACKEND')} repeats={repeats}")
+    print(f"{'days':>5} {'call':<20} {'source':<10} {'mean_ms':>9} {'p50_ms':>9} {'p95_ms':>9} {'reads':>7}")
+    for days in HISTORY_LENGTHS:
+        user_id = f"bench_score_sums_{days}"
+        await _seed_user(db, user_id, days)
+        for source in SUM_SOURCES:
+            repo = ProgressRepository(db=db, sum_source=source)
+            for call, s in (await _time_calls(repo, user_id, repeats)).items():
+                print(f"{days:>5} {call:<20} {source:<10} {s['mean_ms']:>9.3f} {s['p50_ms']:>9.3f} "
+                      f"{s['p95_ms']:>9.3f} {s['reads_per_call']:>7.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "emulator"], default="memory")
+    parser.add_argument("--latency-ms", type=float, default=None,
+                        help="artificial per-RPC latency of the memory backend")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    # Окружение настраивается до импорта shared.config
+    if args.backend == "memory":
+        os.environ["FIRESTORE_BACKEND"] = "memory"
+        if args.latency_ms is not None:
+            os.environ["FIRESTORE_MEMORY_LATENCY_MS"] = str(args.latency_ms)
+    else:
+        os.environ["FIRESTORE_BACKEND"] = "firestore"
+        os.environ.setdefault("FIRESTORE_EMULATOR_HOST", "localhost:9090")
+        os.environ.setdefault("GCLOUD_PROJECT", "easytalk-emulator")
+    asyncio.run(main(args.repeats))
@@ -0,0 +1,219 @@
+"""Load-generation harness for ``main:app``.
+
+Virtual users play realistic game rounds against the ASGI app in-process
+(``httpx.ASGITransport``): fetch content, start a session, finish it, post
+progress, list achievements and read progress history.  For every route the
+run reports p50/p95/p99 latency, requests per second and errors, and can save
+the results as JSON to compare runs across commits.
+
+Examples (from backend/):
+    python -m benchmarks.loadtest --backend memory --users 50 --duration 20 --out results.json
+    python -m benchmarks.loadtest --backend memory --latency-ms 5 --compare results.json
+    FIRESTORE_EMULATOR_HOST=localhost:9090 python -m benchmarks.loadtest --backend emulator
+
+Every virtual user authenticates as ``loadtest_user_<n>``: ``get_current_user_id``
+is overridden to take the uid from the bearer token, so no Firebase Auth is involved.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import subprocess
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks._stats import summarize
+
+
+class RouteStats:
+    """Latencies and status codes collected per route template."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, latency_ms: float, status_code: int) -> None:
+        self.latencies[route].append(latency_ms)
+        if status_code >= 400:
+            self.errors[route] += 1
+
+    def report(self, wall_seconds: float) -> Dict[str, Any]:
+        routes = {}
+        for route in sorted(self.latencies):
+            summary = summarize(self.latencies[route], wall_seconds)
+            summary["errors"] = self.errors[route]
+            routes[route] = summary
+        everything = [lat for values in self.latencies.values() for lat in values]
+        total = summarize(everything, wall_seconds)
+        total["errors"] = sum(self.errors.values())
+        return {"routes": routes, "total": total}
+
+
+class VirtualUser:
+    """One simulated child playing a full game round per iteration."""
+
+    def __init__(self, client: httpx.AsyncClient, uid: str, stats: RouteStats, rng: random.Random):
+        self._client = client
+        self._uid = uid
+        self._stats = stats
+        self._rng = rng
+        self._headers = {"Authorization": f"Bearer {uid}"}
+
+    async def _call(self, route: str, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        start = time.perf_counter()
+        response = await send()
+        self._stats.record(route, (time.perf_counter() - start) * 1000, response.status_code)
+        return response
+
+    async def play_round(self) -> None:
+        client, headers = self._client, self._headers
+        game_type = self._rng.choice(["guess_animal", "build_sentence"])
+        content_path = "/api/content/animals" if game_type == "guess_animal" else "/api/content/sentences"
+
+        await self._call(f"GET {content_path}",
+                         lambda: client.get(content_path, params={"limit": 10}, headers=headers))
+
+        response = await self._call("POST /api/session/start",
+                                    lambda: client.post("/api/session/start", json={"game_type": game_type}, headers=headers))
+        if response.status_code == 200:
+            session_id = response.json()["session_id"]
+            details = [
+                {"question_id": f"q{i}", "answer": "a", "is_correct": self._rng.random() < 0.8, "time_spent": 2.5}
+                for i in range(10)
+            ]
+            score = sum(10 for d in details if d["is_correct"])
+            await self._call("PATCH /api/session/finish",
+                             lambda: client.patch("/api/session/finish", params={"session_id": session_id},
+                                                  json={"details": details, "score": score}, headers=headers))
+
+        correct = self._rng.randint(0, 10)
+        progress = {
+            "score": correct * 10,
+            "correct_answers": correct,
+            "total_answers": 10,
+            "time_spent": 25.0,
+            "date": (datetime.date.today() - datetime.timedelta(days=self._rng.randint(0, 6))).isoformat(),
+        }
+        await self._call("POST /api/progress", lambda: client.post("/api/progress", json=progress, headers=headers))
+        await self._call("GET /api/achievements", lambda: client.get("/api/achievements", headers=headers))
+        await self._call("GET /api/progress", lambda: client.get("/api/progress", params={"days": 7}, headers=headers))
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run_load(users: int, duration: float, iterations: Optional[int], seed: int) -> Dict[str, Any]:
+    """Run the scenario mix and return the JSON-serialisable report."""
+    # Импорт после настройки окружения: shared.config читает переменные при импорте
+    from fastapi import Header
+    from main import app
+    from shared.auth import get_current_user_id
+
+    def loadtest_user_id(authorization: str = Header(None)) -> str:
+        return authorization.split()[1]
+
+    app.dependency_overrides[get_current_user_id] = loadtest_user_id
+    stats = RouteStats()
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+                deadline = time.perf_counter() + duration
+
+                async def user_loop(n: int) -> None:
+                    user = VirtualUser(client, f"loadtest_user_{n}", stats, random.Random(seed + n))
+                    done = 0
+                    while (iterations is None or done < iterations) and time.perf_counter() < deadline:
+                        await user.play_round()
+                        done += 1
+
+                wall_start = time.perf_counter()
+                await asyncio.gather(*(user_loop(n) for n in range(users)))
+                wall = time.perf_counter() - wall_start
+    finally:
+        app.dependency_overrides.pop(get_current_user_id, None)
+
+    report = stats.report(wall)
+    report["meta"] = {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "backend": os.environ.get("FIRESTORE_BACKEND"),
+        "memory_latency_ms": float(os.environ.get("FIRESTORE_MEMORY_LATENCY_MS", "0")),
+        "users": users,
+        "duration_s": round(wall, 3),
+        "iterations": iterations,
+        "seed": seed,
+    }
+    return report
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    meta = report["meta"]
+    print(f"commit={meta['commit']} backend={meta['backend']} users={meta['users']} duration={meta['duration_s']}s")
+    header = f"{'route':<32} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    if baseline:
+        header += f" {'Δp95':>8} {'Δrps':>8}"
+    print(header)
+    rows = list(report["routes"].items()) + [("TOTAL", report["total"])]
+    for route, s in rows:
+        line = (f"{route:<32} {s['count']:>7} {s['errors']:>5} {s['rps']:>8.1f} "
+                f"{s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f}")
+        if baseline:
+            old = baseline["total"] if route == "TOTAL" else baseline["routes"].get(route)
+            if old:
+                line += f" {s['p95_ms'] - old['p95_ms']:>+8.2f} {s['rps'] - old['rps']:>+8.1f}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "emulator"], default="memory")
+    parser.add_argument("--latency-ms", type=float, default=None,
+                        help="artificial per-RPC latency of the memory backend")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="run length in seconds")
+    parser.add_argument("--iterations", type=int, default=None, help="game rounds per user (overrides duration)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="JSON report of a previous run to diff against")
+    args = parser.parse_args()
+
+    if args.backend == "memory":
+        os.environ["FIRESTORE_BACKEND"] = "memory"
+        os.environ.setdefault("GCLOUD_PROJECT", "easytalk-loadtest")
+        if args.latency_ms is not None:
+            os.environ["FIRESTORE_MEMORY_LATENCY_MS"] = str(args.latency_ms)
+    else:
+        os.environ["FIRESTORE_BACKEND"] = "firestore"
+        os.environ.setdefault("FIRESTORE_EMULATOR_HOST", "localhost:9090")
+        os.environ.setdefault("FIREBASE_AUTH_EMULATOR_HOST", "localhost:9099")
+        os.environ.setdefault("GCLOUD_PROJECT", "easytalk-emulator")
+
+    duration = float("inf") if args.iterations is not None else args.duration
+    report = asyncio.run(run_load(args.users, duration, args.iterations, args.seed))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 # backend/domain/achievement.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime, date
 from enum import Enum
 
-# Определение типов достижений
+# Встроенные типы достижений. Тип достижения — ID определения каталога
+# (achievement_catalog), поэтому новые определения каталога не требуют значения здесь
 class AchievementType(str, Enum):
     PERFECT_STREAK = "perfect_streak"
     WEEKLY_FIFTY = "weekly_fifty"
@@ -12,13 +13,27 @@ class AchievementType(str, Enum):
     TOTAL_SCORE_100 = "total_score_100"
     TOTAL_SCORE_500 = "total_score_500"
     STREAK_7_DAYS = "streak_7_days"
+    STREAK_30_DAYS = "streak_30_days"
+    STREAK_100_DAYS = "streak_100_days"
     # добавим дополнительные типы при необходимости
 
+def achievement_doc_id(user_id: str, achievement_type: str, period: str | None = None) -> str:
+    """ID документа достижения: один документ на (пользователь, тип, период).
+
+    achievement_type — ID определения каталога (или AchievementType);
+    period — начало периода для правил с окном, ID сессии для сессионных
+    правил, None для достижений, которые выдаются один раз.
+    """
+    if isinstance(achievement_type, AchievementType):
+        achievement_type = achievement_type.value
+    key = f"{user_id}_{achievement_type}"
+    return f"{key}_{period}" if period else key
+
 # Модель достижения
 class AchievementModel(BaseModel):
     achievement_id: str
     user_id: str
-    type: AchievementType
+    type: str = Field(min_length=1)  # ID определения каталога; встроенные — значения AchievementType
     earned_at: datetime
     session_id: str | None = None  # Опционально: ID сессии, в которой было получено достижение
     period_start_date: date | None = None  # Начало периода для еженедельных достижений (weekly_fifty)
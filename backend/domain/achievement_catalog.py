@@ -1,6 +1,8 @@
 """Domain model for catalogued achievements.
 These describe static achievement definitions (name, description, icon, etc.)
 """
+from typing import Any, Dict, List
+
 from pydantic import BaseModel, HttpUrl
 
 class AchievementCatalogItem(BaseModel):
@@ -13,3 +15,97 @@ class AchievementCatalogItem(BaseModel):
         "from_attributes": True,
         "populate_by_name": True,
     }
+
+
+# ---------------------------------------------------------------------------
+# Catalog definition (can later be moved to separate JSON or admin panel)
+#
+# Каждое определение — правило достижения (см. services/achievement_rules.py):
+# metric, comparator, threshold и window (окно в днях, None — за всё время).
+# ---------------------------------------------------------------------------
+DEFAULT_CATALOG: List[Dict[str, Any]] = [
+    # Weekly score achievement (оставляем для обратной совместимости)
+    {
+        "id": "weekly_fifty",
+        "name": "50 очков за неделю",
+        "description": "Набери 50 очков за последние 7 дней",
+        "icon_url": None,
+        "metric": "score",
+        "comparator": ">=",
+        "threshold": 50,
+        "window": 7,
+    },
+    # Perfect session (все ответы верны)
+    {
+        "id": "perfect_streak",
+        "name": "Идеальная сессия",
+        "description": "Заверши игру без ошибок",
+        "icon_url": None,
+        "metric": "session_accuracy",
+        "comparator": ">=",
+        "threshold": 1,
+        "window": None,
+    },
+    # Total score milestones
+    {
+        "id": "total_score_50",
+        "name": "Собрано 50 очков",
+        "description": "Набери 50 очков суммарно",
+        "icon_url": None,
+        "metric": "score",
+        "comparator": ">=",
+        "threshold": 50,
+        "window": None,
+    },
+    {
+        "id": "total_score_100",
+        "name": "Собрано 100 очков",
+        "description": "Набери 100 очков суммарно",
+        "icon_url": None,
+        "metric": "score",
+        "comparator": ">=",
+        "threshold": 100,
+        "window": None,
+    },
+    {
+        "id": "total_score_500",
+        "name": "Собрано 500 очков",
+        "description": "Набери 500 очков суммарно",
+        "icon_url": None,
+        "metric": "score",
+        "comparator": ">=",
+        "threshold": 500,
+        "window": None,
+    },
+    # 7-day streak
+    {
+        "id": "streak_7_days",
+        "name": "Серия 7 дней",
+        "description": "Играй каждый день 7 дней подряд",
+        "icon_url": None,
+        "metric": "streak_days",
+        "comparator": ">=",
+        "threshold": 7,
+        "window": None,
+    },
+    {
+        "id": "streak_30_days",
+        "name": "Серия 30 дней",
+        "description": "Играй каждый день 30 дней подряд",
+        "icon_url": None,
+        "metric": "streak_days",
+        "comparator": ">=",
+        "threshold": 30,
+        "window": None,
+    },
+    {
+        "id": "streak_100_days",
+        "name": "Серия 100 дней",
+        "description": "Играй каждый день 100 дней подряд",
+        "icon_url": None,
+        "metric": "streak_days",
+        "comparator": ">=",
+        "threshold": 100,
+        "window": None,
+    },
+]
@@ -1,8 +1,8 @@
 # backend/domain/progress.py
 
 from pydantic import BaseModel, conint, Field, computed_field, model_validator
-from datetime import date
-from typing import ClassVar
+from datetime import date, timedelta
+from typing import ClassVar, Dict, Iterable, Optional
 
 class ProgressRecord(BaseModel):
     user_id: str
@@ -42,3 +42,137 @@ class ProgressRecord(BaseModel):
                     'type': 'value_error'
                 })
         return data
+
+    def combined_with(self, other: "ProgressRecord") -> "ProgressRecord":
+        """Сумма результатов двух записей за один и тот же день."""
+        return ProgressRecord(
+            user_id=self.user_id,
+            date=self.date,
+            score=self.score + other.score,
+            correct_answers=self.correct_answers + other.correct_answers,
+            total_answers=self.total_answers + other.total_answers,
+            time_spent=self.time_spent + other.time_spent,
+        )
+
+
+class UserProgressStats(BaseModel):
+    """Агрегат прогресса пользователя (документ user_stats/{user_id}).
+
+    Обновляется вместе с каждой записью ProgressRecord, поэтому суммы очков
+    и серии дней читаются одним документом вместо просмотра всей истории.
+    daily_scores хранит очки по дням ("YYYY-MM-DD") за последние window_days
+    дней до last_active_date.
+    current_streak — дней подряд с записью, заканчивая last_active_date
+    (начиная с streak_start), без учёта дней без записей после него;
+    longest_streak — самая длинная серия за всё время.
+    Запись задним числом продлевает текущую серию, только если приходится
+    на день перед streak_start; предшествующие дни ищутся в daily_scores.
+    """
+    user_id: str
+    total_score: int = 0
+    total_correct: int = 0
+    total_answers: int = 0
+    total_time_spent: float = 0.0
+    last_active_date: Optional[date] = None
+    current_streak: int = 0
+    streak_start: Optional[date] = None
+    longest_streak: int = 0
+    longest_streak_start: Optional[date] = None
+    window_days: int = 31
+    daily_scores: Dict[str, int] = Field(default_factory=dict)
+    # История пользователя перенесена в progress_months (PROGRESS_MONTHLY_DOCS)
+    monthly_docs: bool = False
+
+    model_config = {
+        "from_attributes": True,
+        "populate_by_name": True
+    }
+
+    @model_validator(mode='after')
+    def init_streak(self):
+        """Агрегат, созданный до появления серий: восстанавливаем серию по daily_scores"""
+        if self.last_active_date is not None and self.streak_start is None:
+            start = self.last_active_date
+            while (start - timedelta(days=1)).isoformat() in self.daily_scores:
+                start -= timedelta(days=1)
+            self.streak_start = start
+            self.current_streak = (self.last_active_date - start).days + 1
+            if self.current_streak > self.longest_streak:
+                self.longest_streak = self.current_streak
+                self.longest_streak_start = start
+        return self
+
+    @classmethod
+    def from_records(cls, user_id: str, records: Iterable[ProgressRecord], window_days: int) -> "UserProgressStats":
+        """Строит агрегат по полной истории пользователя (для backfill)."""
+        stats = cls(user_id=user_id, window_days=window_days)
+        for record in sorted(records, key=lambda r: r.date):
+            stats.apply(record)
+        return stats
+
+    def apply(self, record: ProgressRecord, previous: Optional[ProgressRecord] = None) -> None:
+        """Учитывает запись за день; previous — прежняя запись за тот же день, которую она заменяет."""
+        if previous is not None:
+            self.total_score -= previous.score
+            self.total_correct -= previous.correct_answers
+            self.total_answers -= previous.total_answers
+            self.total_time_spent -= previous.time_spent
+        self._add_totals(record)
+        self._track_day(record.date, record.score)
+
+    def add(self, record: ProgressRecord) -> None:
+        """Прибавляет результаты record к уже учтённым за тот же день (накопительная запись)."""
+        self._add_totals(record)
+        day_score = self.daily_scores.get(record.date.isoformat(), 0) + record.score
+        self._track_day(record.date, day_score)
+
+    def _add_totals(self, record: ProgressRecord) -> None:
+        self.total_score += record.score
+        self.total_correct += record.correct_answers
+        self.total_answers += record.total_answers
+        self.total_time_spent += record.time_spent
+
+    def _track_day(self, day: date, day_score: int) -> None:
+        self._mark_active(day)
+        if day >= self.window_start:
+            self.daily_scores[day.isoformat()] = day_score
+        # Удаляем дни, выпавшие из окна
+        cutoff = self.window_start.isoformat()
+        self.daily_scores = {key: score for key, score in self.daily_scores.items() if key >= cutoff}
+
+    def _mark_active(self, day: date) -> None:
+        """Обновляет серии дней за O(1) (запись задним числом — не больше window_days шагов)."""
+        last = self.last_active_date
+        if last is None or day > last + timedelta(days=1):
+            self.current_streak = 1
+            self.streak_start = day
+        elif day == last + timedelta(days=1):
+            self.current_streak += 1
+        elif day == self.streak_start - timedelta(days=1):
+            # День задним числом перед текущей серией: присоединяем его и дни до него
+            self.current_streak += 1
+            self.streak_start = day
+            while (self.streak_start - timedelta(days=1)).isoformat() in self.daily_scores:
+                self.current_streak += 1
+                self.streak_start -= timedelta(days=1)
+        if last is None or day > last:
+            self.last_active_date = day
+        if self.current_streak > self.longest_streak:
+            self.longest_streak = self.current_streak
+            self.longest_streak_start = self.streak_start
+
+    @property
+    def window_start(self) -> date:
+        """Первый день, за который daily_scores гарантированно полон."""
+        if self.last_active_date is None:
+            return date.min
+        return self.last_active_date - timedelta(days=self.window_days - 1)
+
+    def covers(self, start: date) -> bool:
+        """True, если очки начиная с start можно посчитать по daily_scores."""
+        return start >= self.window_start
+
+    def score_since(self, start: date) -> int:
+        """Сумма очков за дни начиная с start (включительно)."""
+        start_str = start.isoformat()
+        return sum(score for day, score in self.daily_scores.items() if day >= start_str)
@@ -24,31 +24,110 @@ from routers.session_router import router as session_router
 from routers.progress_router import router as progress_router
 from routers.content_router import router as content_router
 from routers.achievement_router import router as achievement_router
+from routers.metrics_router import router as metrics_router
+from routers.leaderboard_router import router as leaderboard_router
 
-# --- Firebase Startup Event ---
+# --- Lifespan: Firebase и пул Firestore-клиентов ---
+import asyncio
+from contextlib import asynccontextmanager
+from shared.dependencies import get_achievement_worker, get_client_pool, get_leaderboard
+from repositories.leaderboard_repository import LeaderboardRepository
+from services.leaderboard import checkpoint_leaderboard, load_leaderboard, run_checkpoints
+from repositories.session_repository import SessionRepository
+from services.session_sweeper import run_sweeper
+from services.live_sessions import flush_all, live_sessions, run_flusher
+from shared.blocking_executor import auth_executor
+from shared.catalog_cache import achievement_catalog_cache
+from shared import config
+from shared import metrics
 
-# --- Создание FastAPI приложения ---
-app = FastAPI(
-    title="EasyTalk API",
-    description="API сервер для детского образовательного приложения EasyTalk",
-    version="1.0.0"
-)
 
-@app.on_event("startup")
-async def startup_event():
-    """Initializes Firebase on application startup."""
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initializes Firebase and the Firestore client pool; closes the pool on shutdown."""
     print("[main.py] FastAPI app startup: Initializing Firebase...")
     # The initialize_app_for_context function will now determine the environment by itself.
     initialize_app_for_context()
     print("[main.py] Firebase initialized on startup.")
+
+    pool = get_client_pool()
+    pool.open()
     # Seed initial game content if collections are empty
     try:
         from scripts.seed_games import seed_if_empty
         from scripts.seed_achievements import seed_catalog_if_empty
-        await seed_if_empty()
-        await seed_catalog_if_empty()
+        await seed_if_empty(pool.get())
+        await seed_catalog_if_empty(pool.get())
     except Exception as e:
         print(f"[main.py] Warning: seeding initial content failed: {e}")
+    # Каталог достижений загружается до первого запроса; дальше перечитывается в фоне
+    await achievement_catalog_cache.refresh()
+
+    lag_monitor = None
+    if config.METRICS_ENABLED:
+        lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag(config.EVENT_LOOP_LAG_INTERVAL))
+
+    # Фоновая проверка достижений: запросы только ставят события в очередь
+    achievement_worker = get_achievement_worker()
+    if achievement_worker is not None:
+        achievement_worker.start()
+
+    # Недельный рейтинг восстанавливается из сохранений и сохраняется в фоне
+    leaderboard = get_leaderboard()
+    leaderboard_checkpoints = None
+    if leaderboard is not None:
+        try:
+            await load_leaderboard(leaderboard, LeaderboardRepository(db=pool.get()))
+        except Exception as e:
+            print(f"[main.py] Warning: loading leaderboard checkpoints failed: {e}")
+        leaderboard_checkpoints = asyncio.create_task(run_checkpoints(
+            leaderboard, lambda: LeaderboardRepository(db=pool.get()), config.LEADERBOARD_CHECKPOINT_SECONDS))
+
+    # Брошенные сессии помечаются abandoned в фоне
+    session_sweeper = None
+    if config.SESSION_SWEEPER_ENABLED:
+        session_sweeper = asyncio.create_task(run_sweeper(
+            lambda: SessionRepository(db=pool.get()), config.SESSION_SWEEPER_INTERVAL,
+            config.SESSION_ABANDON_AFTER_SECONDS, config.SESSION_SWEEPER_PAGE_SIZE, config.SESSION_SWEEPER_RATE))
+
+    # Раунды из WebSocket пишутся в Firestore, если клиент не вернулся после отключения
+    live_session_flusher = asyncio.create_task(run_flusher(live_sessions, config.LIVE_SESSION_FLUSH_INTERVAL))
+
+    yield
+
+    live_session_flusher.cancel()
+    if len(live_sessions):
+        # Накопленные в памяти раунды записываются до закрытия пула клиентов
+        try:
+            await flush_all(live_sessions)
+        except Exception as e:
+            print(f"[main.py] Warning: saving live sessions failed: {e}")
+    if lag_monitor is not None:
+        lag_monitor.cancel()
+    if session_sweeper is not None:
+        # Прерванный проход продолжится со своим cutoff (состояние в maintenance/session_sweeper)
+        session_sweeper.cancel()
+    if leaderboard_checkpoints is not None:
+        leaderboard_checkpoints.cancel()
+        try:
+            await checkpoint_leaderboard(leaderboard, LeaderboardRepository(db=pool.get()))
+        except Exception as e:
+            print(f"[main.py] Warning: saving leaderboard checkpoint failed: {e}")
+    # Очередь достижений обрабатывается до закрытия пула клиентов
+    if achievement_worker is not None:
+        await achievement_worker.drain(config.ACHIEVEMENT_WORKER_DRAIN_TIMEOUT)
+    await pool.close()
+    auth_executor.shutdown(wait=False)
+    print("[main.py] Firestore client pool and auth executor closed on shutdown.")
+
+
+# --- Создание FastAPI приложения ---
+app = FastAPI(
+    title="EasyTalk API",
+    description="API сервер для детского образовательного приложения EasyTalk",
+    version="1.0.0",
+    lifespan=lifespan,
+)
 
 # --- Настройка CORS ---
 app.add_middleware(
@@ -63,15 +142,31 @@ app.add_middleware(
 import structlog
 logger = structlog.get_logger()
 
+from shared.firestore_stats import begin_request, end_request
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     import time
     start_time = time.time()
+    started = time.perf_counter()
+    # Счётчики операций Firestore за время запроса (заполняются в репозиториях)
+    fs_stats, fs_token = begin_request()
+    if config.METRICS_ENABLED:
+        metrics.REQUESTS_IN_FLIGHT.labels(request.method).inc()
     try:
         response = await call_next(request)
     except Exception:
-        logger.exception("unhandled_exception", path=str(request.url.path), method=request.method)
+        logger.exception("unhandled_exception", path=str(request.url.path), method=request.method,
+                         **fs_stats.as_log_fields())
+        if config.METRICS_ENABLED:
+            metrics.UNHANDLED_EXCEPTIONS.labels(request.method, metrics.route_label(request)).inc()
         raise
+    finally:
+        end_request(fs_token)
+        if config.METRICS_ENABLED:
+            metrics.REQUESTS_IN_FLIGHT.labels(request.method).dec()
+    if config.METRICS_ENABLED:
+        metrics.observe_request(request.method, metrics.route_label(request), response.status_code, started)
     duration_ms = int((time.time() - start_time) * 1000)
     logger.info(
         "request_completed",
@@ -79,6 +174,7 @@ async def log_requests(request: Request, call_next):
         method=request.method,
         status_code=response.status_code,
         duration_ms=duration_ms,
+        **fs_stats.as_log_fields(),
     )
     return response
 
@@ -89,6 +185,11 @@ app.include_router(progress_router, prefix="/api")
 # Эндпоинты контента (content) и достижений (achievement)
 app.include_router(content_router, prefix="/api")
 app.include_router(achievement_router, prefix="/api")
+if config.LEADERBOARD_ENABLED:
+    app.include_router(leaderboard_router, prefix="/api")
+# Метрики Prometheus (без префикса /api)
+if config.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 
 @app.get("/")
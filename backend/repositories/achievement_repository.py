@@ -1,76 +1,131 @@
+import asyncio
 from datetime import date
+from google.api_core.exceptions import AlreadyExists
 from google.cloud.firestore_v1.async_client import AsyncClient
 from google.cloud.firestore_v1.base_query import FieldFilter
+from typing import Optional
 
-from domain.achievement import AchievementModel, AchievementType
+from domain.achievement import AchievementModel, AchievementType, achievement_doc_id
+from shared.catalog_cache import CatalogCache
+from shared.firestore_stats import track_op
+
+# Лимит Firestore на число записей в одном commit
+MAX_WRITES_PER_COMMIT = 500
 
 
 class AchievementRepository:
-    def __init__(self, db: AsyncClient):
+    def __init__(self, db: AsyncClient, catalog_cache: Optional[CatalogCache] = None):
+        self._db = db
         self._collection = db.collection("achievements")
         self._catalog_collection = db.collection("achievement_catalog")
-        self._catalog_cache: list[dict] | None = None
-        self._catalog_cache_ts: float | None = None
+        # Версия каталога: увеличивается при каждом изменении achievement_catalog
+        self._catalog_version_ref = db.collection("maintenance").document("achievement_catalog")
+        # Общий для процесса кэш каталога (shared/catalog_cache.py); без него каталог читается из Firestore
+        self._catalog_cache = catalog_cache
 
-    async def create_achievement(self, achievement: AchievementModel) -> None:
+    async def create_achievement(self, achievement: AchievementModel) -> bool:
         """
-        Сохраняем AchievementModel в Firestore. С помощью mode="json" 
-        все типы date и datetime будут автоматически преобразованы в строки JSON.
+        Сохраняем AchievementModel в Firestore, если документа с таким ID ещё нет.
+        С помощью mode="json" все типы date и datetime будут автоматически
+        преобразованы в строки JSON. Возвращает False, если достижение уже выдано.
         """
         data = achievement.model_dump(mode="json")
-        await self._collection.document(achievement.achievement_id).set(data)
+        with track_op("AchievementRepository.create_achievement") as op:
+            try:
+                await self._collection.document(achievement.achievement_id).create(data)
+            except AlreadyExists:
+                return False
+            op.writes += 1
+        return True
+
+    async def create_achievements(self, achievements: list[AchievementModel]) -> int:
+        """Сохраняет отсутствующие достижения batch-ами (один commit на MAX_WRITES_PER_COMMIT).
+
+        Если часть документов уже есть (выдана параллельным запросом), batch
+        отклоняется целиком, и его достижения создаются по одному.
+        Возвращает число созданных документов.
+        """
+        created = 0
+        for start in range(0, len(achievements), MAX_WRITES_PER_COMMIT):
+            chunk = achievements[start:start + MAX_WRITES_PER_COMMIT]
+            batch = self._db.batch()
+            for achievement in chunk:
+                batch.create(self._collection.document(achievement.achievement_id), achievement.model_dump(mode="json"))
+            with track_op("AchievementRepository.create_achievements") as op:
+                try:
+                    await batch.commit()
+                except AlreadyExists:
+                    pass
+                else:
+                    op.writes += len(chunk)
+                    op.batch_commits += 1
+                    created += len(chunk)
+                    continue
+            results = await asyncio.gather(*(self.create_achievement(achievement) for achievement in chunk))
+            created += sum(results)
+        return created
+
+    async def get_existing_ids(self, achievement_ids: list[str]) -> set[str]:
+        """ID уже существующих документов достижений (один get_all)."""
+        if not achievement_ids:
+            return set()
+        refs = [self._collection.document(achievement_id) for achievement_id in achievement_ids]
+        existing = set()
+        with track_op("AchievementRepository.get_existing_ids") as op:
+            async for doc in self._db.get_all(refs):
+                op.reads += 1
+                if doc.exists:
+                    existing.add(doc.id)
+        return existing
 
     async def get_user_achievements(self, user_id: str) -> list[AchievementModel]:
         docs_stream = self._collection.where(filter=FieldFilter("user_id", "==", user_id)).stream()
         results = []
-        async for doc in docs_stream:
-            obj = doc.to_dict()
-            if ps := obj.get("period_start_date"):
-                obj["period_start_date"] = date.fromisoformat(ps)
-            results.append(AchievementModel(**obj))
+        with track_op("AchievementRepository.get_user_achievements") as op:
+            async for doc in docs_stream:
+                op.query_docs += 1
+                obj = doc.to_dict()
+                if ps := obj.get("period_start_date"):
+                    obj["period_start_date"] = date.fromisoformat(ps)
+                results.append(AchievementModel(**obj))
         return results
 
-    async def exists_achievement(self, user_id: str, achievement_type: AchievementType) -> bool:
-        """Проверяет, есть ли у пользователя достижение указанного типа."""
-        docs_stream = (
-            self._collection
-            .where(filter=FieldFilter("user_id", "==", user_id))
-            .where(filter=FieldFilter("type", "==", achievement_type.value))
-            .limit(1)
-            .stream()
-        )
-        async for _ in docs_stream:
-            return True
-        return False
+    async def exists_achievement(self, user_id: str, achievement_type: str) -> bool:
+        """Проверяет, есть ли у пользователя достижение указанного типа (чтение по ID)."""
+        return await self._exists(achievement_doc_id(user_id, achievement_type))
 
     async def exists_weekly_achievement(self, user_id: str, period_start: date) -> bool:
-        period_str = period_start.isoformat()
-        docs_stream = (
-            self._collection
-            .where(filter=FieldFilter("user_id", "==", user_id))
-            .where(filter=FieldFilter("type", "==", AchievementType.WEEKLY_FIFTY.value))
-            .where(filter=FieldFilter("period_start_date", "==", period_str))
-            .limit(1)
-            .stream()
-        )
-        async for _ in docs_stream:
-            return True
-        return False
-
-    async def get_catalog(self, max_age_seconds: int = 300) -> list[dict]:
-        """Return catalog items as list[dict]. Cached in-memory for *max_age_seconds*."""
-        import time
-        now = time.time()
-        if self._catalog_cache is not None and self._catalog_cache_ts and now - self._catalog_cache_ts < max_age_seconds:
-            return self._catalog_cache  # type: ignore[return-value]
+        return await self._exists(achievement_doc_id(user_id, AchievementType.WEEKLY_FIFTY, period_start.isoformat()))
+
+    async def _exists(self, achievement_id: str) -> bool:
+        with track_op("AchievementRepository.exists_achievement") as op:
+            doc = await self._collection.document(achievement_id).get()
+            op.reads += 1
+        return doc.exists
+
+    async def get_catalog(self) -> list[dict]:
+        """Return catalog items as list[dict]: from the process-wide cache (never waits on Firestore) if set."""
+        if self._catalog_cache is not None:
+            return self._catalog_cache.get()
+        return await self.load_catalog()
+
+    async def load_catalog(self) -> list[dict]:
+        """Read all catalog items from Firestore."""
         docs_stream = self._catalog_collection.stream()
         catalog: list[dict] = []
-        async for doc in docs_stream:
-            catalog.append(doc.to_dict())
-        self._catalog_cache = catalog
-        self._catalog_cache_ts = now
+        with track_op("AchievementRepository.get_catalog") as op:
+            async for doc in docs_stream:
+                op.query_docs += 1
+                catalog.append(doc.to_dict())
         return catalog
 
+    async def get_catalog_version(self) -> Optional[int]:
+        """Версия каталога (одно чтение); None, если документа версии нет."""
+        with track_op("AchievementRepository.get_catalog_version") as op:
+            doc = await self._catalog_version_ref.get()
+            op.reads += 1
+        return doc.get("version") if doc.exists else None
+
     async def delete_weekly_achievements(self, user_id: str, period_start: date) -> None:
         period_str = period_start.isoformat()
         docs_to_delete_stream = (
@@ -81,7 +136,10 @@ class AchievementRepository:
             .stream()
         )
         
-        async for doc in docs_to_delete_stream:
-            await doc.reference.delete()
+        with track_op("AchievementRepository.delete_weekly_achievements") as op:
+            async for doc in docs_to_delete_stream:
+                op.query_docs += 1
+                await doc.reference.delete()
+                op.deletes += 1
 
 
@@ -0,0 +1,90 @@
+import zlib
+from datetime import date
+from typing import Dict, List, Tuple
+
+from google.cloud.firestore_v1.async_client import AsyncClient
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from shared.firestore_stats import track_op
+
+# Лимит Firestore на число записей в одном commit
+MAX_WRITES_PER_COMMIT = 500
+# Записи одного дня делятся по документам, чтобы не упереться в лимит 1 МиБ на документ
+_SHARDS = 8
+
+
+class LeaderboardRepository:
+    """Сохранения недельного рейтинга: leaderboard_days/{YYYY-MM-DD}_{NN}.
+
+    Документ хранит date и entries — {uid: {"score", "level", "display_name"}}
+    для пользователей своего шарда (crc32(uid) % _SHARDS). Запись идёт через
+    set(merge=True): процессы дописывают только изменённых ими пользователей.
+    """
+
+    def __init__(self, db: AsyncClient):
+        self._db = db
+        self._collection = db.collection("leaderboard_days")
+        self._progress_collection = db.collection("progress")
+
+    @staticmethod
+    def _shard(user_id: str) -> int:
+        return zlib.crc32(user_id.encode("utf-8")) % _SHARDS
+
+    def _day_refs(self, day: date) -> list:
+        return [self._collection.document(f"{day.isoformat()}_{shard:02d}") for shard in range(_SHARDS)]
+
+    async def load_days(self, days: List[date]) -> Dict[date, Dict[str, dict]]:
+        """Сохранённые записи за дни (get_all по всем шардам); дни без записей не возвращаются."""
+        refs = [ref for day in days for ref in self._day_refs(day)]
+        result: Dict[date, Dict[str, dict]] = {}
+        with track_op("LeaderboardRepository.load_days") as op:
+            async for doc in self._db.get_all(refs):
+                if not doc.exists:
+                    continue
+                data = doc.to_dict()
+                if data.get("entries"):
+                    result.setdefault(date.fromisoformat(data["date"]), {}).update(data["entries"])
+            op.reads += len(refs)
+        return result
+
+    async def save_days(self, entries: Dict[date, Dict[str, dict]]) -> None:
+        """Дописывает записи в документы дней (batch-ами по MAX_WRITES_PER_COMMIT документов)."""
+        writes = []
+        for day, day_entries in entries.items():
+            shards: Dict[int, Dict[str, dict]] = {}
+            for user_id, entry in day_entries.items():
+                shards.setdefault(self._shard(user_id), {})[user_id] = entry
+            refs = self._day_refs(day)
+            for shard, shard_entries in shards.items():
+                writes.append((refs[shard], {"date": day.isoformat(), "entries": shard_entries}))
+        with track_op("LeaderboardRepository.save_days") as op:
+            for start in range(0, len(writes), MAX_WRITES_PER_COMMIT):
+                batch = self._db.batch()
+                for ref, data in writes[start:start + MAX_WRITES_PER_COMMIT]:
+                    batch.set(ref, data, merge=True)
+                await batch.commit()
+                op.writes += len(writes[start:start + MAX_WRITES_PER_COMMIT])
+                op.batch_commits += 1
+
+    async def delete_days(self, days: List[date]) -> None:
+        """Удаляет сохранения дней, выпавших из окна рейтинга."""
+        refs = [ref for day in days for ref in self._day_refs(day)]
+        with track_op("LeaderboardRepository.delete_days") as op:
+            for start in range(0, len(refs), MAX_WRITES_PER_COMMIT):
+                batch = self._db.batch()
+                for ref in refs[start:start + MAX_WRITES_PER_COMMIT]:
+                    batch.delete(ref)
+                await batch.commit()
+                op.deletes += len(refs[start:start + MAX_WRITES_PER_COMMIT])
+                op.batch_commits += 1
+
+    async def scan_progress(self, since: date) -> List[Tuple[str, date, int]]:
+        """(uid, день, очки) из progress начиная с *since*: первое построение рейтинга без сохранений."""
+        query = self._progress_collection.where(filter=FieldFilter("date", ">=", since.isoformat()))
+        result = []
+        with track_op("LeaderboardRepository.scan_progress") as op:
+            async for doc in query.stream():
+                op.query_docs += 1
+                data = doc.to_dict()
+                result.append((data["user_id"], date.fromisoformat(data["date"]), int(data.get("score", 0))))
+        return result
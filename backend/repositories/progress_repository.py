@@ -1,38 +1,239 @@
-from domain.progress import ProgressRecord
-from datetime import date, datetime
-from typing import List
+from domain.progress import ProgressRecord, UserProgressStats
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from google.cloud.firestore_v1 import DELETE_FIELD, Increment
 from google.cloud.firestore_v1.base_query import FieldFilter
 from google.cloud.firestore_v1.async_client import AsyncClient
+from google.cloud.firestore_v1.async_transaction import async_transactional
+
+from shared import config
+from shared.firestore_stats import track_op
+
+# Лимит Firestore на число записей в одном commit (batch или транзакция)
+MAX_WRITES_PER_COMMIT = 500
+# Firestore тарифицирует агрегацию как одно чтение на каждые 1000 записей индекса
+_AGGREGATION_ENTRIES_PER_READ = 1000
+# Агрегат user_stats — общий документ для всех устройств пользователя: при
+# одновременных записях транзакции конфликтуют и повторяются
+_WRITE_TRANSACTION_ATTEMPTS = 10
+# Поля записи, которые хранятся по дням в документах progress_months
+_MONTH_FIELDS = ("score", "correct_answers", "total_answers", "time_spent")
 
 class ProgressRepository:
-    def __init__(self, db: AsyncClient):
+    def __init__(self, db: AsyncClient, sum_source: Optional[str] = None, monthly_docs: Optional[bool] = None):
+        self._db = db
+        # Источник сумм очков: "stats" — агрегат user_stats (с агрегацией Firestore,
+        # пока агрегата нет), "aggregate" — всегда sum/count на сервере,
+        # "scan" — чтение всех документов (старое поведение, для сравнения)
+        self._sum_source = sum_source or config.PROGRESS_SUM_SOURCE
         self._collection = db.collection("progress")
+        # Агрегаты по пользователям: user_stats/{user_id}
+        self._stats_collection = db.collection("user_stats")
+        # Помесячные документы progress_months/{user_id}_{YYYY-MM}: поля _MONTH_FIELDS —
+        # словари {"DD": значение} по дням месяца
+        self._monthly_docs = config.PROGRESS_MONTHLY_DOCS if monthly_docs is None else monthly_docs
+        self._months_collection = db.collection("progress_months")
 
     async def record_daily_score(self, record: ProgressRecord) -> None:
         """
         Сохраняет запись ProgressRecord, преобразуя date в строку ISO,
         чтобы Firestore мог сохранить значение.
+        В той же транзакции обновляет агрегат user_stats/{user_id}.
+        """
+        with track_op("ProgressRepository.record_daily_score") as op:
+            await self._write_days(record.user_id, [record], op)
+
+    async def record_daily_scores(self, user_id: str, records: List[ProgressRecord]) -> None:
+        """
+        Сохраняет записи одного пользователя за несколько дней одним commit
+        вместе с агрегатом user_stats/{user_id}.
+        Дни должны быть разными; размер ограничен лимитом Firestore (500 записей на commit).
+        """
+        self._check_commit_size(records)
+        with track_op("ProgressRepository.record_daily_scores") as op:
+            await self._write_days(user_id, records, op)
+
+    async def accumulate_daily_score(self, record: ProgressRecord) -> None:
+        """
+        Прибавляет результаты record к записи за день (Increment) без чтения документа дня,
+        поэтому параллельные записи с нескольких устройств не теряются.
+        Агрегат user_stats/{user_id} обновляется в той же транзакции.
+        """
+        with track_op("ProgressRepository.accumulate_daily_score") as op:
+            await self._write_days(record.user_id, [record], op, accumulate=True)
+
+    async def accumulate_daily_scores(self, user_id: str, records: List[ProgressRecord]) -> None:
+        """
+        Накопительная запись за несколько дней одним commit; записи за один день складываются.
+        Размер ограничен лимитом Firestore (500 записей на commit).
         """
+        by_day: Dict[date, ProgressRecord] = {}
+        for record in records:
+            by_day[record.date] = by_day[record.date].combined_with(record) if record.date in by_day else record
+        self._check_commit_size(list(by_day.values()))
+        with track_op("ProgressRepository.accumulate_daily_scores") as op:
+            await self._write_days(user_id, list(by_day.values()), op, accumulate=True)
+
+    def _check_commit_size(self, records: List[ProgressRecord]) -> None:
+        writes = len(records) + 1
+        if self._monthly_docs:
+            writes += len({record.date.strftime("%Y-%m") for record in records})
+        if writes > MAX_WRITES_PER_COMMIT:
+            raise ValueError(f"Too many records for one commit: {len(records)}")
+
+    def _day_ref(self, user_id: str, day: date):
         # Формируем уникальный ID документа: "<user_id>_<YYYY-MM-DD>"
-        doc_id = f"{record.user_id}_{record.date.isoformat()}"
-        data = record.model_dump(mode="json")
-        # В mode="json" date уже преобразуется в строку автоматически
-        await self._collection.document(doc_id).set(data)
+        return self._collection.document(f"{user_id}_{day.isoformat()}")
+
+    def _month_ref(self, user_id: str, month: str):
+        # ID помесячного документа: "<user_id>_<YYYY-MM>"
+        return self._months_collection.document(f"{user_id}_{month}")
+
+    @staticmethod
+    def _month_updates(user_id: str, records: List[ProgressRecord], accumulate: bool = False) -> Dict[str, dict]:
+        """Данные помесячных документов по записям: {"YYYY-MM": поля для set()}."""
+        months: Dict[str, dict] = {}
+        for record in records:
+            month = record.date.strftime("%Y-%m")
+            data = months.setdefault(month, {"user_id": user_id, "month": month,
+                                             **{field: {} for field in _MONTH_FIELDS}})
+            day_key = f"{record.date.day:02d}"
+            for field in _MONTH_FIELDS:
+                value = getattr(record, field)
+                data[field][day_key] = Increment(value) if accumulate else value
+        return months
+
+    async def _write_days(self, user_id: str, records: List[ProgressRecord], op, accumulate: bool = False) -> None:
+        """
+        Транзакция: читает прежние записи за эти дни и агрегат, пишет всё разом.
+        С accumulate документы дней не читаются: результаты прибавляются через Increment.
+        """
+        # Серии дней в агрегате считаются по записям в порядке дат
+        records = sorted(records, key=lambda r: r.date)
+        day_refs = [self._day_ref(user_id, record.date) for record in records]
+        stats_ref = self._stats_collection.document(user_id)
+
+        @async_transactional
+        async def _write(transaction) -> int:
+            previous = {}
+            if not accumulate:
+                async for doc in self._db.get_all(day_refs, transaction=transaction):
+                    if doc.exists:
+                        previous[doc.id] = self._to_record(doc.to_dict())
+                op.reads += len(day_refs)
+            stats_doc = await stats_ref.get(transaction=transaction)
+            op.reads += 1
+            if stats_doc.exists:
+                stats = UserProgressStats.model_validate(stats_doc.to_dict())
+                stats.window_days = config.PROGRESS_STATS_WINDOW_DAYS
+                month_updates = self._month_updates(user_id, records, accumulate) if self._monthly_docs else {}
+                merge_months = True
+            else:
+                # Первая запись после появления агрегата: строим его по истории
+                history = await self._history(user_id, op)
+                stats = UserProgressStats.from_records(user_id, history, config.PROGRESS_STATS_WINDOW_DAYS)
+                month_updates = {}
+                merge_months = False
+                if self._monthly_docs:
+                    # Помесячные документы сразу строятся по всей истории вместе с новыми записями
+                    days = {record.date: record for record in history}
+                    for record in records:
+                        if accumulate and record.date in days:
+                            days[record.date] = days[record.date].combined_with(record)
+                        else:
+                            days[record.date] = record
+                    month_updates = self._month_updates(user_id, list(days.values()))
+                    stats.monthly_docs = True
+            for record, day_ref in zip(records, day_refs):
+                if accumulate:
+                    stats.add(record)
+                    transaction.set(day_ref, self._increments(record), merge=True)
+                else:
+                    stats.apply(record, previous.get(day_ref.id))
+                    # В mode="json" date уже преобразуется в строку автоматически
+                    transaction.set(day_ref, record.model_dump(mode="json"))
+            # merge=True заменяет в помесячных документах только значения за эти дни
+            for month, data in month_updates.items():
+                transaction.set(self._month_ref(user_id, month), data, merge=merge_months)
+            transaction.set(stats_ref, stats.model_dump(mode="json"))
+            return len(records) + len(month_updates) + 1
+
+        op.writes += await _write(self._db.transaction(max_attempts=_WRITE_TRANSACTION_ATTEMPTS))
+        op.batch_commits += 1
+
+    @staticmethod
+    def _increments(record: ProgressRecord) -> dict:
+        """Поля документа дня для set(merge=True): результаты record прибавляются к сохранённым."""
+        return {
+            "user_id": record.user_id,
+            "date": record.date.isoformat(),
+            "score": Increment(record.score),
+            "correct_answers": Increment(record.correct_answers),
+            "total_answers": Increment(record.total_answers),
+            "time_spent": Increment(record.time_spent),
+            # success_rate вычисляется при чтении; сохранённое значение устарело бы
+            "success_rate": DELETE_FIELD,
+        }
+
+    async def get_user_stats(self, user_id: str) -> Optional[UserProgressStats]:
+        """Читает агрегат пользователя; None, если он ещё не создан."""
+        with track_op("ProgressRepository.get_user_stats") as op:
+            doc = await self._stats_collection.document(user_id).get()
+            op.reads += 1
+        if not doc.exists:
+            return None
+        return UserProgressStats.model_validate(doc.to_dict())
+
+    async def _history(self, user_id: str, op) -> List[ProgressRecord]:
+        """Все записи пользователя (для построения агрегата)."""
+        query = self._collection.where(filter=FieldFilter("user_id", "==", user_id))
+        records = [self._to_record(doc.to_dict()) async for doc in query.stream()]
+        op.query_docs += len(records)
+        return records
+
+    @staticmethod
+    def _to_record(data: dict) -> ProgressRecord:
+        # Конвертируем строку даты обратно в объект date
+        if isinstance(data["date"], str):
+            data["date"] = date.fromisoformat(data["date"])
+        return ProgressRecord.model_validate(data)
+
+    async def _sum_scores(self, query, op_name: str) -> int:
+        """Сумма поля score по запросу: агрегацией на сервере или чтением документов."""
+        if self._sum_source == "scan":
+            total = 0
+            with track_op(op_name) as op:
+                async for doc in query.stream():
+                    op.query_docs += 1
+                    data = doc.to_dict()
+                    total += data.get("score", 0)
+            return total
+
+        with track_op(op_name) as op:
+            results = await query.sum("score", alias="total_score").count(alias="days").get()
+            aggregates = {result.alias: result.value for result in results[0]}
+            op.reads += max(1, -(-aggregates["days"] // _AGGREGATION_ENTRIES_PER_READ))
+        return int(aggregates["total_score"] or 0)
 
     async def sum_total_score(self, user_id: str) -> int:
         """Возвращает сумму всех очков пользователя за всё время."""
+        if self._sum_source == "stats":
+            stats = await self.get_user_stats(user_id)
+            if stats is not None:
+                return stats.total_score
+        # Агрегата нет (или он не используется) — считаем по истории
         query = self._collection.where(filter=FieldFilter("user_id", "==", user_id))
-        total = 0
-        async for doc in query.stream():
-            data = doc.to_dict()
-            total += data.get("score", 0)
-        return total
+        return await self._sum_scores(query, "ProgressRepository.sum_total_score")
 
     async def sum_scores_for_week(self, user_id: str, week_ago: datetime) -> int:
         """
         Суммирует daily_score для всех записей, где поле date >= week_ago.date().
         Поскольку мы храним date как строку "YYYY-MM-DD", сравниваем строку.
         """
+        if self._sum_source == "stats":
+            stats = await self.get_user_stats(user_id)
+            if stats is not None and stats.covers(week_ago.date()):
+                return stats.score_since(week_ago.date())
         # week_ago.date().isoformat() даст "YYYY-MM-DD"
         week_str = week_ago.date().isoformat()
         query = (
@@ -40,15 +241,12 @@ class ProgressRepository:
             .where(filter=FieldFilter("user_id", "==", user_id))
             .where(filter=FieldFilter("date", ">=", week_str))
         )
-        total = 0
-        async for doc in query.stream():
-            data = doc.to_dict()
-            total += data.get("score", 0)
-        return total
+        return await self._sum_scores(query, "ProgressRepository.sum_scores_for_week")
         
     async def get_progress(self, user_id: str, start_date: str, end_date: str) -> List[ProgressRecord]:
         """
         Получает записи прогресса за указанный период.
+        С помесячными документами читает по одному документу на месяц.
         
         Args:
             user_id: ID пользователя
@@ -58,6 +256,10 @@ class ProgressRepository:
         Returns:
             Список объектов ProgressRecord
         """
+        if self._monthly_docs:
+            return await self._get_progress_from_months(
+                user_id, date.fromisoformat(start_date), date.fromisoformat(end_date))
+
         query = (
             self._collection
             .where(filter=FieldFilter("user_id", "==", user_id))
@@ -66,12 +268,81 @@ class ProgressRepository:
         )
         
         progress_records: List[ProgressRecord] = []
-        async for doc in query.stream():
-            data = doc.to_dict()
-            # Конвертируем строку даты обратно в объект date
-            if isinstance(data["date"], str):
-                data["date"] = date.fromisoformat(data["date"])
-            # Создаем объект ProgressRecord из данных Firestore
-            progress_records.append(ProgressRecord.model_validate(data))
+        with track_op("ProgressRepository.get_progress") as op:
+            async for doc in query.stream():
+                op.query_docs += 1
+                # Создаем объект ProgressRecord из данных Firestore
+                progress_records.append(self._to_record(doc.to_dict()))
             
         return progress_records
+
+    async def _get_progress_from_months(self, user_id: str, start: date, end: date) -> List[ProgressRecord]:
+        """Записи за период по документам progress_months (вместе с user_stats — одним get_all)."""
+        months = []
+        month_start = start.replace(day=1)
+        while month_start <= end:
+            months.append(month_start.strftime("%Y-%m"))
+            month_start = (month_start + timedelta(days=32)).replace(day=1)
+        stats_ref = self._stats_collection.document(user_id)
+        month_refs = [self._month_ref(user_id, month) for month in months]
+
+        with track_op("ProgressRepository.get_progress") as op:
+            docs = {doc.reference.path: doc async for doc in self._db.get_all([stats_ref, *month_refs])}
+            op.reads += len(month_refs) + 1
+            stats_doc = docs[stats_ref.path]
+            if not (stats_doc.exists and stats_doc.to_dict().get("monthly_docs")):
+                # История пользователя ещё не перенесена в помесячные документы
+                await self._backfill_months(user_id, op)
+                docs = {doc.reference.path: doc async for doc in self._db.get_all(month_refs)}
+                op.reads += len(month_refs)
+
+        records: List[ProgressRecord] = []
+        for month_ref in month_refs:
+            doc = docs[month_ref.path]
+            if doc.exists:
+                records.extend(self._month_records(user_id, doc.to_dict(), start, end))
+        return records
+
+    async def _backfill_months(self, user_id: str, op) -> None:
+        """Строит progress_months по истории пользователя и отмечает это в user_stats (одна транзакция)."""
+        stats_ref = self._stats_collection.document(user_id)
+        query = self._collection.where(filter=FieldFilter("user_id", "==", user_id))
+
+        @async_transactional
+        async def _backfill(transaction) -> None:
+            records = [self._to_record(doc.to_dict()) async for doc in query.stream(transaction=transaction)]
+            stats_doc = await stats_ref.get(transaction=transaction)
+            op.query_docs += len(records)
+            op.reads += 1
+            if stats_doc.exists:
+                stats = UserProgressStats.model_validate(stats_doc.to_dict())
+            else:
+                stats = UserProgressStats.from_records(user_id, records, config.PROGRESS_STATS_WINDOW_DAYS)
+            stats.monthly_docs = True
+            # Полная перезапись: накопительные записи, сделанные до переноса, уже есть в днях
+            month_updates = self._month_updates(user_id, records)
+            for month, data in month_updates.items():
+                transaction.set(self._month_ref(user_id, month), data)
+            transaction.set(stats_ref, stats.model_dump(mode="json"))
+            return len(month_updates) + 1
+
+        op.writes += await _backfill(self._db.transaction())
+        op.batch_commits += 1
+
+    @staticmethod
+    def _month_records(user_id: str, data: dict, start: date, end: date) -> List[ProgressRecord]:
+        """Разворачивает помесячный документ в записи за дни из [start, end]."""
+        year, month = (int(part) for part in data["month"].split("-"))
+        records = []
+        for day_key in sorted(data.get("score", {})):
+            day = date(year, month, int(day_key))
+            if start <= day <= end:
+                records.append(ProgressRecord(
+                    user_id=user_id,
+                    date=day,
+                    score=data["score"][day_key],
+                    correct_answers=data["correct_answers"].get(day_key, 0),
+                    total_answers=data["total_answers"].get(day_key, 0),
+                    time_spent=data["time_spent"].get(day_key, 0.0),
+                ))
+        return records
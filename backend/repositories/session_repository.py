@@ -1,8 +1,20 @@
-from domain.session import SessionModel, RoundDetail
+from domain.achievement import AchievementModel
+from domain.session import SessionModel, RoundDetail, SessionStatus
+from google.cloud.firestore_v1 import Increment
 from google.cloud.firestore_v1.async_client import AsyncClient
 from google.cloud.firestore_v1.async_batch import AsyncWriteBatch
+from google.cloud.firestore_v1.async_transaction import async_transactional
+from google.cloud.firestore_v1.base_query import FieldFilter
 from typing import List
-from datetime import datetime
+from datetime import datetime, timezone
+
+from shared.firestore_stats import track_op
+
+
+# Статусы, из которых сессию можно завершить (брошенную — если игра всё же прислала результат)
+_FINISHABLE = (SessionStatus.ACTIVE.value, SessionStatus.ABANDONED.value)
+# Записей на одну брошенную сессию: статус и (возможно) удаление указателя; плюс состояние прохода
+MAX_ABANDON_PAGE_SIZE = (500 - 1) // 2
 
 
 class SessionRepository:
@@ -10,6 +22,13 @@ class SessionRepository:
         # Клиент Firestore передается через конструктор
         self._db = db # Сохраняем клиент в self._db для использования в других методах
         self._collection = self._db.collection("sessions")
+        # Указатели на активную сессию: active_sessions/{user_id} — поля сессии и session_id
+        self._active_collection = self._db.collection("active_sessions")
+        # Счётчики завершённых сессий пользователя: session_stats/{user_id}
+        self._stats_collection = self._db.collection("session_stats")
+        self._achievements_collection = self._db.collection("achievements")
+        # Состояние очистки брошенных сессий (cutoff и курсор текущего прохода)
+        self._sweep_ref = self._db.collection("maintenance").document("session_sweeper")
 
     async def create_session(self, session: SessionModel) -> None:
         """
@@ -18,42 +37,162 @@ class SessionRepository:
         - game_type
         - started_at
         (поле session_id используем только как ID документа, но не записываем его в сам документ)
+        и в том же batch делает её активной сессией пользователя (active_sessions/{user_id}).
         """
         # Берём словарь из pydantic-модели,
         # но явно исключаем session_id, end_time, score и details,
         # чтобы в Firestore хранились только user_id, game_type, start_time, status
         data = session.model_dump(mode="json", exclude={"session_id", "end_time", "score", "details"})
-        await self._collection.document(session.session_id).set(data)
+        batch: AsyncWriteBatch = self._db.batch()
+        batch.set(self._collection.document(session.session_id), data)
+        batch.set(self._active_collection.document(session.user_id), {**data, "session_id": session.session_id})
+        with track_op("SessionRepository.create_session") as op:
+            await batch.commit()
+            op.writes += 2
+            op.batch_commits += 1
 
-    async def update_session(
+    async def get_active_session(self, user_id: str) -> SessionModel | None:
+        """Активная сессия пользователя — одно чтение указателя, без запроса по sessions."""
+        with track_op("SessionRepository.get_active_session") as op:
+            doc = await self._active_collection.document(user_id).get()
+            op.reads += 1
+        if doc.exists:
+            return SessionModel(**doc.to_dict())
+        return None
+
+    async def finish_session(
         self,
         session_id: str,
+        user_id: str,
         details: List[RoundDetail],
         ended_at: datetime,
-        score: int
-    ) -> None:
+        score: int,
+        achievements: List[AchievementModel],
+    ) -> bool:
         """
-        Обновляет документ sessions/{session_id}:
-        - добавляет поле details (список из RoundDetail),
-        - добавляет поля ended_at и score.
-        Всё в атомарном WriteBatch.
+        Завершает сессию одним commit транзакции:
+        - sessions/{session_id}: details, ended_at, score и status=finished;
+        - удаление указателя active_sessions/{user_id}, если он на эту сессию;
+        - создание выданных за сессию достижений;
+        - инкременты session_stats/{user_id}.
+        Сессия и указатель читаются одним get_all. Брошенную (abandoned)
+        сессию ещё можно завершить; повторное завершение ничего не пишет.
+        ValueError — если сессии нет или она другого пользователя.
+        Возвращает True, если удалён указатель.
         """
-        # Используем self._db для создания batch
-        batch: AsyncWriteBatch = self._db.batch()
-        doc_ref = self._collection.document(session_id)
-        batch.update(doc_ref, {
-            "details": [d.model_dump(mode="json") for d in details],
-            "ended_at": ended_at.isoformat(),  # Преобразуем datetime в ISO строку
-            "score": score
-        })
-        await batch.commit()
+        session_ref = self._collection.document(session_id)
+        pointer_ref = self._active_collection.document(user_id)
+        correct = sum(1 for detail in details if detail.is_correct)
+
+        @async_transactional
+        async def _finish(transaction) -> bool:
+            docs = {doc.id: doc async for doc in self._db.get_all([session_ref, pointer_ref], transaction=transaction)}
+            op.reads += 2
+            session_doc, pointer_doc = docs.get(session_id), docs.get(user_id)
+            if session_doc is None or not session_doc.exists or session_doc.to_dict().get("user_id") != user_id:
+                raise ValueError(f"Session {session_id} not found")
+            if session_doc.to_dict().get("status") not in _FINISHABLE:
+                return False
+            transaction.update(session_ref, {
+                "details": [d.model_dump(mode="json") for d in details],
+                "ended_at": ended_at.isoformat(),
+                "score": score,
+                "status": SessionStatus.FINISHED.value,
+            })
+            cleared = pointer_doc is not None and pointer_doc.exists and \
+                pointer_doc.to_dict().get("session_id") == session_id
+            if cleared:
+                transaction.delete(pointer_ref)
+            for achievement in achievements:
+                transaction.create(self._achievements_collection.document(achievement.achievement_id),
+                                   achievement.model_dump(mode="json"))
+            transaction.set(self._stats_collection.document(user_id), {
+                "user_id": user_id,
+                "sessions_finished": Increment(1),
+                "session_score": Increment(score),
+                "rounds_played": Increment(len(details)),
+                "correct_answers": Increment(correct),
+                "last_finished_at": ended_at.isoformat(),
+            }, merge=True)
+            op.writes += 2 + len(achievements) + (1 if cleared else 0)
+            op.batch_commits += 1
+            return cleared
+
+        with track_op("SessionRepository.finish_session") as op:
+            return await _finish(self._db.transaction())
+
+    async def get_sweep_checkpoint(self) -> dict:
+        """Состояние очистки брошенных сессий: cutoff и in_progress незавершённого прохода."""
+        with track_op("SessionRepository.get_sweep_checkpoint") as op:
+            doc = await self._sweep_ref.get()
+            op.reads += 1
+        return doc.to_dict() if doc.exists else {}
+
+    async def abandon_sessions_page(self, cutoff: str, page_size: int) -> int:
+        """
+        Помечает abandoned до page_size самых старых активных сессий с
+        start_time < cutoff одной транзакцией: статус, удаление указателей на
+        них и состояние прохода в maintenance/session_sweeper.
+        Помеченные сессии выпадают из запроса, поэтому каждая страница читается
+        с начала, без курсора по start_time (он не уникален, и сессии с тем же
+        start_time, что у последней на странице, пропускались бы).
+        Транзакция не даёт перезаписать сессию, завершённую параллельно.
+        Возвращает число помеченных сессий.
+        """
+        if page_size > MAX_ABANDON_PAGE_SIZE:
+            raise ValueError(f"page_size must not exceed {MAX_ABANDON_PAGE_SIZE}")
+        query = (
+            self._collection
+            .where(filter=FieldFilter("status", "==", SessionStatus.ACTIVE.value))
+            .where(filter=FieldFilter("start_time", "<", cutoff))
+            .order_by("start_time")
+            .limit(page_size)
+        )
+
+        @async_transactional
+        async def _abandon(transaction) -> int:
+            sessions = [doc async for doc in query.stream(transaction=transaction)]
+            op.query_docs += len(sessions)
+            if not sessions:
+                return 0
+            user_ids = {doc.to_dict()["user_id"] for doc in sessions}
+            pointers = {doc.id: doc.to_dict() async for doc in self._db.get_all(
+                [self._active_collection.document(user_id) for user_id in user_ids], transaction=transaction)
+                if doc.exists}
+            op.reads += len(user_ids)
+            abandoned_at = datetime.now(timezone.utc).isoformat()
+            writes = 0
+            for doc in sessions:
+                transaction.update(doc.reference, {"status": SessionStatus.ABANDONED.value,
+                                                   "abandoned_at": abandoned_at})
+                user_id = doc.to_dict()["user_id"]
+                if pointers.get(user_id, {}).get("session_id") == doc.id:
+                    transaction.delete(self._active_collection.document(user_id))
+                    writes += 1
+            transaction.set(self._sweep_ref, {"cutoff": cutoff, "in_progress": True,
+                                              "swept": Increment(len(sessions))}, merge=True)
+            op.writes += len(sessions) + writes + 1
+            op.batch_commits += 1
+            return len(sessions)
+
+        with track_op("SessionRepository.abandon_sessions_page") as op:
+            return await _abandon(self._db.transaction())
+
+    async def complete_sweep(self, cutoff: str) -> None:
+        """Проход очистки завершён: следующий начнётся с нового cutoff."""
+        with track_op("SessionRepository.complete_sweep") as op:
+            await self._sweep_ref.set({"cutoff": cutoff, "in_progress": False,
+                                       "completed_at": datetime.now(timezone.utc).isoformat()}, merge=True)
+            op.writes += 1
 
     async def get_session(self, session_id: str) -> SessionModel | None:
         """
         Получает документ sessions/{session_id} из Firestore и возвращает SessionModel.
         Если документа нет – возвращает None.
         """
-        doc = await self._collection.document(session_id).get()
+        with track_op("SessionRepository.get_session") as op:
+            doc = await self._collection.document(session_id).get()
+            op.reads += 1
         if doc.exists:
             data = doc.to_dict()
             # В полученных данных уже нет session_id, поэтому передаём его отдельно
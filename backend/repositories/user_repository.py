@@ -1,24 +1,48 @@
+from typing import Dict, List
+
 from domain.user import UserModel
 from google.cloud.firestore_v1.async_client import AsyncClient
 
+from shared.firestore_stats import track_op
+
 class UserRepository:
     def __init__(self, db: AsyncClient):
+        self._db = db
         self._collection = db.collection("users")
 
     async def create_user(self, user: UserModel) -> None:
         # Используем model_dump с параметром mode="json", который превращает объекты в JSON-совместимые значения
-        await self._collection.document(user.uid).set(user.model_dump(mode="json"))
+        with track_op("UserRepository.create_user") as op:
+            await self._collection.document(user.uid).set(user.model_dump(mode="json"))
+            op.writes += 1
 
     async def get_user(self, uid: str) -> UserModel | None:
-        doc = await self._collection.document(uid).get()
+        with track_op("UserRepository.get_user") as op:
+            doc = await self._collection.document(uid).get()
+            op.reads += 1
         if doc.exists:
             return UserModel(**doc.to_dict())
         return None
 
+    async def get_users(self, uids: List[str]) -> Dict[str, UserModel]:
+        """Профили нескольких пользователей одним get_all; отсутствующих нет в результате."""
+        refs = [self._collection.document(uid) for uid in uids]
+        users: Dict[str, UserModel] = {}
+        with track_op("UserRepository.get_users") as op:
+            async for doc in self._db.get_all(refs):
+                if doc.exists:
+                    users[doc.id] = UserModel(**doc.to_dict())
+            op.reads += len(refs)
+        return users
+
     async def update_user(self, user: UserModel) -> None:
         # Исключаем created_at из обновления и преобразуем в JSON-совместимый формат
         data = user.model_dump(mode="json", exclude={"created_at"})
-        await self._collection.document(user.uid).update(data)
+        with track_op("UserRepository.update_user") as op:
+            await self._collection.document(user.uid).update(data)
+            op.writes += 1
 
     async def delete_user(self, uid: str) -> None:
-        await self._collection.document(uid).delete()
+        with track_op("UserRepository.delete_user") as op:
+            await self._collection.document(uid).delete()
+            op.deletes += 1
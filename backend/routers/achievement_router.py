@@ -30,7 +30,7 @@ async def list_achievements(
     # Получаем каталог и разблокированные достижения пользователя
     catalog_items = await ach_service._achievement_repo.get_catalog()
     unlocked_models = await ach_service._achievement_repo.get_user_achievements(uid)
-    unlocked_ids = {a.type.value for a in unlocked_models}
+    unlocked_ids = {a.type for a in unlocked_models}
 
     # Маппим в ответ
     return [AchievementModel(**item, unlocked=item["id"] in unlocked_ids) for item in catalog_items]
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from shared.auth import get_current_user_id
 from shared.dependencies import get_db
+from shared.firestore_stats import track_op
 from google.cloud.firestore_v1.async_client import AsyncClient  # Async Firestore client
 
 # Вспомогательная обёртка для обратной совместимости с тестами,
@@ -51,10 +52,12 @@ async def get_animals(uid: str = Depends(get_current_user_id), db: AsyncClient =
         query_with_limit = query.limit(limit)
 
         result: List[AnimalContent] = []
-        async for doc in query_with_limit.stream():  # Асинхронный итератор Firestore
-            data = doc.to_dict()
-            data["id"] = doc.id
-            result.append(AnimalContent(**data))
+        with track_op("content.get_animals") as op:
+            async for doc in query_with_limit.stream():  # Асинхронный итератор Firestore
+                op.query_docs += 1
+                data = doc.to_dict()
+                data["id"] = doc.id
+                result.append(AnimalContent(**data))
 
         return result
     except Exception as e:
@@ -82,7 +85,9 @@ async def get_animal_by_id(
             .collection("items")
             .document(animal_id)
         )
-        doc = await doc_ref.get()
+        with track_op("content.get_animal_by_id") as op:
+            doc = await doc_ref.get()
+            op.reads += 1
 
         if not doc.exists:
             raise HTTPException(
@@ -138,10 +143,12 @@ async def get_sentences(db: AsyncClient = Depends(get_db),
 
         # Преобразуем в список моделей
         result = []
-        async for doc in docs:
-            data = doc.to_dict()
-            data["id"] = doc.id  # Добавляем идентификатор документа
-            result.append(SentenceContent(**data))
+        with track_op("content.get_sentences") as op:
+            async for doc in docs:
+                op.query_docs += 1
+                data = doc.to_dict()
+                data["id"] = doc.id  # Добавляем идентификатор документа
+                result.append(SentenceContent(**data))
 
         return result
     except Exception as e:
@@ -0,0 +1,46 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+
+from services.leaderboard_service import LeaderboardService
+from shared import config
+from shared.auth import get_current_user_id
+from shared.dependencies import get_leaderboard_service
+
+router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
+
+
+class LeaderboardEntryResponse(BaseModel):
+    rank: int
+    user_id: str
+    display_name: Optional[str] = None
+    score: int
+
+
+class LeaderboardRankResponse(BaseModel):
+    rank: int
+    score: int
+
+
+class LeaderboardResponse(BaseModel):
+    period: str
+    level: Optional[str] = None
+    since: str
+    entries: List[LeaderboardEntryResponse]
+    me: Optional[LeaderboardRankResponse] = None
+
+
+@router.get("", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    period: Literal["week"] = Query("week", description="Период рейтинга"),
+    level: Optional[str] = Query(None, description="Только игроки этого уровня (beginner, intermediate, ...)"),
+    limit: int = Query(10, ge=1, le=config.LEADERBOARD_MAX_LIMIT, description="Сколько первых мест вернуть"),
+    uid: str = Depends(get_current_user_id),
+    leaderboard_service: LeaderboardService = Depends(get_leaderboard_service),
+):
+    """
+    Рейтинг игроков по очкам за последние 7 дней и место текущего пользователя
+    (me — null, если у него нет очков за неделю). Требуется токен авторизации.
+    """
+    return await leaderboard_service.get_weekly(uid, level=level, limit=limit)
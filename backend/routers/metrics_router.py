@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+
+from shared.metrics import render_latest
+
+# Без префикса /api и без авторизации: эндпоинт опрашивает Prometheus
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Метрики процесса в текстовом формате Prometheus."""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
@@ -2,10 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
+from services.leaderboard import WeeklyLeaderboard
+
 from shared.auth import get_current_user_id
 from domain.user import UserModel
 from repositories.user_repository import UserRepository
-from shared.dependencies import get_user_repository
+from shared.dependencies import get_leaderboard, get_user_repository
 
 # Создаем роутер для профиля
 router = APIRouter(prefix="/profile", tags=["profile"])
@@ -50,7 +52,8 @@ async def get_profile(
 async def update_profile(
     update_data: UpdateProfileRequest, 
     uid: str = Depends(get_current_user_id),
-    user_repository: UserRepository = Depends(get_user_repository)
+    user_repository: UserRepository = Depends(get_user_repository),
+    leaderboard: Optional[WeeklyLeaderboard] = Depends(get_leaderboard),
 ):
     """
     Обновить профиль текущего пользователя.
@@ -86,8 +89,14 @@ async def update_profile(
         
         updated_user = UserModel(**updated_user_data)
         
-        # user_repository теперь внедряется через Depends
-        await user_repository.create_or_update_user(updated_user)
+        # Новый профиль создаётся целиком, существующий обновляется (created_at не меняется)
+        if current_user:
+            await user_repository.update_user(updated_user)
+        else:
+            await user_repository.create_user(updated_user)
+        if leaderboard is not None:
+            # Смена уровня переносит игрока в рейтинг нового уровня
+            leaderboard.update_profile(uid, updated_user.level, updated_user.display_name)
         return updated_user
 
     except HTTPException:
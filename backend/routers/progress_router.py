@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 import inspect
 from datetime import datetime
 
 from services.progress_service import ProgressService
+from shared import config
 from shared.auth import get_current_user_id
 from shared.dependencies import get_progress_service
 
@@ -88,18 +89,79 @@ async def save_progress(
         )
 
 
+# Модели для пакетной загрузки прогресса (синхронизация офлайн-клиента)
+class SaveProgressBatchRequest(BaseModel):
+    items: List[SaveProgressRequest] = Field(
+        ..., min_length=1, max_length=config.PROGRESS_BATCH_MAX_ITEMS,
+        description="Прогресс за несколько дней",
+    )
+
+
+class SaveProgressBatchItemResult(BaseModel):
+    index: int
+    date: Optional[str] = None
+    status: str  # "saved" | "skipped" | "error"
+    progress_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class SaveProgressBatchResponse(BaseModel):
+    message: str
+    saved: int
+    failed: int
+    results: List[SaveProgressBatchItemResult]
+
+
+@router.post("/batch", response_model=SaveProgressBatchResponse)
+async def save_progress_batch(
+    request: SaveProgressBatchRequest,
+    uid: str = Depends(get_current_user_id),
+    progress_service: ProgressService = Depends(get_progress_service),
+):
+    """
+    Сохранить прогресс за несколько дней одним запросом.
+    Записи пишутся пачками, достижения проверяются один раз.
+    Результат возвращается по каждому элементу в исходном порядке.
+    Требуется токен авторизации.
+    """
+    try:
+        results = await progress_service.record_progress_batch(
+            user_id=uid,
+            items=[item.model_dump() for item in request.items],
+        )
+    except Exception as e:
+        # В реальном приложении здесь стоит логировать ошибку 'e'
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save progress batch: {str(e)}"
+        )
+
+    saved = sum(1 for r in results if r["status"] == "saved")
+    failed = sum(1 for r in results if r["status"] == "error")
+    return SaveProgressBatchResponse(
+        message="Progress batch processed",
+        saved=saved,
+        failed=failed,
+        results=[SaveProgressBatchItemResult(**r) for r in results],
+    )
+
+
 @router.get("", response_model=ProgressResponse)
 async def get_progress(
-    days: int = Query(7, ge=1, le=30, description="Количество дней для выборки"),
+    days: int = Query(7, ge=1, le=config.PROGRESS_MAX_DAYS, description="Количество дней для выборки"),
+    resolution: Literal["day", "week", "month"] = Query(
+        "day", description="Детализация: по дням или суммы по неделям/месяцам"),
     uid: str = Depends(get_current_user_id),
     progress_service: ProgressService = Depends(get_progress_service)
 ):
     """
     Получить прогресс пользователя за указанное количество дней.
+    При resolution=week|month элементы data — суммы за неделю/месяц,
+    date — первый день периода.
     Требуется токен авторизации.
     """
     try:
-        progress_data = await progress_service.get_progress(uid, days)
+        progress_data = await progress_service.get_progress(uid, days, resolution)
         
         # Если данных нет, возвращаем пустой ответ
         if not progress_data["data"]:
@@ -163,3 +225,66 @@ async def get_weekly_summary(uid: str = Depends(get_current_user_id), progress_s
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get weekly summary: {str(e)}"
         )
+
+
+# Модели ответа аналитики прогресса
+class WeekOverWeekResponse(BaseModel):
+    current: Optional[int] = None
+    previous: Optional[int] = None
+    delta: Optional[int] = None
+    delta_pct: Optional[float] = None
+
+
+class WeeklyTotalResponse(BaseModel):
+    week_start: str
+    score: int
+    delta: Optional[int] = None
+
+
+class AnalyticsSeriesResponse(BaseModel):
+    dates: List[str]
+    score: List[int]
+    moving_average: List[Optional[float]]
+    accuracy: List[Optional[float]]
+    time_per_answer: List[Optional[float]]
+
+
+class ProgressAnalyticsResponse(BaseModel):
+    start_date: str
+    end_date: str
+    window: int
+    days_played: int
+    total_score: int
+    average_score: float
+    score_percentiles: Dict[str, Optional[float]]
+    score_trend: Optional[float] = None
+    accuracy: Optional[float] = None
+    accuracy_trend: Optional[float] = None
+    time_per_answer: Optional[float] = None
+    week_over_week: WeekOverWeekResponse
+    weekly: List[WeeklyTotalResponse]
+    series: AnalyticsSeriesResponse
+
+
+@router.get("/analytics", response_model=ProgressAnalyticsResponse)
+async def get_progress_analytics(
+    days: int = Query(90, ge=1, le=config.PROGRESS_ANALYTICS_MAX_DAYS, description="Количество дней для анализа"),
+    window: int = Query(7, ge=1, le=90, description="Окно скользящего среднего, дней"),
+    uid: str = Depends(get_current_user_id),
+    progress_service: ProgressService = Depends(get_progress_service),
+):
+    """
+    Аналитика прогресса пользователя за указанное количество дней:
+    скользящее среднее очков, изменение к прошлой неделе, перцентили очков за день,
+    тренды очков и точности, время на ответ, ряды по дням (дни без данных — null).
+    Требуется токен авторизации.
+    """
+    try:
+        analytics = await progress_service.get_analytics(uid, days, window)
+    except Exception as e:
+        # В реальном приложении здесь стоит логировать ошибку 'e'
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get progress analytics: {str(e)}"
+        )
+    return ProgressAnalyticsResponse(**analytics)
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from pydantic import BaseModel
-from typing import List
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
 
 from domain.session import RoundDetail, SessionModel
+from services.auth_service import AuthService
+from services.live_sessions import LiveSessionLimitError, LiveSessionStore, flush_session
 from services.session_service import SessionService
-from shared.auth import get_current_user_id
-from shared.dependencies import get_session_service
+from shared import config
+from shared.auth import get_current_user_id, verify_token_uid
+from shared.dependencies import get_live_sessions, get_session_service
 
 # Создаем роутер для сессий
 router = APIRouter(prefix="/session", tags=["session"])
@@ -27,6 +32,17 @@ class FinishSessionRequest(BaseModel):
 class FinishSessionResponse(BaseModel):
     message: str
 
+# Сообщения клиента в WebSocket /session/ws
+class AuthMessage(BaseModel):
+    token: str
+
+class RoundMessage(BaseModel):
+    round: RoundDetail
+    score: Optional[int] = None  # Очки сессии после этого раунда
+
+class FinishMessage(BaseModel):
+    score: Optional[int] = None
+
 @router.post("/start", response_model=StartSessionResponse)
 async def start_session(
     request: StartSessionRequest,
@@ -69,7 +85,12 @@ async def finish_session(
     """
     try:
         # Завершаем сессию через сервис
-        await session_service.finish_session(uid, session_id, request.details, request.score)
+        await session_service.finish_session(
+            session_id=session_id,
+            user_id=uid,
+            details=request.details,
+            score=request.score,
+        )
         return FinishSessionResponse(message="Session finished successfully")
     except ValueError as e:
         # Если сессия не найдена
@@ -111,3 +132,95 @@ async def get_active_session(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get active session: {str(e)}"
         )
+
+
+# Коды закрытия WebSocket: нет доступа к сессии / сервер временно перегружен
+_WS_POLICY_VIOLATION = 1008
+_WS_TRY_AGAIN_LATER = 1013
+
+
+@router.websocket("/ws")
+async def session_websocket(
+    websocket: WebSocket,
+    session_id: str = Query(..., description="ID сессии, начатой через /session/start"),
+    auth_service: AuthService = Depends(AuthService),
+    session_service: SessionService = Depends(get_session_service),
+    store: LiveSessionStore = Depends(get_live_sessions),
+):
+    """
+    Раунды сессии по одному, по мере ответов (вместо всех сразу в PATCH /session/finish).
+    Раунды копятся в памяти сервера и пишутся в Firestore одним commit при finish
+    или после отключения без переподключения (см. services/live_sessions.py).
+
+    Сообщения (JSON):
+    -> {"type": "auth", "token": "<Firebase ID token>"}  <- {"type": "ready", "rounds": N}
+    -> {"type": "round", "round": {...RoundDetail}, "score": 3}  <- {"type": "ack", "rounds": N}
+    -> {"type": "finish", "score": 5}  <- {"type": "finished", "rounds": N}, затем закрытие
+    Ошибки: {"type": "error", "detail": "..."}; закрытие 1008 — нет доступа к сессии,
+    1013 — сервер перегружен, стоит переподключиться позже.
+    """
+    await websocket.accept()
+    try:
+        message = await asyncio.wait_for(websocket.receive_json(), config.LIVE_SESSION_AUTH_TIMEOUT)
+        if message.get("type") != "auth":
+            raise ValueError("Expected auth message")
+        uid = await verify_token_uid(AuthMessage.model_validate(message).token, auth_service)
+        # Подключиться можно только к своей активной сессии (указатель обычно в кэше процесса)
+        active = await session_service.get_active_session(uid)
+        if active is None or active.session_id != session_id:
+            raise ValueError("No active session with this ID")
+        session = store.attach(session_id, uid)
+    except WebSocketDisconnect:
+        return
+    except HTTPException as e:
+        code = _WS_TRY_AGAIN_LATER if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE else _WS_POLICY_VIOLATION
+        await websocket.close(code=code, reason=str(e.detail))
+        return
+    except LiveSessionLimitError as e:
+        await websocket.close(code=_WS_TRY_AGAIN_LATER, reason=str(e))
+        return
+    except (asyncio.TimeoutError, ValueError, AttributeError) as e:
+        # Таймаут, не JSON-объект, неверное первое сообщение или чужая сессия
+        await websocket.close(code=_WS_POLICY_VIOLATION, reason=str(e) or "Authentication timed out")
+        return
+
+    try:
+        await websocket.send_json({"type": "ready", "session_id": session_id, "rounds": len(session.details)})
+        while True:
+            try:
+                message = await websocket.receive_json()
+                kind = message.get("type") if isinstance(message, dict) else None
+                if kind == "round":
+                    request = RoundMessage.model_validate(message)
+                    rounds = store.add_round(session, request.round, request.score)
+                    await websocket.send_json({"type": "ack", "rounds": rounds})
+                elif kind == "finish":
+                    request = FinishMessage.model_validate(message)
+                    if not store.take(session):
+                        raise ValueError(f"Session {session_id} is already finished")
+                    if request.score is not None:
+                        session.score = request.score
+                    try:
+                        await flush_session(store, session, session_service)
+                    except ValueError:
+                        raise
+                    except Exception:
+                        # Раунды остаются в памяти: клиент может повторить finish
+                        store.restore(session)
+                        await websocket.send_json({"type": "error", "detail": "Failed to finish session"})
+                        continue
+                    await websocket.send_json({"type": "finished", "rounds": len(session.details)})
+                    await websocket.close()
+                    return
+                else:
+                    await websocket.send_json({"type": "error", "detail": f"Unknown message type: {kind}"})
+            except (ValidationError, LiveSessionLimitError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+            except ValueError as e:
+                # Не JSON или сессия уже завершена (другим подключением или фоновой записью)
+                await websocket.close(code=_WS_POLICY_VIOLATION, reason=str(e))
+                return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        store.detach(session)
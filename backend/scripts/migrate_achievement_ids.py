@@ -0,0 +1,98 @@
+"""Move achievements stored under random IDs to deterministic document IDs.
+
+Achievements used to be written as ``achievements/{uuid4}``.  They are now
+keyed by ``achievement_doc_id(user_id, type, period)``: existence checks are
+point reads and a concurrent award of the same achievement is a no-op.  This
+script rewrites old documents under their deterministic ID (keeping the
+earliest one when a user got the same achievement several times) and deletes
+the originals.
+
+Idempotent: documents already stored under their deterministic ID are skipped.
+Each commit stays under Firestore's write limit. A group of duplicates that does
+not fit into the current commit starts a new one, and a group larger than a
+commit is split, with the new document written before the deletes, so a rerun
+after a failure only removes what is left.
+Run manually (FIRESTORE_EMULATOR_HOST / credentials as for the API):
+    python -m scripts.migrate_achievement_ids [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Dict, List, Tuple
+
+from google.cloud.firestore_v1.async_client import AsyncClient
+
+from domain.achievement import AchievementModel, achievement_doc_id
+from domain.achievement_catalog import DEFAULT_CATALOG
+from services.achievement_rules import compile_rules
+from shared.dependencies import _create_async_client  # type: ignore
+
+# Записей в одном commit (лимит Firestore — 500)
+_WRITES_PER_COMMIT = 400
+
+
+def target_id(achievement: AchievementModel, rules_by_type: Dict) -> str:
+    """Deterministic ID of an achievement, with the period defined by its catalog rule."""
+    rule = rules_by_type.get(achievement.type)
+    period = rule.period(achievement.period_start_date, achievement.session_id) if rule is not None else None
+    return achievement_doc_id(achievement.user_id, achievement.type, period)
+
+
+async def migrate(db: AsyncClient, dry_run: bool = False,
+                  writes_per_commit: int = _WRITES_PER_COMMIT) -> Tuple[int, int]:
+    """Returns (moved, duplicates removed)."""
+    rules_by_type = {rule.type: rule for rule in compile_rules(DEFAULT_CATALOG)}
+    collection = db.collection("achievements")
+
+    existing_ids = set()
+    # deterministic ID -> [(old doc ID, data)], раньше выданные — первыми
+    moves: Dict[str, List[Tuple[str, dict]]] = {}
+    async for doc in collection.stream():
+        existing_ids.add(doc.id)
+        data = doc.to_dict()
+        new_id = target_id(AchievementModel(**data), rules_by_type)
+        if new_id != doc.id:
+            moves.setdefault(new_id, []).append((doc.id, data))
+
+    moved = duplicates = 0
+    batch, writes = db.batch(), 0
+
+    async def flush() -> None:
+        nonlocal batch, writes
+        if writes and not dry_run:
+            await batch.commit()
+        batch, writes = db.batch(), 0
+
+    for new_id, docs in moves.items():
+        docs.sort(key=lambda item: item[1].get("earned_at") or "")
+        create = new_id not in existing_ids
+        # Группа, которая не помещается в текущий commit, начинается с нового
+        if writes + len(docs) + create > writes_per_commit:
+            await flush()
+        if create:
+            _, data = docs[0]
+            batch.set(collection.document(new_id), {**data, "achievement_id": new_id})
+            writes += 1
+            moved += 1
+        duplicates += len(docs) - create
+        for old_id, _ in docs:
+            # Группа больше commit делится: новый документ уже в первом из них
+            if writes >= writes_per_commit:
+                await flush()
+            batch.delete(collection.document(old_id))
+            writes += 1
+    await flush()
+    return moved, duplicates
+
+
+async def main(dry_run: bool) -> None:
+    moved, duplicates = await migrate(_create_async_client(), dry_run=dry_run)
+    prefix = "[dry run] " if dry_run else ""
+    print(f"[migrate_achievement_ids] {prefix}Moved {moved} achievements, removed {duplicates} duplicates.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    asyncio.run(main(parser.parse_args().dry_run))
@@ -2,9 +2,14 @@
 
 Collection: achievement_catalog
 Document ID = achievement id (e.g. "weekly_fifty")
-Fields: id, name, description, icon_url
+Fields: id, name, description, icon_url, and the rule: metric, comparator,
+threshold, window
 
-Idempotent: does nothing if the collection is non-empty.
+Idempotent: only definitions missing from the collection are written; existing
+definitions only get the fields they lack (admin edits are kept).
+Every write also increments ``version`` in maintenance/achievement_catalog, which
+the process-wide catalogue cache compares before re-reading the collection;
+manual edits of the collection must increment it too.
 Run manually:
     python -m backend.scripts.seed_achievements
 Or called from FastAPI startup.
@@ -13,83 +18,57 @@ from __future__ import annotations
 
 import asyncio
 from typing import List, Dict, Any
+from google.cloud import firestore
 from google.cloud.firestore_v1.async_client import AsyncClient
 
 # Internal helper – respects emulator creds
 from shared.dependencies import _create_async_client  # type: ignore
+from domain.achievement_catalog import DEFAULT_CATALOG
 
 # ---------------------------------------------------------------------------
-# Catalog definition (can later be moved to separate JSON or admin panel)
+# Catalog definition lives in domain.achievement_catalog (rules engine uses it
+# as the fallback when the collection is not seeded yet)
 # ---------------------------------------------------------------------------
-_CATALOG: List[Dict[str, Any]] = [
-    # Weekly score achievement (оставляем для обратной совместимости)
-    {
-        "id": "weekly_fifty",
-        "name": "50 очков за неделю",
-        "description": "Набери 50 очков за последние 7 дней",
-        "icon_url": None,
-        "threshold": 50,
-    },
-    # Perfect session (все ответы верны)
-    {
-        "id": "perfect_streak",
-        "name": "Идеальная сессия",
-        "description": "Заверши игру без ошибок",
-        "icon_url": None,
-        "threshold": 1,
-    },
-    # Total score milestones
-    {
-        "id": "total_score_50",
-        "name": "Собрано 50 очков",
-        "description": "Набери 50 очков суммарно",
-        "icon_url": None,
-        "threshold": 50,
-    },
-    {
-        "id": "total_score_100",
-        "name": "Собрано 100 очков",
-        "description": "Набери 100 очков суммарно",
-        "icon_url": None,
-        "threshold": 100,
-    },
-    {
-        "id": "total_score_500",
-        "name": "Собрано 500 очков",
-        "description": "Набери 500 очков суммарно",
-        "icon_url": None,
-        "threshold": 500,
-    },
-    # 7-day streak
-    {
-        "id": "streak_7_days",
-        "name": "Серия 7 дней",
-        "description": "Играй каждый день 7 дней подряд",
-        "icon_url": None,
-        "threshold": 7,
-    },
-]
+_CATALOG: List[Dict[str, Any]] = DEFAULT_CATALOG
 
 _COLLECTION_NAME = "achievement_catalog"
+# Документ версии каталога (см. AchievementRepository.get_catalog_version)
+_VERSION_COLLECTION, _VERSION_DOC = "maintenance", "achievement_catalog"
 
 
-async def seed_catalog_if_empty() -> None:
-    """Populate collection if it's empty."""
-    db: AsyncClient = _create_async_client()
+async def seed_catalog_if_empty(db: AsyncClient | None = None) -> None:
+    """Populate collection with definitions it does not have yet.
+
+    *db* – клиент из пула приложения; при запуске скрипта вручную создаётся новый.
+    """
+    if db is None:
+        db = _create_async_client()
     coll_ref = db.collection(_COLLECTION_NAME)
 
-    # Quick check – if any doc exists, skip seeding
-    existing_docs = [doc async for doc in coll_ref.limit(1).stream()]
-    if existing_docs:
+    # Каталог небольшой: читаем все определения и дописываем недостающие
+    existing = {doc.id: doc.to_dict() async for doc in coll_ref.stream()}
+    missing = [item for item in _CATALOG if item["id"] not in existing]
+    # Определениям, записанным до появления правил, добавляем только новые поля
+    upgrades = {
+        item["id"]: {key: value for key, value in item.items() if key not in existing[item["id"]]}
+        for item in _CATALOG if item["id"] in existing
+    }
+    upgrades = {item_id: fields for item_id, fields in upgrades.items() if fields}
+    if not missing and not upgrades:
         print("[seed_achievements] Catalog already seeded – skipping.")
         return
 
     batch = db.batch()
-    for item in _CATALOG:
+    for item in missing:
         doc_ref = coll_ref.document(item["id"])
         batch.set(doc_ref, item)
+    for item_id, fields in upgrades.items():
+        batch.set(coll_ref.document(item_id), fields, merge=True)
+    batch.set(db.collection(_VERSION_COLLECTION).document(_VERSION_DOC),
+              {"version": firestore.Increment(1)}, merge=True)
     await batch.commit()
-    print(f"[seed_achievements] Seeded {len(_CATALOG)} achievement definitions.")
+    print(f"[seed_achievements] Seeded {len(missing)} achievement definitions, "
+          f"updated {len(upgrades)}.")
 
 
 # ---------------------------------------------------------------------------
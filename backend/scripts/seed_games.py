@@ -49,9 +49,13 @@ def _load_json(path: Path) -> List[Dict[str, Any]]:
         return json.load(f)
 
 
-async def seed_if_empty() -> None:
-    """Seed both animals and sentences collections if empty."""
-    db = _create_async_client()
+async def seed_if_empty(db: AsyncClient | None = None) -> None:
+    """Seed both animals and sentences collections if empty.
+
+    *db* – клиент из пула приложения; при запуске скрипта вручную создаётся новый.
+    """
+    if db is None:
+        db = _create_async_client()
     await _seed_collection(db, _load_json(ANIMALS_FILE), "animals")
     await _seed_collection(db, _load_json(SENTENCES_FILE), "sentences")
 
@@ -0,0 +1,270 @@
+"""Правила достижений, заданные каталогом (achievement_catalog).
+
+Определение каталога описывает правило: metric — метрика снимка,
+comparator — ">=", ">", "==", "<=" или "<", threshold — порог, window — окно
+в днях (None — за всё время). Правила компилируются в вычислители один раз
+на версию каталога и проверяются за один проход по снимку метрик
+пользователя, поэтому новая веха на существующей метрике — это только запись
+в каталоге, без новых запросов и кода: тип выданного достижения — ID
+определения. Определение с неизвестной метрикой или comparator либо без
+числового порога не компилируется: оно пропускается с предупреждением
+achievement_rule_invalid в логе при каждой новой версии каталога.
+
+Метрики:
+- score — сумма очков (за window дней, начиная с today - window);
+- streak_days — самая длинная серия дней подряд;
+- session_accuracy — доля верных ответов в завершённой сессии.
+
+Повторная выдача: правило с window выдаётся раз за период (period_start_date),
+сессионное — за каждую сессию, остальные — один раз. Период входит в ID
+документа (achievement_doc_id), поэтому выданное достижение проверяется
+чтением по ID, а повторная выдача (параллельные запросы, повтор в воркере)
+не создаёт дубликатов.
+"""
+import asyncio
+import numbers
+import operator
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+from domain.achievement import AchievementModel, achievement_doc_id
+from domain.achievement_catalog import DEFAULT_CATALOG
+from domain.progress import UserProgressStats
+from domain.session import RoundDetail
+
+# Ключ значения в снимке: (метрика, окно в днях)
+MetricKey = Tuple[str, Optional[int]]
+
+COMPARATORS: Dict[str, Callable[[float, float], bool]] = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "==": operator.eq,
+    "<=": operator.le,
+    "<": operator.lt,
+}
+SESSION_METRICS = frozenset({"session_accuracy"})
+METRICS = frozenset({"score", "streak_days"}) | SESSION_METRICS
+
+logger = structlog.get_logger()
+
+_DEFAULTS_BY_ID = {item["id"]: item for item in DEFAULT_CATALOG}
+
+
+@dataclass
+class MetricsSnapshot:
+    """Значения метрик пользователя на момент проверки.
+
+    period_starts — начало периода, которое записывается в достижение
+    (например, начало самой длинной серии); session_id — для сессионных правил.
+    """
+    values: Dict[MetricKey, float] = field(default_factory=dict)
+    period_starts: Dict[MetricKey, date] = field(default_factory=dict)
+    session_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    # ID определения каталога
+    type: str
+    metric: str
+    compare: Callable[[float, float], bool]
+    threshold: float
+    window: Optional[int] = None
+
+    @property
+    def key(self) -> MetricKey:
+        return (self.metric, self.window)
+
+    @property
+    def per_session(self) -> bool:
+        return self.metric in SESSION_METRICS
+
+    def period(self, period_start: Optional[date], session_id: Optional[str]) -> Optional[str]:
+        """Период для ID документа: начало окна, ID сессии или None (выдаётся один раз)."""
+        if self.per_session:
+            return session_id
+        if self.window is not None and period_start is not None:
+            return period_start.isoformat()
+        return None
+
+    def passes(self, snapshot: MetricsSnapshot) -> bool:
+        value = snapshot.values.get(self.key)
+        return value is not None and self.compare(value, self.threshold)
+
+
+def compile_rule(item: Dict) -> Optional[AchievementRule]:
+    """Правило из определения каталога; недостающие поля берутся из DEFAULT_CATALOG.
+
+    Возвращает None для определений без правила (нет metric и threshold).
+    ValueError — определение с правилом, которое нельзя проверить.
+    """
+    item = {**_DEFAULTS_BY_ID.get(item.get("id"), {}), **item}
+    if item.get("metric") is None and item.get("threshold") is None:
+        return None
+    achievement_id, metric, threshold = item.get("id"), item.get("metric"), item.get("threshold")
+    comparator, window = item.get("comparator") or ">=", item.get("window")
+    if not isinstance(achievement_id, str) or not achievement_id:
+        raise ValueError(f"invalid id {achievement_id!r}")
+    if metric not in METRICS:
+        raise ValueError(f"unknown metric {metric!r}")
+    if comparator not in COMPARATORS:
+        raise ValueError(f"unknown comparator {comparator!r}")
+    if not isinstance(threshold, numbers.Real) or isinstance(threshold, bool):
+        raise ValueError(f"threshold must be a number, got {threshold!r}")
+    if window is not None and (not isinstance(window, int) or isinstance(window, bool) or window <= 0):
+        raise ValueError(f"window must be a positive number of days, got {window!r}")
+    return AchievementRule(
+        type=achievement_id,
+        metric=metric,
+        compare=COMPARATORS[comparator],
+        threshold=threshold,
+        window=window,
+    )
+
+
+def compile_rules(catalog: Iterable[Dict]) -> List[AchievementRule]:
+    """Правила каталога; неверные определения пропускаются с предупреждением в логе."""
+    rules = []
+    for item in catalog:
+        try:
+            rule = compile_rule(item)
+        except ValueError as e:
+            logger.warning("achievement_rule_invalid", achievement_id=item.get("id"), error=str(e))
+            continue
+        if rule is not None:
+            rules.append(rule)
+    return rules
+
+
+class AchievementRules:
+    """Скомпилированные правила; перекомпилируются, только когда меняется каталог."""
+
+    def __init__(self) -> None:
+        self._source: Optional[List[Dict]] = None
+        self._rules: List[AchievementRule] = []
+
+    def for_catalog(self, catalog: Iterable[Dict]) -> List[AchievementRule]:
+        catalog = [dict(item) for item in catalog]
+        if catalog != self._source:
+            # Пустой каталог (коллекция ещё не заполнена) — правила по умолчанию
+            self._rules = compile_rules(catalog) or compile_rules(DEFAULT_CATALOG)
+            self._source = catalog
+        return self._rules
+
+
+# Общие для процесса скомпилированные правила
+ACHIEVEMENT_RULES = AchievementRules()
+
+
+def progress_snapshot(stats: Optional[UserProgressStats], today: date,
+                      windows: Iterable[Optional[int]]) -> MetricsSnapshot:
+    """Метрики прогресса по агрегату user_stats; окна, которые он не покрывает, пропускаются."""
+    snapshot = MetricsSnapshot()
+    if stats is None:
+        return snapshot
+    snapshot.values[("streak_days", None)] = stats.longest_streak
+    if stats.longest_streak_start is not None:
+        snapshot.period_starts[("streak_days", None)] = stats.longest_streak_start
+    for window in set(windows):
+        if window is None:
+            snapshot.values[("score", None)] = stats.total_score
+        elif stats.covers(today - timedelta(days=window)):
+            snapshot.values[("score", window)] = stats.score_since(today - timedelta(days=window))
+    return snapshot
+
+
+def session_snapshot(session_id: str, details: List[RoundDetail]) -> MetricsSnapshot:
+    """Метрики завершённой сессии (сессия без раундов считается безошибочной)."""
+    correct = sum(1 for detail in details if detail.is_correct)
+    accuracy = correct / len(details) if details else 1.0
+    return MetricsSnapshot(values={("session_accuracy", None): accuracy}, session_id=session_id)
+
+
+def evaluate(
+    rules: Iterable[AchievementRule],
+    snapshot: MetricsSnapshot,
+    user_id: str,
+    today: date,
+    existing_ids: Collection[str] = (),
+) -> List[AchievementModel]:
+    """Один проход по правилам: достижения, условия которых выполнены и ID которых нет в existing_ids."""
+    earned_at = datetime.now(timezone.utc)
+    new_achievements = []
+    for rule in rules:
+        if rule.per_session and snapshot.session_id is None:
+            continue
+        if not rule.passes(snapshot):
+            continue
+        if rule.window is not None:
+            period_start = today - timedelta(days=rule.window)
+        else:
+            period_start = snapshot.period_starts.get(rule.key)
+        session_id = snapshot.session_id if rule.per_session else None
+        achievement_id = achievement_doc_id(user_id, rule.type, rule.period(period_start, session_id))
+        if achievement_id in existing_ids:
+            continue
+        new_achievements.append(AchievementModel(
+            achievement_id=achievement_id,
+            user_id=user_id,
+            type=rule.type,
+            earned_at=earned_at,
+            session_id=session_id,
+            period_start_date=period_start,
+        ))
+    return new_achievements
+
+
+async def progress_achievements(progress_repo, achievement_repo, user_id: str) -> List[AchievementModel]:
+    """Новые достижения по правилам прогресса (score, streak_days), без записи.
+
+    Агрегат user_stats и каталог читаются параллельно, затем выполненные
+    правила проверяются одним get_all по их ID. Суммы очков, которые агрегат
+    не покрывает (его ещё нет или окно шире daily_scores), считаются
+    репозиторием прогресса.
+    """
+    stats, catalog = await asyncio.gather(
+        progress_repo.get_user_stats(user_id),
+        achievement_repo.get_catalog(),
+    )
+    rules = [rule for rule in ACHIEVEMENT_RULES.for_catalog(catalog) if not rule.per_session]
+    today = datetime.now(timezone.utc).date()
+    windows = {rule.window for rule in rules if rule.metric == "score"}
+    snapshot = progress_snapshot(stats, today, windows)
+    for window in windows:
+        if ("score", window) in snapshot.values:
+            continue
+        if window is None:
+            snapshot.values[("score", None)] = await progress_repo.sum_total_score(user_id)
+        else:
+            since = datetime.now(timezone.utc) - timedelta(days=window)
+            snapshot.values[("score", window)] = await progress_repo.sum_scores_for_week(user_id, since)
+    candidates = evaluate(rules, snapshot, user_id, today)
+    if not candidates:
+        return []
+    existing_ids = await achievement_repo.get_existing_ids([a.achievement_id for a in candidates])
+    return [a for a in candidates if a.achievement_id not in existing_ids]
+
+
+async def session_achievements(achievement_repo, user_id: str,
+                               snapshots: Iterable[MetricsSnapshot]) -> List[AchievementModel]:
+    """Достижения по сессионным правилам для снимков завершённых сессий, без записи.
+
+    ID содержит ID сессии, поэтому повторная запись не создаёт дубликатов.
+    """
+    catalog = await achievement_repo.get_catalog()
+    rules = [rule for rule in ACHIEVEMENT_RULES.for_catalog(catalog) if rule.per_session]
+    today = datetime.now(timezone.utc).date()
+    return [achievement for snapshot in snapshots
+            for achievement in evaluate(rules, snapshot, user_id, today)]
+
+
+async def award_progress_achievements(progress_repo, achievement_repo, user_id: str) -> List[AchievementModel]:
+    """Проверяет правила прогресса и сохраняет новые достижения одним batch."""
+    new_achievements = await progress_achievements(progress_repo, achievement_repo, user_id)
+    if new_achievements:
+        await achievement_repo.create_achievements(new_achievements)
+    return new_achievements
+
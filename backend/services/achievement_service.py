@@ -1,32 +1,41 @@
-from datetime import datetime, timedelta, timezone
+from typing import Optional
+
 from fastapi import Depends
 from repositories.achievement_repository import AchievementRepository
 from repositories.progress_repository import ProgressRepository
-from domain.achievement import AchievementModel, AchievementType
+from services.achievement_rules import award_progress_achievements
+from services.achievement_worker import AchievementWorker
+from shared.achievement_check_cache import achievement_check_cache
 from shared.dependencies import get_achievement_repository, get_progress_repository
-import uuid
 
 class AchievementService:
     def __init__(
         self,
         achievement_repo: AchievementRepository = Depends(get_achievement_repository),
-        progress_repo: ProgressRepository = Depends(get_progress_repository)
+        progress_repo: ProgressRepository = Depends(get_progress_repository),
+        achievement_worker: Optional[AchievementWorker] = None,
     ):
         self._achievement_repo = achievement_repo
         self._progress_repo = progress_repo
+        self._achievement_worker = achievement_worker
 
     async def check_weekly_achievement(self, user_id: str) -> None:
-        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-        total = await self._progress_repo.sum_scores_for_week(user_id, week_ago)
-        if total >= 50:
-            week_start = week_ago.date()
-            if not await self._achievement_repo.exists_weekly_achievement(user_id, week_start):
-                ach_id = str(uuid.uuid4())
-                achievement = AchievementModel(
-                    achievement_id=ach_id,
-                    user_id=user_id,
-                    type=AchievementType.WEEKLY_FIFTY,
-                    earned_at=datetime.now(timezone.utc),
-                    period_start_date=week_start
-                )
-                await self._achievement_repo.create_achievement(achievement)
+        """Проверяет правила прогресса из каталога: недельные очки, общий счёт и серии.
+
+        С работающим воркером проверка только ставится в очередь. Пользователь
+        проверяется не чаще раза в день: отметку снимает новый прогресс
+        (ProgressService), поэтому повторные открытия экрана достижений ничего
+        не читают.
+        """
+        if achievement_check_cache.checked(user_id):
+            return
+        # Отметка ставится до проверки: прогресс, записанный во время неё, её снимет
+        achievement_check_cache.mark(user_id)
+        if self._achievement_worker is not None and self._achievement_worker.running:
+            self._achievement_worker.submit(user_id)
+            return
+        try:
+            await award_progress_achievements(self._progress_repo, self._achievement_repo, user_id)
+        except Exception:
+            achievement_check_cache.invalidate(user_id)
+            raise
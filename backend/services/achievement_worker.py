@@ -0,0 +1,235 @@
+"""Background achievement evaluation for the API process.
+
+Request handlers only do their primary write and ``submit`` a "user changed"
+event; ``AchievementWorker`` tasks evaluate the catalog rules later:
+
+- events of one user that arrive within ``dedup_seconds`` of the first one are
+  merged into a single evaluation;
+- due users are taken in batches of ``batch_size``: their reads run
+  concurrently and all new achievements of the batch are written together;
+- a failed evaluation is retried with exponential backoff up to
+  ``max_attempts`` times, then dropped and counted as failed;
+- ``drain`` evaluates everything still queued (ignoring the dedup window)
+  before the Firestore pool is closed on shutdown.
+
+The queue is per process and in memory: events still queued when the process
+is killed are lost and picked up by the next evaluation for that user.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from services.achievement_rules import progress_achievements
+from shared import config
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class _UserEvent:
+    user_id: str
+    due: float
+    attempts: int = 0
+
+
+def _default_repositories():
+    from repositories.achievement_repository import AchievementRepository
+    from repositories.progress_repository import ProgressRepository
+    from shared.catalog_cache import achievement_catalog_cache
+    from shared.dependencies import get_client_pool
+
+    db = get_client_pool().get()
+    return ProgressRepository(db=db), AchievementRepository(db=db, catalog_cache=achievement_catalog_cache)
+
+
+class AchievementWorker:
+    """In-process queue of per-user achievement evaluations."""
+
+    def __init__(
+        self,
+        concurrency: int,
+        batch_size: int,
+        dedup_seconds: float,
+        max_attempts: int,
+        retry_delay: float,
+        repositories: Callable[[], Tuple] = _default_repositories,
+    ):
+        self._concurrency = concurrency
+        self._batch_size = batch_size
+        self._dedup_seconds = dedup_seconds
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+        self._repositories = repositories
+        self._pending: Dict[str, _UserEvent] = {}
+        # (due, seq, event); записи, которых уже нет в _pending, пропускаются
+        self._heap: List[Tuple[float, int, _UserEvent]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._draining = False
+        self.in_flight = 0
+        self.submitted = 0
+        self.deduplicated = 0
+        self.processed = 0
+        self.batches = 0
+        self.retried = 0
+        self.failed = 0
+        self.awarded = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and not self._draining
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._draining = False
+        self._tasks = [asyncio.create_task(self._run(), name=f"achievement-worker-{i}")
+                       for i in range(self._concurrency)]
+
+    def submit(self, user_id: str) -> None:
+        """Queue an evaluation of the progress rules for *user_id*."""
+        self.submitted += 1
+        self._enqueue(_UserEvent(user_id=user_id, due=self._now() + self._dedup_seconds))
+
+    async def drain(self, timeout: float) -> None:
+        """Evaluate everything queued, then stop the workers (cancelled after *timeout* seconds)."""
+        if not self._tasks:
+            return
+        self._draining = True
+        self._wake()
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("achievement_worker_drain_timeout", backlog=len(self._pending), timeout=timeout)
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "backlog": len(self._pending),
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "processed": self.processed,
+            "batches": self.batches,
+            "retried": self.retried,
+            "failed": self.failed,
+            "awarded": self.awarded,
+        }
+
+    # ---------- internals ----------
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _enqueue(self, event: _UserEvent) -> None:
+        queued = self._pending.get(event.user_id)
+        if queued is not None:
+            # Проверка уже запланирована: срок не сдвигаем
+            queued.attempts = max(queued.attempts, event.attempts)
+            self.deduplicated += 1
+            return
+        self._pending[event.user_id] = event
+        heapq.heappush(self._heap, (event.due, next(self._seq), event))
+        self._wake()
+
+    def _take_batch(self) -> List[_UserEvent]:
+        now = self._now()
+        batch: List[_UserEvent] = []
+        while self._heap and len(batch) < self._batch_size:
+            due, _, event = self._heap[0]
+            if self._pending.get(event.user_id) is not event:
+                heapq.heappop(self._heap)
+                continue
+            if due > now and not self._draining:
+                break
+            heapq.heappop(self._heap)
+            del self._pending[event.user_id]
+            batch.append(event)
+        return batch
+
+    async def _next_batch(self) -> Optional[List[_UserEvent]]:
+        while True:
+            batch = self._take_batch()
+            if batch:
+                return batch
+            if self._draining and not self._pending and not self.in_flight:
+                self._wake()  # остальные воркеры тоже завершаются
+                return None
+            self._wakeup.clear()
+            timeout = max(0.0, self._heap[0][0] - self._now()) if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            if batch is None:
+                return
+            self.in_flight += len(batch)
+            try:
+                await self._process(batch)
+            finally:
+                self.in_flight -= len(batch)
+                self._wake()
+
+    async def _process(self, batch: List[_UserEvent]) -> None:
+        self.batches += 1
+        try:
+            progress_repo, achievement_repo = self._repositories()
+            results = await asyncio.gather(
+                *(self._evaluate(event, progress_repo, achievement_repo) for event in batch),
+                return_exceptions=True,
+            )
+            evaluated = [(event, result) for event, result in zip(batch, results)
+                         if not isinstance(result, BaseException)]
+            new_achievements = [achievement for _, result in evaluated for achievement in result]
+            created = await achievement_repo.create_achievements(new_achievements) if new_achievements else 0
+        except Exception as e:
+            logger.warning("achievement_batch_failed", users=len(batch), error=str(e))
+            for event in batch:
+                self._retry(event)
+            return
+        for event, result in zip(batch, results):
+            if isinstance(result, BaseException):
+                logger.warning("achievement_evaluation_failed", user_id=event.user_id, error=str(result))
+                self._retry(event)
+        self.processed += len(evaluated)
+        self.awarded += created
+
+    async def _evaluate(self, event: _UserEvent, progress_repo, achievement_repo) -> List:
+        return await progress_achievements(progress_repo, achievement_repo, event.user_id)
+
+    def _retry(self, event: _UserEvent) -> None:
+        event.attempts += 1
+        if event.attempts >= self._max_attempts:
+            self.failed += 1
+            return
+        self.retried += 1
+        event.due = self._now() + self._retry_delay * 2 ** (event.attempts - 1)
+        self._enqueue(event)
+
+
+achievement_worker = AchievementWorker(
+    concurrency=config.ACHIEVEMENT_WORKER_CONCURRENCY,
+    batch_size=config.ACHIEVEMENT_WORKER_BATCH_SIZE,
+    dedup_seconds=config.ACHIEVEMENT_WORKER_DEDUP_SECONDS,
+    max_attempts=config.ACHIEVEMENT_WORKER_MAX_ATTEMPTS,
+    retry_delay=config.ACHIEVEMENT_WORKER_RETRY_DELAY,
+)
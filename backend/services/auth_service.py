@@ -5,13 +5,20 @@ from repositories.user_repository import UserRepository
 from shared.dependencies import get_db
 from google.cloud.firestore_v1.async_client import AsyncClient as FirestoreClient
 from datetime import datetime, timezone
+import time
+
+from shared import config
+from shared.token_cache import token_cache, revocation_cache
+from shared.blocking_executor import auth_executor
 
 class AuthService:
     def __init__(self, db: FirestoreClient = Depends(get_db)):
         self._user_repo = UserRepository(db=db)
 
     async def register_user(self, email: str, password: str, display_name: str, level: str) -> UserModel:
-        user_record = auth.create_user(
+        # Синхронный вызов Admin SDK выполняется в пуле потоков, а не в event loop
+        user_record = await auth_executor.run(
+            auth.create_user,
             email=email,
             password=password,
             display_name=display_name
@@ -34,10 +41,33 @@ class AuthService:
             print(f"DEBUG MODE: Пропускаем проверку токена: {id_token}")
             return id_token if id_token else 'test_user_id'
         
-        # Реальная проверка токена через Firebase Auth
-        try:
-            decoded = auth.verify_id_token(id_token)
-            return decoded["uid"]
-        except Exception as e:
-            print(f"Error verifying token: {e}")
-            raise e
+        # Повторные запросы с тем же токеном не проходят RSA-проверку заново
+        cached = token_cache.get(id_token)
+        if cached is None:
+            try:
+                started = time.perf_counter()
+                decoded = await auth_executor.run(auth.verify_id_token, id_token)
+                token_cache.record_verification(time.perf_counter() - started)
+            except Exception as e:
+                print(f"Error verifying token: {e}")
+                raise e
+            token_cache.put(id_token, decoded)
+            uid, issued_at = decoded["uid"], float(decoded.get("iat", 0))
+        else:
+            uid, issued_at = cached.uid, cached.issued_at
+
+        if config.AUTH_CHECK_REVOKED:
+            await self._check_not_revoked(uid, issued_at)
+        return uid
+
+    async def _check_not_revoked(self, uid: str, issued_at: float) -> None:
+        """Проверяет, что токен не отозван и пользователь не заблокирован (с кэшем на TTL)."""
+        state = revocation_cache.get(uid)
+        if state is None:
+            user_record = await auth_executor.run(auth.get_user, uid)
+            valid_after = (user_record.tokens_valid_after_timestamp or 0) / 1000
+            state = revocation_cache.put(uid, valid_after, bool(user_record.disabled))
+        if state.disabled:
+            raise auth.UserDisabledError("The user record is disabled.")
+        if issued_at < state.valid_after:
+            raise auth.RevokedIdTokenError("The Firebase ID token has been revoked.")
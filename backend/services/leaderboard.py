@@ -0,0 +1,280 @@
+"""Недельный рейтинг игроков в памяти процесса.
+
+Очки хранятся по дням (корзина на день: {uid: очки}) за последние
+LEADERBOARD_DAYS дней; сумма по корзинам — очки пользователя за неделю.
+Рейтинг — отсортированные списки (-очки, uid): общий и по каждому уровню.
+Запись прогресса меняет одну корзину и переставляет пользователя в списках
+(bisect), а смена дня выбрасывает устаревшую корзину, поэтому коллекцию
+progress не нужно сканировать ни при запросе, ни при переходе недели.
+
+Корзины периодически сохраняются в Firestore (LeaderboardRepository) и
+восстанавливаются при старте; если сохранений ещё нет, рейтинг один раз
+строится по progress за последние дни.
+
+Рейтинг — на процесс: при нескольких воркерах uvicorn каждый видит свои
+записи и сохранённое другими на момент своего старта.
+"""
+import asyncio
+import bisect
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+from shared import config
+
+logger = structlog.get_logger()
+
+# Ключ в отсортированном списке: (-очки, uid) — лучшие первыми, при равенстве по uid
+_RankKey = Tuple[int, str]
+# Список общего рейтинга (без фильтра по уровню)
+_ALL_LEVELS = None
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+@dataclass(frozen=True)
+class Profile:
+    """Уровень и имя игрока для фильтра и ответа; берутся из users."""
+    level: Optional[str] = None
+    display_name: Optional[str] = None
+
+
+class WeeklyLeaderboard:
+    """Очки за последние *days* дней по дневным корзинам и отсортированные списки рейтинга."""
+
+    def __init__(self, days: int = 7, today: Callable[[], date] = _utc_today):
+        self._days = days
+        self._today = today
+        self._buckets: Dict[date, Dict[str, int]] = {}
+        self._totals: Dict[str, int] = {}
+        self._profiles: Dict[str, Profile] = {}
+        self._ranked: Dict[Optional[str], List[_RankKey]] = {_ALL_LEVELS: []}
+        self._window_start: Optional[date] = None
+        # Изменённые с последнего сохранения: день -> uid
+        self._dirty: Dict[date, Set[str]] = {}
+        # Выпавшие из окна дни, чьи сохранения можно удалить
+        self._expired: Set[date] = set()
+
+    # ---------- запись ----------
+    @property
+    def days(self) -> int:
+        return self._days
+
+    @property
+    def window_start(self) -> date:
+        self._roll()
+        return self._window_start
+
+    def record(self, user_id: str, day: date, score: int, replace: bool = True) -> None:
+        """Очки пользователя за день: replace — новое значение дня, иначе прибавляются."""
+        self._roll()
+        if day < self._window_start:
+            return
+        bucket = self._buckets.setdefault(day, {})
+        previous = bucket.get(user_id, 0)
+        current = score if replace else previous + score
+        bucket[user_id] = current
+        self._dirty.setdefault(day, set()).add(user_id)
+        self._set_total(user_id, self._totals.get(user_id, 0) + current - previous)
+
+    def set_profile(self, user_id: str, level: Optional[str], display_name: Optional[str] = None) -> None:
+        """Уровень и имя игрока; при смене уровня он переходит в другой список."""
+        profile = Profile(level, display_name)
+        previous = self._profiles.get(user_id)
+        if previous == profile:
+            return
+        self._profiles[user_id] = profile
+        total = self._totals.get(user_id, 0)
+        old_level = previous.level if previous is not None else None
+        if total and old_level != level:
+            self._unrank(user_id, total, old_level)
+            self._rank(user_id, total, level)
+        if total:
+            # Уровень и имя сохраняются вместе с очками текущих дней
+            for day, bucket in self._buckets.items():
+                if user_id in bucket:
+                    self._dirty.setdefault(day, set()).add(user_id)
+
+    def update_profile(self, user_id: str, level: Optional[str], display_name: Optional[str] = None) -> None:
+        """Смена профиля пользователем: учитывается, только если он уже есть в рейтинге."""
+        if user_id in self._profiles or user_id in self._totals:
+            self.set_profile(user_id, level, display_name)
+
+    def unresolved(self) -> List[str]:
+        """Игроки рейтинга, чей профиль ещё не известен."""
+        return [user_id for user_id in self._totals if user_id not in self._profiles]
+
+    # ---------- чтение ----------
+    def top(self, limit: int, level: Optional[str] = None) -> List[Tuple[int, str, int]]:
+        """Первые *limit* игроков: (место, uid, очки); при равных очках место общее."""
+        self._roll()
+        ranked = self._ranked.get(level, [])
+        return [(self._place(ranked, -neg_score), user_id, -neg_score) for neg_score, user_id in ranked[:limit]]
+
+    def rank(self, user_id: str, level: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """(место, очки) пользователя или None, если у него нет очков за неделю или уровень другой."""
+        self._roll()
+        score = self._totals.get(user_id)
+        if not score or (level is not None and self._level(user_id) != level):
+            return None
+        return self._place(self._ranked.get(level, []), score), score
+
+    def profile(self, user_id: str) -> Optional[Profile]:
+        return self._profiles.get(user_id)
+
+    def __len__(self) -> int:
+        self._roll()
+        return len(self._totals)
+
+    # ---------- сохранение ----------
+    def checkpoint_entries(self) -> Dict[date, Dict[str, dict]]:
+        """Изменённые с прошлого вызова записи по дням ({uid: {"score", "level", "display_name"}})."""
+        self._roll()
+        entries: Dict[date, Dict[str, dict]] = {}
+        for day, user_ids in self._dirty.items():
+            bucket = self._buckets.get(day, {})
+            entries[day] = {user_id: self._entry(user_id, bucket.get(user_id, 0)) for user_id in user_ids}
+        self._dirty = {}
+        return entries
+
+    def mark_dirty(self, entries: Dict[date, Dict[str, dict]]) -> None:
+        """Вернуть записи неудачного сохранения, чтобы сохранить их в следующий раз."""
+        for day, user_ids in entries.items():
+            if day >= self.window_start:
+                self._dirty.setdefault(day, set()).update(user_ids)
+
+    def take_expired(self) -> List[date]:
+        expired, self._expired = sorted(self._expired), set()
+        return expired
+
+    def restore(self, days: Dict[date, Dict[str, dict]]) -> None:
+        """Заполнить рейтинг сохранёнными записями (при старте, до первых запросов)."""
+        self._roll()
+        for day, entries in days.items():
+            if day < self._window_start:
+                continue
+            bucket = self._buckets.setdefault(day, {})
+            for user_id, entry in entries.items():
+                bucket[user_id] = int(entry.get("score", 0))
+                if "level" in entry or "display_name" in entry:
+                    self._profiles[user_id] = Profile(entry.get("level"), entry.get("display_name"))
+        self._rebuild()
+
+    # ---------- internals ----------
+    def _roll(self) -> None:
+        start = self._today() - timedelta(days=self._days - 1)
+        if start == self._window_start:
+            return
+        self._window_start = start
+        expired = [day for day in self._buckets if day < start]
+        if not expired:
+            return
+        for day in expired:
+            del self._buckets[day]
+            self._dirty.pop(day, None)
+        self._expired.update(expired)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        totals: Dict[str, int] = {}
+        for bucket in self._buckets.values():
+            for user_id, score in bucket.items():
+                totals[user_id] = totals.get(user_id, 0) + score
+        self._totals = {user_id: score for user_id, score in totals.items() if score}
+        self._ranked = {_ALL_LEVELS: []}
+        for user_id, score in self._totals.items():
+            self._ranked[_ALL_LEVELS].append((-score, user_id))
+            level = self._level(user_id)
+            if level is not None:
+                self._ranked.setdefault(level, []).append((-score, user_id))
+        for ranked in self._ranked.values():
+            ranked.sort()
+
+    def _set_total(self, user_id: str, total: int) -> None:
+        previous = self._totals.get(user_id, 0)
+        if total == previous:
+            return
+        level = self._level(user_id)
+        if previous:
+            self._unrank(user_id, previous, level)
+        if total:
+            self._totals[user_id] = total
+            self._rank(user_id, total, level)
+        else:
+            self._totals.pop(user_id, None)
+
+    def _rank(self, user_id: str, total: int, level: Optional[str]) -> None:
+        bisect.insort(self._ranked[_ALL_LEVELS], (-total, user_id))
+        if level is not None:
+            bisect.insort(self._ranked.setdefault(level, []), (-total, user_id))
+
+    def _unrank(self, user_id: str, total: int, level: Optional[str]) -> None:
+        for key in (_ALL_LEVELS, level) if level is not None else (_ALL_LEVELS,):
+            ranked = self._ranked.get(key, [])
+            index = bisect.bisect_left(ranked, (-total, user_id))
+            if index < len(ranked) and ranked[index] == (-total, user_id):
+                del ranked[index]
+
+    @staticmethod
+    def _place(ranked: List[_RankKey], score: int) -> int:
+        # Место = число игроков с большим счётом + 1
+        return bisect.bisect_left(ranked, (-score, "")) + 1
+
+    def _level(self, user_id: str) -> Optional[str]:
+        profile = self._profiles.get(user_id)
+        return profile.level if profile is not None else None
+
+    def _entry(self, user_id: str, score: int) -> dict:
+        entry = {"score": score}
+        profile = self._profiles.get(user_id)
+        if profile is not None:
+            entry["level"] = profile.level
+            entry["display_name"] = profile.display_name
+        return entry
+
+
+async def load_leaderboard(leaderboard: WeeklyLeaderboard, repository) -> None:
+    """Восстанавливает рейтинг из сохранений; без них — строит по progress за окно."""
+    start = leaderboard.window_start
+    # Окно и завтрашний день: дата прогресса задаётся клиентом в его часовом поясе
+    days = [start + timedelta(days=offset) for offset in range(leaderboard.days + 1)]
+    saved = await repository.load_days(days)
+    if saved:
+        leaderboard.restore(saved)
+        return
+    for user_id, day, score in await repository.scan_progress(start):
+        leaderboard.record(user_id, day, score, replace=True)
+    logger.info("leaderboard_built_from_progress", players=len(leaderboard))
+
+
+async def checkpoint_leaderboard(leaderboard: WeeklyLeaderboard, repository) -> int:
+    """Сохраняет изменённые записи и удаляет сохранения выпавших дней; возвращает число записей."""
+    entries = leaderboard.checkpoint_entries()
+    expired = leaderboard.take_expired()
+    try:
+        if entries:
+            await repository.save_days(entries)
+        if expired:
+            await repository.delete_days(expired)
+    except Exception:
+        leaderboard.mark_dirty(entries)
+        raise
+    return sum(len(day_entries) for day_entries in entries.values())
+
+
+async def run_checkpoints(leaderboard: WeeklyLeaderboard, repositories: Callable[[], object], interval: float) -> None:
+    """Фоновая задача: сохранение рейтинга раз в *interval* секунд."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await checkpoint_leaderboard(leaderboard, repositories())
+        except Exception as e:
+            logger.warning("leaderboard_checkpoint_failed", error=str(e))
+
+
+# Общий для процесса рейтинг
+weekly_leaderboard = WeeklyLeaderboard(days=config.LEADERBOARD_DAYS)
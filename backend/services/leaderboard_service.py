@@ -0,0 +1,47 @@
+from typing import Any, Dict, Optional
+
+from repositories.user_repository import UserRepository
+from services.leaderboard import WeeklyLeaderboard
+
+# Профилей в одном get_all при заполнении уровней игроков
+_PROFILES_PER_READ = 100
+
+
+class LeaderboardService:
+    def __init__(self, leaderboard: WeeklyLeaderboard, user_repo: UserRepository):
+        self._leaderboard = leaderboard
+        self._user_repo = user_repo
+
+    async def get_weekly(self, user_id: str, level: Optional[str] = None, limit: int = 10) -> Dict[str, Any]:
+        """Первые *limit* игроков недели (по уровню, если задан) и место пользователя."""
+        await self._resolve_profiles()
+        entries = []
+        for rank, player_id, score in self._leaderboard.top(limit, level):
+            profile = self._leaderboard.profile(player_id)
+            entries.append({
+                "rank": rank,
+                "user_id": player_id,
+                "display_name": profile.display_name if profile is not None else None,
+                "score": score,
+            })
+        me = self._leaderboard.rank(user_id, level)
+        return {
+            "period": "week",
+            "level": level,
+            "since": self._leaderboard.window_start.isoformat(),
+            "entries": entries,
+            "me": {"rank": me[0], "score": me[1]} if me is not None else None,
+        }
+
+    async def _resolve_profiles(self) -> None:
+        """Уровни и имена новых игроков читаются из users один раз на процесс."""
+        unresolved = self._leaderboard.unresolved()
+        for start in range(0, len(unresolved), _PROFILES_PER_READ):
+            chunk = unresolved[start:start + _PROFILES_PER_READ]
+            users = await self._user_repo.get_users(chunk)
+            for user_id in chunk:
+                user = users.get(user_id)
+                if user is None:
+                    self._leaderboard.set_profile(user_id, None)
+                else:
+                    self._leaderboard.set_profile(user_id, user.level, user.display_name)
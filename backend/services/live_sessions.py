@@ -0,0 +1,216 @@
+"""Игровые сессии, раунды которых приходят по WebSocket (/api/session/ws).
+
+Клиент отправляет каждый раунд сразу после ответа. Раунды копятся в памяти
+процесса и пишутся в Firestore один раз — SessionService.finish_session
+(одна транзакция): по сообщению finish или, если клиент отключился и не
+вернулся за LIVE_SESSION_RESUME_SECONDS, фоновой задачей run_flusher.
+Повторное подключение к той же сессии в течение этого времени продолжает
+её с накопленными раундами. Без finish сессия записывается с очками из
+последнего раунда (или числом верных ответов, если клиент их не присылал).
+
+Хранилище ограничено: не больше LIVE_SESSION_MAX_SESSIONS сессий и
+LIVE_SESSION_MAX_ROUNDS раундов в сессии. Подключения и раунды сверх лимита
+отклоняются, накопленные раунды не вытесняются.
+
+Хранилище — на процесс: при нескольких воркерах uvicorn переподключение
+должно попасть в тот же процесс (sticky sessions). Иначе сессию завершит
+тот процесс, который запишет её первым, а раунды из другого будут потеряны.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import structlog
+
+from domain.session import RoundDetail
+from shared import config
+
+logger = structlog.get_logger()
+
+
+class LiveSessionLimitError(Exception):
+    """Хранилище заполнено или в сессии уже максимум раундов."""
+
+
+@dataclass
+class LiveSession:
+    session_id: str
+    user_id: str
+    details: List[RoundDetail] = field(default_factory=list)
+    # Очки, присланные клиентом последними
+    score: Optional[int] = None
+    connections: int = 0
+    disconnected_at: Optional[float] = None
+
+    @property
+    def final_score(self) -> int:
+        if self.score is not None:
+            return self.score
+        return sum(1 for detail in self.details if detail.is_correct)
+
+
+def _default_service():
+    from repositories.achievement_repository import AchievementRepository
+    from repositories.session_repository import SessionRepository
+    from services.session_service import SessionService
+    from shared.catalog_cache import achievement_catalog_cache
+    from shared.dependencies import get_client_pool
+
+    db = get_client_pool().get()
+    return SessionService(session_repo=SessionRepository(db=db),
+                          achievement_repo=AchievementRepository(db=db, catalog_cache=achievement_catalog_cache))
+
+
+class LiveSessionStore:
+    """Сессии с незаписанными раундами: session_id -> LiveSession."""
+
+    def __init__(self, max_sessions: int = 10_000, max_rounds: int = 200, resume_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._max_sessions = max_sessions
+        self._max_rounds = max_rounds
+        self._resume_seconds = resume_seconds
+        self._clock = clock
+        self._sessions: Dict[str, LiveSession] = {}
+        self.rounds = 0
+        self.started = 0
+        self.resumed = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def attach(self, session_id: str, user_id: str) -> LiveSession:
+        """Подключение к сессии: новая запись или продолжение накопленной."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            if len(self._sessions) >= self._max_sessions:
+                self.rejected += 1
+                raise LiveSessionLimitError("Too many live sessions")
+            session = self._sessions[session_id] = LiveSession(session_id, user_id)
+            self.started += 1
+        elif session.user_id != user_id:
+            raise ValueError(f"Session {session_id} not found for user {user_id}")
+        elif session.connections == 0:
+            self.resumed += 1
+        session.connections += 1
+        session.disconnected_at = None
+        return session
+
+    def detach(self, session: LiveSession) -> None:
+        session.connections = max(0, session.connections - 1)
+        if session.connections == 0:
+            session.disconnected_at = self._clock()
+
+    def add_round(self, session: LiveSession, detail: RoundDetail, score: Optional[int] = None) -> int:
+        """Добавляет раунд; возвращает число раундов сессии."""
+        if self._sessions.get(session.session_id) is not session:
+            raise ValueError(f"Session {session.session_id} is already finished")
+        if len(session.details) >= self._max_rounds:
+            raise LiveSessionLimitError(f"Session has reached {self._max_rounds} rounds")
+        session.details.append(detail)
+        if score is not None:
+            session.score = score
+        self.rounds += 1
+        return len(session.details)
+
+    def take(self, session: LiveSession) -> bool:
+        """Забрать сессию для записи; False, если её уже забрали."""
+        if self._sessions.get(session.session_id) is not session:
+            return False
+        del self._sessions[session.session_id]
+        return True
+
+    def take_expired(self) -> List[LiveSession]:
+        """Забрать сессии, к которым не вернулись за resume_seconds после отключения."""
+        deadline = self._clock() - self._resume_seconds
+        expired = [session for session in self._sessions.values()
+                   if session.connections == 0 and session.disconnected_at is not None
+                   and session.disconnected_at <= deadline]
+        for session in expired:
+            del self._sessions[session.session_id]
+        return expired
+
+    def take_all(self) -> List[LiveSession]:
+        sessions, self._sessions = list(self._sessions.values()), {}
+        return sessions
+
+    def restore(self, session: LiveSession) -> None:
+        """Вернуть сессию после неудачной записи; следующая попытка — через resume_seconds."""
+        self.retried += 1
+        if session.connections == 0:
+            session.disconnected_at = self._clock()
+        self._sessions.setdefault(session.session_id, session)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, float]:
+        # Ключи QueueStatsCollector: backlog — сессии в памяти, submitted — принятые раунды
+        return {
+            "backlog": len(self._sessions),
+            "in_flight": sum(1 for session in self._sessions.values() if session.connections),
+            "submitted": self.rounds,
+            "processed": self.flushed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "started": self.started,
+            "resumed": self.resumed,
+            "rejected": self.rejected,
+        }
+
+
+async def flush_session(store: LiveSessionStore, session: LiveSession, service) -> None:
+    """Записывает раунды сессии одним finish_session. ValueError — сессии нет или она чужая."""
+    try:
+        await service.finish_session(session_id=session.session_id, user_id=session.user_id,
+                                     details=session.details, score=session.final_score)
+    except ValueError:
+        store.failed += 1
+        raise
+    store.flushed += 1
+
+
+async def flush_sessions(store: LiveSessionStore, sessions: List[LiveSession], service, retry: bool = True) -> int:
+    """Записывает забранные сессии; неудачные (кроме ValueError) возвращаются в хранилище при retry."""
+    flushed = 0
+    for session in sessions:
+        try:
+            await flush_session(store, session, service)
+        except ValueError as e:
+            logger.warning("live_session_dropped", session_id=session.session_id, error=str(e))
+            continue
+        except Exception as e:
+            logger.warning("live_session_flush_failed", session_id=session.session_id, error=str(e))
+            if retry:
+                store.restore(session)
+            else:
+                store.failed += 1
+            continue
+        flushed += 1
+    return flushed
+
+
+async def run_flusher(store: LiveSessionStore, interval: float, service: Callable[[], object] = _default_service) -> None:
+    """Фоновая задача: раз в *interval* секунд записывает сессии, к которым не вернулись."""
+    while True:
+        await asyncio.sleep(interval)
+        expired = store.take_expired()
+        if expired:
+            try:
+                await flush_sessions(store, expired, service())
+            except Exception as e:
+                for session in expired:
+                    store.restore(session)
+                logger.warning("live_session_flush_failed", error=str(e))
+
+
+async def flush_all(store: LiveSessionStore, service: Callable[[], object] = _default_service) -> int:
+    """Записывает все сессии хранилища (при остановке); неудачные не возвращаются."""
+    return await flush_sessions(store, store.take_all(), service(), retry=False)
+
+
+# Общий для процесса: раунды одной сессии могут прийти по разным подключениям
+live_sessions = LiveSessionStore(max_sessions=config.LIVE_SESSION_MAX_SESSIONS,
+                                 max_rounds=config.LIVE_SESSION_MAX_ROUNDS,
+                                 resume_seconds=config.LIVE_SESSION_RESUME_SECONDS)
@@ -0,0 +1,142 @@
+"""Аналитика прогресса на NumPy.
+
+Записи за период раскладываются в плотные массивы по дням (дни без записи —
+нули), все статистики считаются векторными операциями над ними, поэтому
+время расчёта почти не зависит от длины периода (годы истории — миллисекунды).
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from domain.progress import ProgressRecord
+
+# Перцентили очков за день (только по дням с записью)
+SCORE_PERCENTILES = (25, 50, 75, 90)
+
+
+def daily_arrays(records: Iterable[ProgressRecord], start: date, end: date) -> Dict[str, np.ndarray]:
+    """Массивы score/correct/total/time длиной в число дней [start, end] и маска played."""
+    records = list(records)
+    days = (end - start).days + 1
+    index = np.fromiter(((r.date - start).days for r in records), dtype=np.int64, count=len(records))
+    inside = (index >= 0) & (index < days)
+    index = index[inside]
+
+    def _dense(values: Iterable[float], dtype) -> np.ndarray:
+        column = np.fromiter(values, dtype=dtype, count=len(records))[inside]
+        dense = np.zeros(days, dtype=dtype)
+        np.add.at(dense, index, column)  # несколько записей за день складываются
+        return dense
+
+    played = np.zeros(days, dtype=bool)
+    played[index] = True
+    return {
+        "score": _dense((r.score for r in records), np.int64),
+        "correct": _dense((r.correct_answers for r in records), np.int64),
+        "total": _dense((r.total_answers for r in records), np.int64),
+        "time": _dense((r.time_spent for r in records), np.float64),
+        "played": played,
+    }
+
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Скользящее среднее за window дней, заканчивающихся текущим (в начале — по имеющимся дням)."""
+    cumulative = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+
+def ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Поэлементное деление; NaN там, где знаменатель равен нулю."""
+    result = np.full(len(numerator), np.nan)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result
+
+
+def trend_slope(values: np.ndarray) -> Optional[float]:
+    """Наклон линейного тренда (изменение за день) по дням, где значение не NaN."""
+    x = np.flatnonzero(~np.isnan(values)).astype(np.float64)
+    if len(x) < 2:
+        return None
+    y = values[~np.isnan(values)]
+    x_centered = x - x.mean()
+    return float(np.dot(x_centered, y - y.mean()) / np.dot(x_centered, x_centered))
+
+
+def weekly_totals(values: np.ndarray, start: date) -> List[Dict[str, Any]]:
+    """Суммы по полным 7-дневным блокам, выровненным по концу периода, и изменение к предыдущему."""
+    weeks = len(values) // 7
+    offset = len(values) - weeks * 7
+    totals = values[offset:].reshape(weeks, 7).sum(axis=1)
+    deltas = np.diff(totals, prepend=np.nan) if weeks else totals
+    return [
+        {
+            "week_start": (start + timedelta(days=offset + 7 * i)).isoformat(),
+            "score": int(total),
+            "delta": None if i == 0 else int(delta),
+        }
+        for i, (total, delta) in enumerate(zip(totals.tolist(), deltas.tolist()))
+    ]
+
+
+def _to_list(values: np.ndarray, digits: int) -> List[Optional[float]]:
+    # NaN (нет данных за день) отдаётся в JSON как null
+    return np.where(np.isnan(values), None, np.round(values, digits)).tolist()
+
+
+def _round(value: Optional[float], digits: int = 4) -> Optional[float]:
+    # + 0.0 убирает отрицательный ноль после округления
+    return None if value is None or np.isnan(value) else round(float(value), digits) + 0.0
+
+
+def compute_analytics(records: Iterable[ProgressRecord], start: date, end: date, window: int = 7) -> Dict[str, Any]:
+    """Аналитика прогресса за [start, end]: сводка и ряды по дням."""
+    arrays = daily_arrays(records, start, end)
+    score, played = arrays["score"], arrays["played"]
+    accuracy = ratio(arrays["correct"], arrays["total"])
+    time_per_answer = ratio(arrays["time"], arrays["total"])
+
+    played_scores = score[played]
+    if len(played_scores):
+        percentiles = np.percentile(played_scores, SCORE_PERCENTILES)
+        score_percentiles = {f"p{p}": _round(v, 2) for p, v in zip(SCORE_PERCENTILES, percentiles)}
+    else:
+        score_percentiles = {f"p{p}": None for p in SCORE_PERCENTILES}
+
+    weekly = weekly_totals(score, start)
+    current_week = weekly[-1]["score"] if weekly else None
+    previous_week = weekly[-2]["score"] if len(weekly) > 1 else None
+    week_over_week = {
+        "current": current_week,
+        "previous": previous_week,
+        "delta": weekly[-1]["delta"] if weekly else None,
+        "delta_pct": _round((current_week - previous_week) / previous_week)
+        if previous_week else None,
+    }
+
+    total_answers = int(arrays["total"].sum())
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "window": window,
+        "days_played": int(played.sum()),
+        "total_score": int(score.sum()),
+        # Как в get_progress: среднее по дням с записью
+        "average_score": _round(played_scores.mean(), 2) if len(played_scores) else 0.0,
+        "score_percentiles": score_percentiles,
+        "score_trend": _round(trend_slope(np.where(played, score, np.nan).astype(np.float64))),
+        "accuracy": _round(arrays["correct"].sum() / total_answers) if total_answers else None,
+        "accuracy_trend": _round(trend_slope(accuracy), 6),
+        "time_per_answer": _round(arrays["time"].sum() / total_answers, 2) if total_answers else None,
+        "week_over_week": week_over_week,
+        "weekly": weekly,
+        "series": {
+            "dates": np.arange(np.datetime64(start), np.datetime64(end) + 1).astype(str).tolist(),
+            "score": score.tolist(),
+            "moving_average": _to_list(moving_average(score, window), 2),
+            "accuracy": _to_list(accuracy, 4),
+            "time_per_answer": _to_list(time_per_answer, 2),
+        },
+    }
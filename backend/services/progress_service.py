@@ -3,15 +3,29 @@ from typing import List, Dict, Any, Optional
 from fastapi import Depends
 from repositories.progress_repository import ProgressRepository
 from repositories.achievement_repository import AchievementRepository
-from domain.achievement import AchievementModel, AchievementType
-import uuid
 from domain.progress import ProgressRecord
+from services.achievement_rules import award_progress_achievements
+from services.achievement_worker import AchievementWorker
+from services.leaderboard import WeeklyLeaderboard
+from services.progress_analytics import compute_analytics
+from shared import config
+from shared.achievement_check_cache import achievement_check_cache
 from shared.dependencies import get_progress_repository, get_achievement_repository
 
 class ProgressService:
-    def __init__(self, progress_repo: ProgressRepository = Depends(get_progress_repository), achievement_repo: AchievementRepository = Depends(get_achievement_repository)):
+    def __init__(
+        self,
+        progress_repo: ProgressRepository = Depends(get_progress_repository),
+        achievement_repo: AchievementRepository = Depends(get_achievement_repository),
+        achievement_worker: Optional[AchievementWorker] = None,
+        leaderboard: Optional[WeeklyLeaderboard] = None,
+    ):
         self._progress_repo = progress_repo
         self._achievement_repo = achievement_repo
+        # Фоновая проверка достижений; без работающего воркера — проверка в запросе
+        self._achievement_worker = achievement_worker
+        # Недельный рейтинг процесса получает очки сохранённых дней
+        self._leaderboard = leaderboard
     
     async def record_progress(
         self,
@@ -36,56 +50,117 @@ class ProgressService:
             time_spent=time_spent,
         )
 
-        await self._progress_repo.record_daily_score(progress_record)
+        if config.PROGRESS_WRITE_MODE == "accumulate":
+            # Результаты игры прибавляются к уже сохранённым за этот день
+            await self._progress_repo.accumulate_daily_score(progress_record)
+        else:
+            await self._progress_repo.record_daily_score(progress_record)
+        self._update_leaderboard([progress_record])
 
         # ----- ACHIEVEMENT RULES -----
-        await self._maybe_award_score_achievements(user_id)
-        await self._maybe_award_streak_achievement(user_id, record_date)
+        await self._evaluate_progress_achievements(user_id)
 
         return f"{user_id}_{record_date.isoformat()}"
-    
-    # ---------- ACHIEVEMENT HELPERS ----------
-    async def _maybe_award_score_achievements(self, user_id: str) -> None:
-        """Проверяет общий счёт и выдаёт ачивки TOTAL_SCORE_*"""
-        thresholds = [
-            (50, AchievementType.TOTAL_SCORE_50),
-            (100, AchievementType.TOTAL_SCORE_100),
-            (500, AchievementType.TOTAL_SCORE_500),
-        ]
-        total_score = await self._progress_repo.sum_total_score(user_id)
-        for score, ach_type in thresholds:
-            if total_score >= score and not await self._achievement_repo.exists_achievement(user_id, ach_type):
-                ach_id = str(uuid.uuid4())
-                achievement = AchievementModel(
-                    achievement_id=ach_id,
+
+    async def record_progress_batch(self, user_id: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Сохраняет прогресс за несколько дней (синхронизация офлайн-клиента).
+
+        items — словари с полями score, correct_answers, total_answers,
+        time_spent и date (date, строка YYYY-MM-DD или None — сегодня). Записи пишутся блоками
+        по PROGRESS_BATCH_CHUNK_SIZE дней за commit, достижения проверяются
+        один раз после всех записей. Возвращает результат по каждому элементу
+        в исходном порядке: status "saved", "skipped" (перекрыт более поздним
+        элементом за ту же дату) или "error". При PROGRESS_WRITE_MODE=accumulate
+        элементы за одну дату складываются и не пропускаются.
+        """
+        accumulate = config.PROGRESS_WRITE_MODE == "accumulate"
+        results: List[Dict[str, Any]] = [{} for _ in items]
+        latest_by_date: Dict[date, int] = {}
+        records: Dict[int, ProgressRecord] = {}
+
+        for index, item in enumerate(items):
+            raw_date = item.get("date")
+            results[index] = {"index": index, "date": raw_date, "status": "error",
+                              "progress_id": None, "error": None}
+            try:
+                if raw_date is None:
+                    record_date = date.today()
+                elif isinstance(raw_date, str):
+                    record_date = datetime.strptime(raw_date, "%Y-%m-%d").date()
+                else:
+                    record_date = raw_date
+                results[index]["date"] = record_date.isoformat()
+                records[index] = ProgressRecord(
                     user_id=user_id,
-                    type=ach_type,
-                    earned_at=datetime.utcnow(),
+                    date=record_date,
+                    score=item["score"],
+                    correct_answers=item["correct_answers"],
+                    total_answers=item["total_answers"],
+                    time_spent=item["time_spent"],
                 )
-                await self._achievement_repo.create_achievement(achievement)
-
-    async def _maybe_award_streak_achievement(self, user_id: str, today: date) -> None:
-        """Выдаёт STREAK_7_DAYS, если есть записи за семь подряд дней включая today."""
-        from datetime import timedelta
-        start = today - timedelta(days=6)
-        records = await self._progress_repo.get_progress(user_id, start.isoformat(), today.isoformat())
-        if len(records) < 7:
+            except ValueError as e:
+                results[index]["error"] = str(e)
+                continue
+            if accumulate:
+                continue
+            # Как и в record_progress, запись за день заменяет прежнюю: побеждает последняя
+            if record_date in latest_by_date:
+                earlier = latest_by_date[record_date]
+                results[earlier].update(status="skipped", error=f"Superseded by item {index} for the same date")
+            latest_by_date[record_date] = index
+
+        pending = list(records) if accumulate else list(latest_by_date.values())
+        # Дни пишутся по порядку дат, чтобы серии в user_stats считались без записей задним числом
+        pending.sort(key=lambda i: (records[i].date, i))
+        write_chunk = (self._progress_repo.accumulate_daily_scores if accumulate
+                       else self._progress_repo.record_daily_scores)
+        chunk_size = config.PROGRESS_BATCH_CHUNK_SIZE
+        saved_any = False
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            try:
+                await write_chunk(user_id, [records[i] for i in chunk])
+            except Exception as e:
+                for i in chunk:
+                    results[i]["error"] = f"Failed to save progress: {e}"
+                continue
+            for i in chunk:
+                record_date = records[i].date
+                results[i].update(status="saved", progress_id=f"{user_id}_{record_date.isoformat()}")
+            self._update_leaderboard([records[i] for i in chunk])
+            saved_any = True
+
+        # ----- ACHIEVEMENT RULES (один раз на всю пачку) -----
+        if saved_any:
+            await self._evaluate_progress_achievements(user_id)
+
+        return results
+    
+    def _update_leaderboard(self, records: List[ProgressRecord]) -> None:
+        if self._leaderboard is None:
             return
-        recorded_dates = {r.date for r in records}
-        if all((start + timedelta(i)) in recorded_dates for i in range(7)):
-            if not await self._achievement_repo.exists_achievement(user_id, AchievementType.STREAK_7_DAYS):
-                ach_id = str(uuid.uuid4())
-                achievement = AchievementModel(
-                    achievement_id=ach_id,
-                    user_id=user_id,
-                    type=AchievementType.STREAK_7_DAYS,
-                    earned_at=datetime.utcnow(),
-                    period_start_date=start,
-                )
-                await self._achievement_repo.create_achievement(achievement)
+        # В режиме accumulate очки игры прибавляются к дню, иначе заменяют его
+        replace = config.PROGRESS_WRITE_MODE != "accumulate"
+        for record in records:
+            self._leaderboard.record(record.user_id, record.date, record.score, replace=replace)
 
-    async def get_progress(self, user_id: str, days: int = 7) -> Dict[str, Any]:
-        """Возвращает детализацию прогресса за *days* дней."""
+    # ---------- ACHIEVEMENT HELPERS ----------
+    async def _evaluate_progress_achievements(self, user_id: str) -> None:
+        """Проверяет правила каталога по агрегату user_stats (см. services/achievement_rules)."""
+        # Новый прогресс: GET /api/achievements должен проверить пользователя заново
+        achievement_check_cache.invalidate(user_id)
+        if self._achievement_worker is not None and self._achievement_worker.running:
+            self._achievement_worker.submit(user_id)
+            return
+        await award_progress_achievements(self._progress_repo, self._achievement_repo, user_id)
+
+    async def get_progress(self, user_id: str, days: int = 7, resolution: str = "day") -> Dict[str, Any]:
+        """Возвращает детализацию прогресса за *days* дней.
+
+        resolution "week" или "month" суммирует дни по неделям (с понедельника)
+        или календарным месяцам; date элемента — первый день периода.
+        """
         end_date = date.today()
         start_date = end_date - timedelta(days=days - 1)
 
@@ -110,6 +185,8 @@ class ProgressService:
             }
             for r in records
         ]
+        if resolution != "day":
+            data = self._downsample(records, resolution)
 
         average_score = total_score / len(records) if records else 0
         success_rate = total_correct / total_answers if total_answers else 0
@@ -121,12 +198,45 @@ class ProgressService:
             "success_rate": round(success_rate, 2),
         }
     
+    async def get_analytics(self, user_id: str, days: int = 90, window: int = 7) -> Dict[str, Any]:
+        """Аналитика прогресса за *days* дней (скользящее среднее за *window* дней)."""
+        end_date = date.today()
+        start_date = end_date - timedelta(days=days - 1)
+        records = await self._progress_repo.get_progress(
+            user_id,
+            start_date.isoformat(),
+            end_date.isoformat(),
+        )
+        return compute_analytics(records, start_date, end_date, window)
+
     async def get_weekly_summary(self, user_id: str) -> int:
         """Сумма очков за последние 7 дней."""
         week_ago = datetime.now() - timedelta(days=7)
         return await self._progress_repo.sum_scores_for_week(user_id, week_ago)
     
     # ---------- INTERNAL HELPER ----------
+
+    @staticmethod
+    def _downsample(records: List[ProgressRecord], resolution: str) -> List[Dict[str, Any]]:
+        """Суммирует записи по неделям ("week") или месяцам ("month")."""
+        buckets: Dict[date, Dict[str, Any]] = {}
+        for r in sorted(records, key=lambda r: r.date):
+            if resolution == "week":
+                start = r.date - timedelta(days=r.date.weekday())
+            else:
+                start = r.date.replace(day=1)
+            bucket = buckets.setdefault(start, {
+                "date": start.isoformat(), "score": 0, "correct_answers": 0,
+                "total_answers": 0, "time_spent": 0.0,
+            })
+            bucket["score"] += r.score
+            bucket["correct_answers"] += r.correct_answers
+            bucket["total_answers"] += r.total_answers
+            bucket["time_spent"] += r.time_spent
+        for bucket in buckets.values():
+            total = bucket["total_answers"]
+            bucket["success_rate"] = bucket["correct_answers"] / total if total else 0.0
+        return list(buckets.values())
     
     async def _get_records_for_period(
         self, user_id: str, start_date: date, end_date: date
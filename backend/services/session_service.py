@@ -1,17 +1,19 @@
 import uuid
+from typing import Optional
 from datetime import datetime, timezone
 from domain.session import SessionModel, RoundDetail, SessionStatus
-from domain.achievement import AchievementModel, AchievementType
 from fastapi import Depends
 from repositories.session_repository import SessionRepository
 from repositories.achievement_repository import AchievementRepository
+from services.achievement_rules import session_achievements, session_snapshot
+from shared.active_session_cache import active_session_cache
 from shared.dependencies import get_session_repository, get_achievement_repository
 
 class SessionService:
     def __init__(
         self,
         session_repo: SessionRepository = Depends(get_session_repository),
-        achievement_repo: AchievementRepository = Depends(get_achievement_repository)
+        achievement_repo: AchievementRepository = Depends(get_achievement_repository),
     ):
         self._session_repo = session_repo
         self._achievement_repo = achievement_repo
@@ -28,8 +30,18 @@ class SessionService:
             details=[]
         )
         await self._session_repo.create_session(session)
+        active_session_cache.put(user_id, session)
         return session_id
 
+    async def get_active_session(self, user_id: str) -> Optional[SessionModel]:
+        """Активная сессия пользователя: из кэша процесса или одним чтением указателя."""
+        cached = active_session_cache.get(user_id)
+        if cached is not None:
+            return cached.session
+        session = await self._session_repo.get_active_session(user_id)
+        active_session_cache.put(user_id, session)
+        return session
+
     async def finish_session(
         self,
         session_id: str,
@@ -37,17 +49,18 @@ class SessionService:
         details: list[RoundDetail],
         score: int
     ) -> None:
+        """
+        Завершает сессию: обновление сессии, выданные по сессионным правилам
+        каталога достижения (например, «идеальная сессия») и счётчики
+        пользователя пишутся одним атомарным commit.
+        """
         end_time = datetime.now(timezone.utc)
-        await self._session_repo.update_session(session_id, details, end_time, score)
-
-        # Правило «10 правильных подряд»
-        if all(detail.is_correct for detail in details):
-            ach_id = str(uuid.uuid4())
-            achievement = AchievementModel(
-                achievement_id=ach_id,
-                user_id=user_id,
-                type=AchievementType.PERFECT_STREAK,
-                earned_at=datetime.now(timezone.utc),
-                session_id=session_id
-            )
-            await self._achievement_repo.create_achievement(achievement)
+        # Сессионные правила проверяются по результатам сессии без чтений (каталог в кэше процесса)
+        achievements = await session_achievements(
+            self._achievement_repo, user_id, [session_snapshot(session_id, details)])
+        cleared = await self._session_repo.finish_session(session_id, user_id, details, end_time, score, achievements)
+        if cleared:
+            active_session_cache.put(user_id, None)
+        else:
+            # Указатель уже на другой сессии (начата в другом процессе) — перечитаем
+            active_session_cache.invalidate(user_id)
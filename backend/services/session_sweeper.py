@@ -0,0 +1,66 @@
+"""Фоновая очистка брошенных игровых сессий.
+
+Сессия, начатая через /api/session/start, остаётся active, если приложение
+закрыли посреди игры. Раз в SESSION_SWEEPER_INTERVAL секунд активные сессии
+старше SESSION_ABANDON_AFTER_SECONDS помечаются abandoned, а указатели
+active_sessions на них удаляются.
+
+Проход идёт страницами от самых старых сессий: одна страница — одна
+транзакция (SessionRepository.abandon_sessions_page), которая вместе с
+сессиями записывает состояние прохода в maintenance/session_sweeper.
+Помеченные сессии выпадают из запроса, так что следующая страница снова
+читается с начала. Прерванный проход (остановка, сбой) продолжается с тем же
+cutoff. Между страницами — пауза, чтобы не превышать SESSION_SWEEPER_RATE
+сессий в секунду и не отнимать у API квоту записи Firestore.
+
+Запрос требует составного индекса sessions (status ASC, start_time ASC),
+он объявлен в firestore.indexes.json.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+import structlog
+
+from shared.active_session_cache import active_session_cache
+
+logger = structlog.get_logger()
+
+
+def _cutoff(max_age: float) -> str:
+    # В формате start_time сессии (pydantic JSON), чтобы строки сравнивались как время
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+    return cutoff.isoformat().replace("+00:00", "Z")
+
+
+async def sweep_abandoned_sessions(repository, max_age: float, page_size: int, rate: float,
+                                   sleep: Callable = asyncio.sleep) -> int:
+    """Один проход очистки (или продолжение прерванного); возвращает число помеченных сессий."""
+    checkpoint = await repository.get_sweep_checkpoint()
+    cutoff = checkpoint["cutoff"] if checkpoint.get("in_progress") else _cutoff(max_age)
+    swept = 0
+    while True:
+        started = time.monotonic()
+        count = await repository.abandon_sessions_page(cutoff, page_size)
+        swept += count
+        if count < page_size:
+            break
+        await sleep(max(0.0, count / rate - (time.monotonic() - started)))
+    await repository.complete_sweep(cutoff)
+    if swept:
+        # Указатели удалены в Firestore; закэшированные в процессе сбрасываем целиком
+        active_session_cache.clear()
+        logger.info("abandoned_sessions_swept", sessions=swept, cutoff=cutoff)
+    return swept
+
+
+async def run_sweeper(repositories: Callable[[], object], interval: float, max_age: float,
+                      page_size: int, rate: float) -> None:
+    """Фоновая задача: проход очистки раз в *interval* секунд."""
+    while True:
+        try:
+            await sweep_abandoned_sessions(repositories(), max_age, page_size, rate)
+        except Exception as e:
+            logger.warning("session_sweep_failed", error=str(e))
+        await asyncio.sleep(interval)
@@ -1,4 +1,5 @@
 # Экспортируем модули для доступа через backend.shared.*
-from . import auth
+# shared.auth не импортируется здесь: он зависит от services и repositories,
+# а репозитории сами импортируют shared.firestore_stats (иначе циклический импорт)
 from . import config
 from . import firebase_client
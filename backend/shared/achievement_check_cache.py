@@ -0,0 +1,47 @@
+"""In-process markers of users whose progress achievements were checked today.
+
+``GET /api/achievements`` re-evaluates the progress rules before listing the
+catalogue, which costs a stats read, an existence check and sometimes a write
+on every view of the achievements screen.  Nothing a user can earn changes
+until new progress is recorded, so after an evaluation the uid is marked for
+the current (UTC) day: repeat views skip the evaluation until the day ends or
+``invalidate`` is called when progress arrives.
+
+The marker is set *before* the evaluation runs, so progress recorded while an
+evaluation is in flight always clears it.  Markers are per process: progress
+handled by another worker does not clear them, but that request evaluates the
+achievements itself.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from typing import Callable
+
+from shared import config
+from shared.lru_cache import LRUCache
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class AchievementCheckCache(LRUCache[str, date]):
+    """Bounded LRU set of (uid -> day evaluated); an entry expires when the day changes."""
+
+    def __init__(self, max_entries: int = 10_000, today: Callable[[], date] = _utc_today):
+        super().__init__(max_entries)
+        self._today = today
+
+    def _is_fresh(self, day: date) -> bool:
+        return day == self._today()
+
+    def checked(self, uid: str) -> bool:
+        """True if *uid* was already evaluated today."""
+        return self.get(uid) is not None
+
+    def mark(self, uid: str) -> None:
+        self._store(uid, self._today())
+
+
+# Общий для процесса: AchievementService и ProgressService создаются на каждый запрос
+achievement_check_cache = AchievementCheckCache(max_entries=config.ACHIEVEMENT_CHECK_CACHE_SIZE)
@@ -0,0 +1,40 @@
+"""In-process cache of each user's active session.
+
+``GET /api/session/active`` reads the ``active_sessions/{uid}`` pointer that
+``SessionService`` writes on start and clears on finish.  The result (including
+"no active session") is cached per uid for a limited TTL; start and finish in
+this process update the entry directly, so only changes made by another worker
+process can be seen late, by at most ``ttl_seconds``.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from domain.session import SessionModel
+from shared import config
+from shared.lru_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedActiveSession:
+    session: Optional[SessionModel]
+    checked_at: float
+
+
+class ActiveSessionCache(TTLCache[str, CachedActiveSession]):
+    """Bounded LRU cache: uid -> active session (or None), valid for *ttl_seconds*."""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10_000, clock: Callable[[], float] = time.time):
+        super().__init__(ttl_seconds, max_entries, clock)
+
+    def put(self, uid: str, session: Optional[SessionModel]) -> CachedActiveSession:
+        return self._store(uid, CachedActiveSession(session=session, checked_at=self._clock()))
+
+
+# Общий для процесса: SessionService создаётся на каждый запрос
+active_session_cache = ActiveSessionCache(
+    ttl_seconds=config.ACTIVE_SESSION_CACHE_TTL,
+    max_entries=config.ACTIVE_SESSION_CACHE_SIZE,
+)
@@ -2,6 +2,7 @@ from fastapi import Header, HTTPException, status, Depends
 from firebase_admin import auth as firebase_auth_module # Переименовываем, чтобы избежать конфликта с переменной auth
 
 from services.auth_service import AuthService
+from shared.blocking_executor import ExecutorSaturatedError
 
 async def get_current_user_id(
     authorization: str = Header(None),
@@ -34,8 +35,15 @@ async def get_current_user_id(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    token = parts[1]
-    
+    return await verify_token_uid(parts[1], auth_service)
+
+
+async def verify_token_uid(token: str, auth_service: AuthService) -> str:
+    """
+    Верифицирует токен Firebase ID и возвращает UID.
+    Используется и без заголовка Authorization (например, в WebSocket,
+    где токен приходит первым сообщением). Ошибки — HTTPException, как выше.
+    """
     try:
         # Используем внедренный auth_service
         uid_or_payload = await auth_service.verify_token(token)
@@ -61,6 +69,14 @@ async def get_current_user_id(
             detail=f"Invalid Firebase ID token: {e}",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except (TimeoutError, ExecutorSaturatedError) as e:
+        # Пул проверки токенов перегружен или Firebase Auth не ответил вовремя
+        print(f"Token verification unavailable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is temporarily unavailable.",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         # Логирование ошибки e
         print(f"Unexpected error during token verification: {e}")
@@ -0,0 +1,137 @@
+"""Bounded thread pool for blocking SDK calls made from async handlers.
+
+Firebase Admin SDK calls (``verify_id_token``, ``create_user``, ``get_user``)
+are synchronous.  Calling them directly inside ``async def`` handlers blocks the
+uvicorn event loop, so they are submitted to a dedicated pool with its own size,
+a limit on waiting calls and a per-call timeout.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from shared import config
+
+T = TypeVar("T")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when too many calls are already waiting for a worker thread."""
+
+
+class _QueueSlot:
+    """A call's place in the queue; released exactly once (started or dropped)."""
+    __slots__ = ("released",)
+
+    def __init__(self) -> None:
+        self.released = False
+
+
+class BoundedExecutor:
+    """Thread pool with queue-depth metrics, a queue limit and call timeouts."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, timeout: float):
+        self._name = name
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix=self._name)
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``func(*args, **kwargs)`` in the pool and await its result.
+
+        Raises ``ExecutorSaturatedError`` if the queue is full and ``TimeoutError``
+        if the call does not finish within the configured timeout.
+        """
+        with self._lock:
+            if self.queued >= self._max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError(f"{self._name}: {self.queued} calls already waiting")
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        slot = _QueueSlot()
+        try:
+            pool_future = self._get_executor().submit(functools.partial(self._call, slot, func, *args, **kwargs))
+        except BaseException:
+            self._release(slot)
+            raise
+        # Вызов, отменённый до старта (timeout, отмена, shutdown), тоже освобождает место в очереди
+        pool_future.add_done_callback(lambda _: self._release(slot))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(pool_future), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"{self._name}: call timed out after {self._timeout}s")
+
+    def _release(self, slot: _QueueSlot) -> None:
+        with self._lock:
+            if not slot.released:
+                slot.released = True
+                self.queued -= 1
+
+    def _call(self, slot: _QueueSlot, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        self._release(slot)
+        with self._lock:
+            self.running += 1
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        else:
+            with self._lock:
+                self.completed += 1
+            return result
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self._max_workers,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads; the pool is recreated on the next ``run``."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Отдельный пул для Firebase Auth: его задержки не отнимают потоки у остального кода
+auth_executor = BoundedExecutor(
+    name="firebase-auth",
+    max_workers=config.AUTH_EXECUTOR_WORKERS,
+    max_queue=config.AUTH_EXECUTOR_MAX_QUEUE,
+    timeout=config.AUTH_CALL_TIMEOUT,
+)
@@ -0,0 +1,148 @@
+"""Process-wide cache of the achievement catalogue (stale-while-revalidate).
+
+``AchievementRepository`` is built per request, so a cache inside it never
+outlived a single call and every request that needed the catalogue streamed
+the whole ``achievement_catalog`` collection.  ``CatalogCache`` holds one copy
+per process:
+
+- it is loaded in the app lifespan, after seeding;
+- ``get`` never waits on Firestore: it returns the cached copy and, once the
+  copy is older than ``max_age`` seconds, starts a single background reload;
+- until the first load finishes (or if it fails) ``DEFAULT_CATALOG`` is served,
+  which is what the collection is seeded from;
+- a reload first reads the catalogue version (one document, incremented by
+  every catalogue write) and re-reads the collection only if the version
+  differs from the cached copy's, so an unchanged catalogue costs one read;
+  without a version document the whole collection is read every time;
+- a failed reload keeps serving the previous copy (or the defaults) and is
+  retried by the first ``get`` after another ``max_age`` seconds.
+
+The async Firestore client has no ``on_snapshot`` listeners, so changes to the
+collection are picked up by the age-based reload rather than pushed.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import structlog
+
+from domain.achievement_catalog import DEFAULT_CATALOG
+from shared import config
+
+logger = structlog.get_logger()
+
+CatalogLoader = Callable[[], Awaitable[List[dict]]]
+VersionLoader = Callable[[], Awaitable[Optional[int]]]
+
+
+def _pool_repository():
+    from repositories.achievement_repository import AchievementRepository
+    from shared.dependencies import get_client_pool
+
+    return AchievementRepository(db=get_client_pool().get())
+
+
+async def _load_from_pool() -> List[dict]:
+    return await _pool_repository().load_catalog()
+
+
+async def _version_from_pool() -> Optional[int]:
+    return await _pool_repository().get_catalog_version()
+
+
+class CatalogCache:
+    """One copy of the catalogue per process, reloaded in the background when stale."""
+
+    def __init__(self, max_age: float = 300.0, loader: CatalogLoader = _load_from_pool,
+                 version_loader: VersionLoader = _version_from_pool, clock: Callable[[], float] = time.monotonic):
+        self._max_age = max_age
+        self._loader = loader
+        self._version_loader = version_loader
+        self._clock = clock
+        self._catalog: Optional[List[dict]] = None
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        # Когда запускать следующую фоновую перезагрузку (после успеха или сбоя)
+        self._refresh_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.unchanged = 0
+        self.refresh_failures = 0
+
+    def get(self) -> List[dict]:
+        """Cached catalogue (``DEFAULT_CATALOG`` before the first load); never blocks."""
+        due = self._clock() >= self._refresh_at
+        if due:
+            self._revalidate()
+        if self._catalog is None:
+            self.misses += 1
+            return DEFAULT_CATALOG
+        if due:
+            self.stale += 1
+        else:
+            self.hits += 1
+        return self._catalog
+
+    async def refresh(self) -> bool:
+        """Reload the catalogue now if its version changed; on failure the previous copy is kept. Returns success."""
+        try:
+            # Версия читается до каталога: запись между чтениями даст лишнюю перезагрузку, а не пропущенную
+            version = await self._version_loader()
+            if version is not None and self._catalog is not None and version == self._version:
+                self.set(self._catalog, version)
+                self.unchanged += 1
+                return True
+            catalog = await self._loader()
+        except Exception as e:
+            self.refresh_failures += 1
+            self._refresh_at = self._clock() + self._max_age
+            logger.warning("achievement_catalog_refresh_failed", error=str(e))
+            return False
+        self.set(catalog, version)
+        self.refreshes += 1
+        return True
+
+    def set(self, catalog: List[dict], version: Optional[int] = None) -> None:
+        """Replace the cached catalogue (*version* — its catalogue version, if known)."""
+        self._catalog = catalog
+        self._version = version
+        self._loaded_at = self._clock()
+        self._refresh_at = self._loaded_at + self._max_age
+
+    def clear(self) -> None:
+        self._catalog = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._refresh_at = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.stale + self.misses
+        return {
+            "size": len(self._catalog) if self._catalog is not None else 0,
+            "hits": self.hits + self.stale,
+            "stale": self.stale,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "unchanged": self.unchanged,
+            "refresh_failures": self.refresh_failures,
+            "hit_ratio": (self.hits + self.stale) / lookups if lookups else 0.0,
+            "age_seconds": self._clock() - self._loaded_at if self._catalog is not None else 0.0,
+        }
+
+    def _revalidate(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        try:
+            self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+        except RuntimeError:
+            # Нет event loop (синхронный вызов) — перезагрузится при следующем get из запроса
+            self._refresh_task = None
+
+
+# Общий для процесса: AchievementRepository создаётся на каждый запрос
+achievement_catalog_cache = CatalogCache(max_age=config.ACHIEVEMENT_CATALOG_MAX_AGE)
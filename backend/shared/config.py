@@ -1,10 +1,104 @@
 # backend/shared/config.py
 # Этот файл предназначен для других не-Firebase конфигураций.
 # Клиент Firestore теперь получается напрямую из firebase_client.py по мере необходимости.
+# Настройки читаются из переменных окружения один раз при импорте модуля.
+import os
 
 print("config.py: Загружен. Клиент Firestore должен получаться из firebase_client.py по требованию.")
 
-# Например:
-# MY_OTHER_API_KEY = "your_api_key"
-# DEFAULT_ITEMS_PER_PAGE = 20
+# --- Firestore ---
+# "firestore" — настоящий Firestore/эмулятор, "memory" — хранилище в памяти процесса
+# (shared/memory_firestore.py) для тестов, нагрузочных прогонов и бенчмарков
+FIRESTORE_BACKEND = os.getenv("FIRESTORE_BACKEND", "firestore")
+# Искусственная задержка каждого RPC в режиме memory (моделирует сетевой round trip)
+FIRESTORE_MEMORY_LATENCY_MS = float(os.getenv("FIRESTORE_MEMORY_LATENCY_MS", "0"))
+# Количество gRPC-каналов (AsyncClient) в пуле на один воркер uvicorn
+FIRESTORE_POOL_CHANNELS = int(os.getenv("FIRESTORE_POOL_CHANNELS", "1"))
 
+# --- Auth ---
+# Максимальное число проверенных токенов в кэше процесса (0 — кэш выключен)
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+# Проверять отзыв токенов (auth.get_user); результат кэшируется на AUTH_REVOCATION_CACHE_TTL секунд
+AUTH_CHECK_REVOKED = os.getenv("AUTH_CHECK_REVOKED", "False") == "True"
+AUTH_REVOCATION_CACHE_TTL = float(os.getenv("AUTH_REVOCATION_CACHE_TTL", "60"))
+# Пул потоков для блокирующих вызовов Firebase Admin SDK
+AUTH_EXECUTOR_WORKERS = int(os.getenv("AUTH_EXECUTOR_WORKERS", "8"))
+AUTH_EXECUTOR_MAX_QUEUE = int(os.getenv("AUTH_EXECUTOR_MAX_QUEUE", "1000"))
+AUTH_CALL_TIMEOUT = float(os.getenv("AUTH_CALL_TIMEOUT", "10"))
+
+# --- Metrics ---
+# Эндпоинт /metrics в формате Prometheus
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+# Период (секунды) замера задержки event loop
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+
+# --- Progress ---
+# Сколько последних дней хранить по дням в агрегате user_stats/{uid}
+PROGRESS_STATS_WINDOW_DAYS = int(os.getenv("PROGRESS_STATS_WINDOW_DAYS", "31"))
+# Источник сумм очков: "stats" (агрегат user_stats), "aggregate" (sum/count в Firestore), "scan"
+PROGRESS_SUM_SOURCE = os.getenv("PROGRESS_SUM_SOURCE", "stats")
+# Запись прогресса за день: "replace" — новая запись заменяет прежнюю,
+# "accumulate" — результаты прибавляются к ней (Increment, без чтения)
+PROGRESS_WRITE_MODE = os.getenv("PROGRESS_WRITE_MODE", "replace")
+# Дополнительно хранить прогресс помесячно: progress_months/{uid}_{YYYY-MM} с очками,
+# ответами и временем по дням месяца; история за год читается 12 документами
+PROGRESS_MONTHLY_DOCS = os.getenv("PROGRESS_MONTHLY_DOCS", "False") == "True"
+# GET /api/progress: максимальное число дней в запросе
+PROGRESS_MAX_DAYS = int(os.getenv("PROGRESS_MAX_DAYS", "366"))
+# GET /api/progress/analytics: максимальный период в днях
+PROGRESS_ANALYTICS_MAX_DAYS = int(os.getenv("PROGRESS_ANALYTICS_MAX_DAYS", "1095"))
+# POST /api/progress/batch: максимум дней в запросе и дней в одном commit (не больше 499)
+PROGRESS_BATCH_MAX_ITEMS = int(os.getenv("PROGRESS_BATCH_MAX_ITEMS", "366"))
+PROGRESS_BATCH_CHUNK_SIZE = int(os.getenv("PROGRESS_BATCH_CHUNK_SIZE", "100"))
+
+# --- Sessions ---
+# GET /api/session/active: указатель active_sessions/{uid} кэшируется в процессе
+# на ACTIVE_SESSION_CACHE_TTL секунд (0 — читать при каждом запросе)
+ACTIVE_SESSION_CACHE_TTL = float(os.getenv("ACTIVE_SESSION_CACHE_TTL", "30"))
+ACTIVE_SESSION_CACHE_SIZE = int(os.getenv("ACTIVE_SESSION_CACHE_SIZE", "10000"))
+# Фоновая очистка: активные сессии старше SESSION_ABANDON_AFTER_SECONDS помечаются abandoned
+# раз в SESSION_SWEEPER_INTERVAL секунд, страницами по SESSION_SWEEPER_PAGE_SIZE (не больше 249:
+# одна страница — один commit) и не быстрее SESSION_SWEEPER_RATE сессий в секунду
+SESSION_SWEEPER_ENABLED = os.getenv("SESSION_SWEEPER_ENABLED", "True") == "True"
+SESSION_ABANDON_AFTER_SECONDS = float(os.getenv("SESSION_ABANDON_AFTER_SECONDS", "7200"))
+SESSION_SWEEPER_INTERVAL = float(os.getenv("SESSION_SWEEPER_INTERVAL", "600"))
+SESSION_SWEEPER_PAGE_SIZE = int(os.getenv("SESSION_SWEEPER_PAGE_SIZE", "200"))
+SESSION_SWEEPER_RATE = float(os.getenv("SESSION_SWEEPER_RATE", "200"))
+# WebSocket /api/session/ws: раунды копятся в памяти процесса (services/live_sessions.py)
+# и пишутся одним commit при finish или через LIVE_SESSION_RESUME_SECONDS после отключения
+LIVE_SESSION_MAX_SESSIONS = int(os.getenv("LIVE_SESSION_MAX_SESSIONS", "10000"))
+LIVE_SESSION_MAX_ROUNDS = int(os.getenv("LIVE_SESSION_MAX_ROUNDS", "200"))
+LIVE_SESSION_RESUME_SECONDS = float(os.getenv("LIVE_SESSION_RESUME_SECONDS", "60"))
+LIVE_SESSION_FLUSH_INTERVAL = float(os.getenv("LIVE_SESSION_FLUSH_INTERVAL", "10"))
+# Сколько ждать первого сообщения {"type": "auth"} после подключения
+LIVE_SESSION_AUTH_TIMEOUT = float(os.getenv("LIVE_SESSION_AUTH_TIMEOUT", "10"))
+
+# --- Leaderboard ---
+# GET /api/leaderboard: недельный рейтинг в памяти процесса (services/leaderboard.py)
+LEADERBOARD_ENABLED = os.getenv("LEADERBOARD_ENABLED", "True") == "True"
+# Окно рейтинга в днях и максимальный limit запроса
+LEADERBOARD_DAYS = int(os.getenv("LEADERBOARD_DAYS", "7"))
+LEADERBOARD_MAX_LIMIT = int(os.getenv("LEADERBOARD_MAX_LIMIT", "100"))
+# Как часто (секунды) изменения рейтинга сохраняются в Firestore (leaderboard_days)
+LEADERBOARD_CHECKPOINT_SECONDS = float(os.getenv("LEADERBOARD_CHECKPOINT_SECONDS", "60"))
+
+# --- Achievements ---
+# Проверка достижений в фоновом воркере процесса (services/achievement_worker.py):
+# запросы только ставят событие «пользователь изменился» в очередь
+ACHIEVEMENT_WORKER_ENABLED = os.getenv("ACHIEVEMENT_WORKER_ENABLED", "True") == "True"
+# Число задач-воркеров и пользователей в одной пачке (новые достижения пачки — один commit)
+ACHIEVEMENT_WORKER_CONCURRENCY = int(os.getenv("ACHIEVEMENT_WORKER_CONCURRENCY", "2"))
+ACHIEVEMENT_WORKER_BATCH_SIZE = int(os.getenv("ACHIEVEMENT_WORKER_BATCH_SIZE", "50"))
+# События одного пользователя за это окно (секунды) объединяются в одну проверку
+ACHIEVEMENT_WORKER_DEDUP_SECONDS = float(os.getenv("ACHIEVEMENT_WORKER_DEDUP_SECONDS", "2"))
+# Повторы неудачной проверки: число попыток и начальная задержка (удваивается)
+ACHIEVEMENT_WORKER_MAX_ATTEMPTS = int(os.getenv("ACHIEVEMENT_WORKER_MAX_ATTEMPTS", "3"))
+ACHIEVEMENT_WORKER_RETRY_DELAY = float(os.getenv("ACHIEVEMENT_WORKER_RETRY_DELAY", "1"))
+# Сколько секунд при остановке ждать, пока очередь будет обработана
+ACHIEVEMENT_WORKER_DRAIN_TIMEOUT = float(os.getenv("ACHIEVEMENT_WORKER_DRAIN_TIMEOUT", "10"))
+# Каталог достижений кэшируется в процессе; старше этого возраста (секунды)
+# перечитывается в фоне, а запросы получают прежнюю копию
+ACHIEVEMENT_CATALOG_MAX_AGE = float(os.getenv("ACHIEVEMENT_CATALOG_MAX_AGE", "300"))
+# GET /api/achievements проверяет достижения пользователя не чаще раза в день (до нового прогресса);
+# размер кэша отметок в процессе (0 — проверка при каждом запросе)
+ACHIEVEMENT_CHECK_CACHE_SIZE = int(os.getenv("ACHIEVEMENT_CHECK_CACHE_SIZE", "10000"))
@@ -7,24 +7,49 @@ from repositories.user_repository import UserRepository
 from repositories.achievement_repository import AchievementRepository
 from repositories.session_repository import SessionRepository
 from repositories.progress_repository import ProgressRepository
+from repositories.leaderboard_repository import LeaderboardRepository
+
+from shared import config
+from shared.catalog_cache import achievement_catalog_cache
+from shared.firestore_pool import FirestoreClientPool
+from shared.memory_firestore import MemoryFirestoreClient
+
+# Единственное хранилище в памяти на процесс: все клиенты пула видят одни и те же данные
+_memory_client: MemoryFirestoreClient | None = None
+
+def get_memory_client() -> MemoryFirestoreClient:
+    """Returns the process-wide in-memory Firestore stand-in."""
+    global _memory_client
+    if _memory_client is None:
+        _memory_client = MemoryFirestoreClient(latency_ms=config.FIRESTORE_MEMORY_LATENCY_MS)
+    return _memory_client
 
 # Обертка, возвращающая AsyncClient, используя эмулятор, если он настроен
 def _create_async_client() -> FirestoreClient:
     import os
+    if config.FIRESTORE_BACKEND == "memory":
+        return get_memory_client()  # type: ignore[return-value]
     project_id = os.getenv("GCLOUD_PROJECT", "easytalk-emulator")
     if os.getenv("FIRESTORE_EMULATOR_HOST"):
         return FirestoreClient(project=project_id, credentials=AnonymousCredentials())
     return FirestoreClient(project=project_id)
 
+# Пул создаётся один раз на процесс; открывается и закрывается в lifespan (main.py)
+_client_pool = FirestoreClientPool(factory=_create_async_client, size=config.FIRESTORE_POOL_CHANNELS)
+
+def get_client_pool() -> FirestoreClientPool:
+    """Returns the process-wide Firestore client pool."""
+    return _client_pool
+
 def get_db() -> FirestoreClient:
-    """FastAPI dependency that returns Async Firestore client."""
-    return _create_async_client()
+    """FastAPI dependency that returns a pooled Async Firestore client."""
+    return _client_pool.get()
 
 def get_user_repository(db: FirestoreClient = Depends(get_db)) -> UserRepository:
     return UserRepository(db=db)
 
 def get_achievement_repository(db: FirestoreClient = Depends(get_db)) -> AchievementRepository:
-    return AchievementRepository(db=db)
+    return AchievementRepository(db=db, catalog_cache=achievement_catalog_cache)
 
 def get_session_repository(db: FirestoreClient = Depends(get_db)) -> SessionRepository:
     return SessionRepository(db=db)
@@ -32,16 +57,37 @@ def get_session_repository(db: FirestoreClient = Depends(get_db)) -> SessionRepo
 def get_progress_repository(db: FirestoreClient = Depends(get_db)) -> ProgressRepository:
     return ProgressRepository(db=db)
 
+def get_leaderboard_repository(db: FirestoreClient = Depends(get_db)) -> LeaderboardRepository:
+    return LeaderboardRepository(db=db)
+
 # ---------- Service-level dependencies ----------
+from services.achievement_worker import AchievementWorker, achievement_worker
 from services.progress_service import ProgressService
 from services.session_service import SessionService
 from services.achievement_service import AchievementService
+from services.leaderboard import WeeklyLeaderboard, weekly_leaderboard
+from services.leaderboard_service import LeaderboardService
+from services.live_sessions import LiveSessionStore, live_sessions
+
+def get_achievement_worker() -> AchievementWorker | None:
+    """Process-wide achievement worker, or None when checks run inside requests."""
+    return achievement_worker if config.ACHIEVEMENT_WORKER_ENABLED else None
+
+def get_leaderboard() -> WeeklyLeaderboard | None:
+    """Process-wide weekly leaderboard, or None when it is disabled."""
+    return weekly_leaderboard if config.LEADERBOARD_ENABLED else None
+
+def get_live_sessions() -> LiveSessionStore:
+    """Process-wide store of sessions streamed over WebSocket."""
+    return live_sessions
 
 def get_progress_service(
     progress_repo: ProgressRepository = Depends(get_progress_repository),
+    achievement_repo: AchievementRepository = Depends(get_achievement_repository),
 ) -> ProgressService:
     """FastAPI dependency returning ProgressService instance."""
-    return ProgressService(progress_repo)
+    return ProgressService(progress_repo=progress_repo, achievement_repo=achievement_repo,
+                           achievement_worker=get_achievement_worker(), leaderboard=get_leaderboard())
 
 def get_session_service(
     session_repo: SessionRepository = Depends(get_session_repository),
@@ -55,4 +101,11 @@ def get_achievement_service(
     progress_repo: ProgressRepository = Depends(get_progress_repository),
 ) -> AchievementService:
     """FastAPI dependency returning AchievementService instance."""
-    return AchievementService(achievement_repo=achievement_repo, progress_repo=progress_repo)
+    return AchievementService(achievement_repo=achievement_repo, progress_repo=progress_repo,
+                              achievement_worker=get_achievement_worker())
+
+def get_leaderboard_service(
+    user_repo: UserRepository = Depends(get_user_repository),
+) -> LeaderboardService:
+    """FastAPI dependency returning LeaderboardService instance."""
+    return LeaderboardService(leaderboard=weekly_leaderboard, user_repo=user_repo)
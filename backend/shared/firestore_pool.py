@@ -0,0 +1,73 @@
+"""Process-wide pool of Firestore AsyncClient instances.
+
+Each ``AsyncClient`` lazily opens its own gRPC channel on the first call, so a
+pool of *N* clients gives *N* channels per uvicorn worker.  The pool is opened
+once in the FastAPI lifespan handler and closed on shutdown; every repository
+receives one of the pooled clients through ``shared.dependencies.get_db``.
+"""
+from __future__ import annotations
+
+import itertools
+from typing import Callable, List, Optional
+
+from google.cloud.firestore_v1.async_client import AsyncClient
+
+
+class FirestoreClientPool:
+    """Round-robin pool of ``AsyncClient`` objects (one gRPC channel each)."""
+
+    def __init__(self, factory: Callable[[], AsyncClient], size: int = 1):
+        if size < 1:
+            raise ValueError("Firestore client pool size must be >= 1")
+        self._factory = factory
+        self._size = size
+        self._clients: List[AsyncClient] = []
+        self._cycle: Optional[itertools.cycle] = None
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self._clients)
+
+    def open(self) -> None:
+        """Create all clients of the pool. Calling it twice is a no-op."""
+        if self._clients:
+            return
+        self._clients = [self._factory() for _ in range(self._size)]
+        self._cycle = itertools.cycle(self._clients)
+        print(f"[firestore_pool] Opened Firestore client pool with {self._size} channel(s).")
+
+    def get(self) -> AsyncClient:
+        """Return the next client of the pool, opening the pool on first use."""
+        if not self._clients:
+            # Скрипты и тесты без lifespan получают пул по требованию
+            self.open()
+        return next(self._cycle)  # type: ignore[arg-type]
+
+    async def close(self) -> None:
+        """Close the gRPC channels of all pooled clients."""
+        clients, self._clients, self._cycle = self._clients, [], None
+        for client in clients:
+            await _close_client(client)
+        if clients:
+            print(f"[firestore_pool] Closed Firestore client pool ({len(clients)} channel(s)).")
+
+
+async def _close_client(client: AsyncClient) -> None:
+    """Close the transport of *client*, if its channel was ever opened."""
+    close = getattr(client, "close", None)
+    if close is not None:
+        result = close()
+        if hasattr(result, "__await__"):
+            await result
+        return
+    transport = getattr(client, "_transport", None)
+    if transport is None:
+        return
+    try:
+        await transport.close()
+    except Exception as e:
+        print(f"[firestore_pool] Error closing Firestore channel: {e}")
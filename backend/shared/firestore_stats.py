@@ -0,0 +1,111 @@
+"""Per-request accounting of Firestore operations.
+
+The ``log_requests`` middleware opens a ``FirestoreOpStats`` for every HTTP
+request and stores it in a context variable.  Repositories (and the direct
+queries in ``content_router``) wrap their Firestore calls in ``track_op``,
+which counts document reads, query result documents, writes, deletes and batch
+commits, and the time spent waiting for Firestore.  Outside a request (scripts,
+tests) ``track_op`` still works but nothing is recorded for the request;
+registered observers (``add_op_observer``) are notified either way.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+@dataclass
+class OpCounter:
+    """Counts for a single repository call, filled in by the caller."""
+
+    reads: int = 0
+    query_docs: int = 0
+    writes: int = 0
+    deletes: int = 0
+    batch_commits: int = 0
+
+
+@dataclass
+class FirestoreOpStats:
+    """Firestore operation totals for one request."""
+
+    reads: int = 0
+    query_docs: int = 0
+    writes: int = 0
+    deletes: int = 0
+    batch_commits: int = 0
+    calls: int = 0
+    elapsed_ms: float = 0.0
+    ops: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, name: str, op: OpCounter, elapsed_ms: float) -> None:
+        self.reads += op.reads
+        self.query_docs += op.query_docs
+        self.writes += op.writes
+        self.deletes += op.deletes
+        self.batch_commits += op.batch_commits
+        self.calls += 1
+        self.elapsed_ms += elapsed_ms
+        self.ops[name] = self.ops.get(name, 0) + 1
+
+    def as_log_fields(self) -> Dict[str, object]:
+        """Fields appended to the ``request_completed`` log line."""
+        return {
+            "fs_reads": self.reads,
+            "fs_query_docs": self.query_docs,
+            "fs_writes": self.writes,
+            "fs_deletes": self.deletes,
+            "fs_batch_commits": self.batch_commits,
+            "fs_calls": self.calls,
+            "fs_ms": round(self.elapsed_ms, 2),
+            "fs_ops": dict(self.ops),
+        }
+
+
+_current_stats: ContextVar[Optional[FirestoreOpStats]] = ContextVar("firestore_op_stats", default=None)
+
+
+# Наблюдатели за каждым вызовом (например, гистограммы в shared/metrics.py)
+OpObserver = Callable[[str, float], None]
+_observers: List[OpObserver] = []
+
+
+def add_op_observer(observer: OpObserver) -> None:
+    """Register ``observer(name, elapsed_seconds)`` to be called after every ``track_op``."""
+    _observers.append(observer)
+
+
+def begin_request() -> tuple[FirestoreOpStats, Token]:
+    """Start collecting stats for the current request context."""
+    stats = FirestoreOpStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token: Token) -> None:
+    _current_stats.reset(token)
+
+
+def current_stats() -> Optional[FirestoreOpStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_op(name: str) -> Iterator[OpCounter]:
+    """Time a repository call and add its counts to the current request.
+
+    ``name`` identifies the call site, e.g. ``"ProgressRepository.get_progress"``.
+    """
+    op = OpCounter()
+    start = time.perf_counter()
+    try:
+        yield op
+    finally:
+        elapsed = time.perf_counter() - start
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.add(name, op, elapsed * 1000)
+        for observer in _observers:
+            observer(name, elapsed)
@@ -0,0 +1,86 @@
+"""Bounded in-process LRU cache with expiring entries.
+
+The per-process caches (verified tokens, revocation state, active sessions,
+achievement check markers) share the same mechanics: an ``OrderedDict`` kept
+in LRU order and capped at ``max_entries``, entries that go stale, and
+hit/miss counters reported through ``stats()``.  They differ only in what an
+entry holds and when it stops being valid, which subclasses define in
+``_is_fresh``; ``TTLCache`` covers the common "valid for N seconds after
+``checked_at``" case.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded LRU map; entries rejected by ``_is_fresh`` are dropped on lookup."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[K, V]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _is_fresh(self, entry: V) -> bool:
+        return True
+
+    def get(self, key: K) -> Optional[V]:
+        """Return the entry for *key*, or None if absent or stale."""
+        entry = self._entries.get(key)
+        if entry is not None and self._is_fresh(entry):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def _store(self, key: K, entry: V) -> V:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def invalidate(self, key: K) -> None:
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TTLCache(LRUCache[K, V]):
+    """LRU cache whose entries (with a ``checked_at`` timestamp) expire after *ttl_seconds*."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10_000, clock: Callable[[], float] = time.time):
+        super().__init__(max_entries)
+        self._ttl = ttl_seconds
+        self._clock = clock
+
+    def _is_fresh(self, entry: V) -> bool:
+        return self._clock() - entry.checked_at < self._ttl
@@ -0,0 +1,731 @@
+"""In-process async stand-in for the Firestore ``AsyncClient``.
+
+Implements the subset of the async Firestore API used by the repositories and
+routers: ``collection``/``document`` paths (including subcollections such as
+``content/animals/items``), ``where`` with ``FieldFilter`` (and the positional
+form), ``order_by``/``limit``/``offset``/``start_after``, ``stream``/``get``,
+``set``/``update``/``create``/``delete`` with field transforms, ``get_all``,
+``WriteBatch``, transactions (``async_transactional``) and aggregation queries
+(``count``/``sum``/``avg``).
+
+Selected with ``FIRESTORE_BACKEND=memory`` (see ``shared.dependencies``), so the
+whole app can run in tests, load tests and benchmarks without the emulator.
+``latency_ms`` adds an artificial delay to every RPC to model network round
+trips.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import datetime
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1._helpers import ReadAfterWriteError
+from google.cloud.firestore_v1.base_aggregation import AggregationResult
+from google.cloud.firestore_v1.base_query import And, FieldFilter, Or
+from google.cloud.firestore_v1.field_path import parse_field_path
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+MAX_BATCH_WRITES = 500
+MAX_TRANSACTION_ATTEMPTS = 5
+
+_MISSING = object()
+
+
+# ---------------------------------------------------------------------------
+# Field path helpers
+# ---------------------------------------------------------------------------
+def _split_path(field_path: str) -> List[str]:
+    # Сегменты в обратных кавычках (`2025-06-01`) разбираются как в клиенте Firestore
+    return parse_field_path(field_path)
+
+
+def _get_field(data: Dict[str, Any], field_path: str) -> Any:
+    current: Any = data
+    for part in _split_path(field_path):
+        if not isinstance(current, dict) or part not in current:
+            return _MISSING
+        current = current[part]
+    return current
+
+
+def _set_field(data: Dict[str, Any], field_path: str, value: Any) -> None:
+    parts = _split_path(field_path)
+    current = data
+    for part in parts[:-1]:
+        child = current.get(part)
+        if not isinstance(child, dict):
+            child = {}
+            current[part] = child
+        current = child
+    current[parts[-1]] = value
+
+
+def _delete_field(data: Dict[str, Any], field_path: str) -> None:
+    parts = _split_path(field_path)
+    current = data
+    for part in parts[:-1]:
+        current = current.get(part)
+        if not isinstance(current, dict):
+            return
+    current.pop(parts[-1], None)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _resolve(value: Any, current: Any = _MISSING, merge_maps: bool = False) -> Any:
+    """Return the stored value for *value* written over *current*.
+
+    Resolves sentinels and field transforms; returns ``_MISSING`` for
+    ``DELETE_FIELD``.  With *merge_maps* nested dicts are merged into the
+    current map (``set(merge=True)`` semantics) instead of replacing it.
+    """
+    if value is transforms.DELETE_FIELD:
+        return _MISSING
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.datetime.now(datetime.timezone.utc)
+    if isinstance(value, transforms.Increment):
+        return (current if _is_number(current) else 0) + value.value
+    if isinstance(value, transforms.Maximum):
+        return max(current, value.value) if _is_number(current) else value.value
+    if isinstance(value, transforms.Minimum):
+        return min(current, value.value) if _is_number(current) else value.value
+    if isinstance(value, transforms.ArrayUnion):
+        items = list(current) if isinstance(current, list) else []
+        items.extend(v for v in value.values if v not in items)
+        return items
+    if isinstance(value, transforms.ArrayRemove):
+        items = list(current) if isinstance(current, list) else []
+        return [v for v in items if v not in value.values]
+    if isinstance(value, dict):
+        result = dict(current) if (merge_maps and isinstance(current, dict)) else {}
+        for key, nested in value.items():
+            resolved = _resolve(nested, result.get(key, _MISSING), merge_maps)
+            if resolved is _MISSING:
+                result.pop(key, None)
+            else:
+                result[key] = resolved
+        return result
+    return copy.deepcopy(value)
+
+
+def _apply_value(data: Dict[str, Any], field_path: str, value: Any, merge_maps: bool = False) -> None:
+    """Write *value* at the dotted *field_path* of *data*."""
+    resolved = _resolve(value, _get_field(data, field_path), merge_maps)
+    if resolved is _MISSING:
+        _delete_field(data, field_path)
+    else:
+        _set_field(data, field_path, resolved)
+
+
+_TYPE_RANK = {type(None): 0, bool: 1, int: 2, float: 2, datetime.datetime: 3, str: 4, bytes: 5}
+
+
+def _order_key(value: Any) -> Tuple[int, Any]:
+    """Sort key following Firestore's ordering of value types."""
+    rank = _TYPE_RANK.get(type(value))
+    if rank is None:
+        return (6, repr(value))
+    return (rank, 0 if value is None else value)
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+class _Store:
+    """Documents grouped by collection path: ``{collection_path: {doc_id: data}}``."""
+
+    def __init__(self) -> None:
+        self.collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.update_times: Dict[str, datetime.datetime] = {}
+        # Номер версии документа растёт при каждой записи и удалении (для транзакций)
+        self.versions: Dict[str, int] = {}
+        self._clock = 0
+
+    def _bump(self, path: str) -> None:
+        self._clock += 1
+        self.versions[path] = self._clock
+
+    def get(self, collection_path: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self.collections.get(collection_path, {}).get(doc_id)
+
+    def put(self, collection_path: str, doc_id: str, data: Dict[str, Any]) -> datetime.datetime:
+        self.collections.setdefault(collection_path, {})[doc_id] = data
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.update_times[f"{collection_path}/{doc_id}"] = now
+        self._bump(f"{collection_path}/{doc_id}")
+        return now
+
+    def delete(self, collection_path: str, doc_id: str) -> None:
+        self.collections.get(collection_path, {}).pop(doc_id, None)
+        self.update_times.pop(f"{collection_path}/{doc_id}", None)
+        self._bump(f"{collection_path}/{doc_id}")
+
+    def documents(self, collection_path: str) -> Dict[str, Dict[str, Any]]:
+        return self.collections.get(collection_path, {})
+
+
+class WriteResult:
+    def __init__(self, update_time: datetime.datetime):
+        self.update_time = update_time
+
+
+# ---------------------------------------------------------------------------
+# Snapshots and references
+# ---------------------------------------------------------------------------
+class MemoryDocumentSnapshot:
+    def __init__(self, reference: "MemoryDocumentReference", data: Optional[Dict[str, Any]], update_time=None):
+        self.reference = reference
+        self._data = data
+        self.update_time = update_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        if self._data is None:
+            raise KeyError(field_path)
+        value = _get_field(self._data, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class MemoryDocumentReference:
+    def __init__(self, client: "MemoryFirestoreClient", collection_path: str, doc_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self) -> "MemoryCollectionReference":
+        return MemoryCollectionReference(self._client, self._collection_path)
+
+    def collection(self, collection_id: str) -> "MemoryCollectionReference":
+        return MemoryCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, MemoryDocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    def _snapshot(self) -> MemoryDocumentSnapshot:
+        store = self._client._store
+        data = store.get(self._collection_path, self.id)
+        return MemoryDocumentSnapshot(self, copy.deepcopy(data) if data is not None else None,
+                                      store.update_times.get(self.path))
+
+    async def get(self, field_paths: Optional[Iterable[str]] = None, transaction: Any = None, **kwargs: Any) -> MemoryDocumentSnapshot:
+        await self._client._rpc()
+        if transaction is not None:
+            transaction._record_read(self)
+        return self._snapshot()
+
+    async def set(self, document_data: Dict[str, Any], merge: bool = False, **kwargs: Any) -> WriteResult:
+        await self._client._rpc()
+        return self._set(document_data, merge)
+
+    async def create(self, document_data: Dict[str, Any], **kwargs: Any) -> WriteResult:
+        await self._client._rpc()
+        self._check_create()
+        return self._set(document_data, merge=False)
+
+    async def update(self, field_updates: Dict[str, Any], **kwargs: Any) -> WriteResult:
+        await self._client._rpc()
+        self._check_update()
+        return self._update(field_updates)
+
+    async def delete(self, **kwargs: Any) -> WriteResult:
+        await self._client._rpc()
+        return self._delete()
+
+    def collections(self) -> AsyncIterator["MemoryCollectionReference"]:
+        prefix = f"{self.path}/"
+        client = self._client
+
+        async def _iter():
+            for path in list(client._store.collections):
+                if path.startswith(prefix) and "/" not in path[len(prefix):]:
+                    yield MemoryCollectionReference(client, path)
+        return _iter()
+
+    # --- синхронные операции, общие для документа, batch и транзакции ---
+    def _check_create(self) -> None:
+        if self._client._store.get(self._collection_path, self.id) is not None:
+            raise exceptions.AlreadyExists(f"Document already exists: {self.path}")
+
+    def _check_update(self) -> None:
+        if self._client._store.get(self._collection_path, self.id) is None:
+            raise exceptions.NotFound(f"No document to update: {self.path}")
+
+    def _set(self, document_data: Dict[str, Any], merge: bool) -> WriteResult:
+        store = self._client._store
+        existing = store.get(self._collection_path, self.id)
+        # Ключи set() — имена полей, а не пути через точку (пути разбирает только update())
+        if merge:
+            data = _resolve(document_data, existing if existing is not None else {}, merge_maps=True)
+        else:
+            data = _resolve(document_data)
+        return WriteResult(store.put(self._collection_path, self.id, data))
+
+    def _update(self, field_updates: Dict[str, Any]) -> WriteResult:
+        store = self._client._store
+        data = copy.deepcopy(store.get(self._collection_path, self.id) or {})
+        for field_path, value in field_updates.items():
+            # update() заменяет вложенный словарь целиком (в отличие от set(merge=True))
+            _apply_value(data, field_path, value)
+        return WriteResult(store.put(self._collection_path, self.id, data))
+
+    def _delete(self) -> WriteResult:
+        self._client._store.delete(self._collection_path, self.id)
+        return WriteResult(datetime.datetime.now(datetime.timezone.utc))
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+def _comparable(a: Any, b: Any) -> bool:
+    numeric = (int, float)
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool)
+    if isinstance(a, numeric) and isinstance(b, numeric):
+        return True
+    return type(a) is type(b)
+
+
+def _matches(data: Dict[str, Any], flt: Any) -> bool:
+    if isinstance(flt, And):
+        return all(_matches(data, f) for f in flt.filters)
+    if isinstance(flt, Or):
+        return any(_matches(data, f) for f in flt.filters)
+
+    value = _get_field(data, flt.field_path)
+    op, expected = flt.op_string, flt.value
+    if value is _MISSING:
+        return False
+    if op == "==":
+        return _comparable(value, expected) and value == expected
+    if op == "!=":
+        return value is not None and not (_comparable(value, expected) and value == expected)
+    if op in ("<", "<=", ">", ">="):
+        if not _comparable(value, expected) or value is None:
+            return False
+        return {"<": value < expected, "<=": value <= expected, ">": value > expected, ">=": value >= expected}[op]
+    if op == "in":
+        return any(_comparable(value, e) and value == e for e in expected)
+    if op == "not-in":
+        return value is not None and not any(_comparable(value, e) and value == e for e in expected)
+    if op == "array_contains":
+        return isinstance(value, list) and expected in value
+    if op == "array_contains_any":
+        return isinstance(value, list) and any(e in value for e in expected)
+    # Unary filters (== None / NaN) превращаются в enum-операторы
+    if expected is None:
+        return value is None
+    raise ValueError(f"Unsupported operator in memory Firestore: {op!r}")
+
+
+class MemoryQuery:
+    def __init__(
+        self,
+        client: "MemoryFirestoreClient",
+        collection_path: str,
+        filters: Tuple[Any, ...] = (),
+        orders: Tuple[Tuple[str, str], ...] = (),
+        limit: Optional[int] = None,
+        offset: int = 0,
+        start: Optional[Tuple[Dict[str, Any], bool]] = None,
+    ):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._offset = offset
+        self._start = start
+
+    def _copy(self, **changes: Any) -> "MemoryQuery":
+        params = dict(
+            filters=self._filters, orders=self._orders, limit=self._limit,
+            offset=self._offset, start=self._start,
+        )
+        params.update(changes)
+        return MemoryQuery(self._client, self._collection_path, **params)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None,
+              value: Any = None, *, filter: Any = None) -> "MemoryQuery":
+        if filter is None:
+            filter = FieldFilter(field_path, op_string, value)
+        return self._copy(filters=self._filters + (filter,))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "MemoryQuery":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "MemoryQuery":
+        return self._copy(limit=count)
+
+    def offset(self, num_to_skip: int) -> "MemoryQuery":
+        return self._copy(offset=num_to_skip)
+
+    def start_after(self, document_fields_or_snapshot: Any) -> "MemoryQuery":
+        return self._copy(start=(self._cursor_values(document_fields_or_snapshot), False))
+
+    def start_at(self, document_fields_or_snapshot: Any) -> "MemoryQuery":
+        return self._copy(start=(self._cursor_values(document_fields_or_snapshot), True))
+
+    @staticmethod
+    def _cursor_values(cursor: Any) -> Dict[str, Any]:
+        if isinstance(cursor, MemoryDocumentSnapshot):
+            values = cursor.to_dict() or {}
+            values["__name__"] = cursor.id
+            return values
+        return dict(cursor)
+
+    def _results(self) -> List[Tuple[str, Dict[str, Any]]]:
+        docs = self._client._store.documents(self._collection_path)
+        items = [(doc_id, data) for doc_id, data in docs.items()
+                 if all(_matches(data, f) for f in self._filters)]
+        # Документы без поля сортировки в выборку не попадают (как в Firestore)
+        items = [item for item in items if all(_get_field(item[1], f) is not _MISSING for f, _ in self._orders)]
+        items.sort(key=lambda item: item[0])
+        for field, direction in reversed(self._orders):
+            items.sort(key=lambda item: _order_key(_get_field(item[1], field)), reverse=direction == DESCENDING)
+
+        if self._start is not None:
+            values, inclusive = self._start
+            items = [item for item in items if self._after_cursor(item, values, inclusive)]
+        items = items[self._offset:]
+        if self._limit is not None:
+            items = items[: self._limit]
+        return items
+
+    def _after_cursor(self, item: Tuple[str, Dict[str, Any]], cursor: Dict[str, Any], inclusive: bool) -> bool:
+        doc_id, data = item
+        fields = [(f, d) for f, d in self._orders] + [("__name__", ASCENDING)]
+        for field, direction in fields:
+            value = doc_id if field == "__name__" else _get_field(data, field)
+            if field not in cursor:
+                break
+            value, boundary = _order_key(value), _order_key(cursor[field])
+            if value == boundary:
+                continue
+            greater = value > boundary
+            return greater if direction == ASCENDING else not greater
+        return inclusive
+
+    async def stream(self, transaction: Any = None, **kwargs: Any) -> AsyncIterator[MemoryDocumentSnapshot]:
+        await self._client._rpc()
+        for doc_id, data in self._results():
+            ref = MemoryDocumentReference(self._client, self._collection_path, doc_id)
+            if transaction is not None:
+                transaction._record_read(ref)
+            yield MemoryDocumentSnapshot(ref, copy.deepcopy(data),
+                                         self._client._store.update_times.get(ref.path))
+
+    async def get(self, transaction: Any = None, **kwargs: Any) -> List[MemoryDocumentSnapshot]:
+        return [doc async for doc in self.stream(transaction=transaction)]
+
+    def count(self, alias: Optional[str] = None) -> "MemoryAggregationQuery":
+        return MemoryAggregationQuery(self).count(alias)
+
+    def sum(self, field_ref: str, alias: Optional[str] = None) -> "MemoryAggregationQuery":
+        return MemoryAggregationQuery(self).sum(field_ref, alias)
+
+    def avg(self, field_ref: str, alias: Optional[str] = None) -> "MemoryAggregationQuery":
+        return MemoryAggregationQuery(self).avg(field_ref, alias)
+
+
+class MemoryAggregationQuery:
+    """Aggregations computed over the query results without returning documents."""
+
+    def __init__(self, query: MemoryQuery):
+        self._query = query
+        self._aggregations: List[Tuple[str, str, Optional[str]]] = []
+
+    def _add(self, kind: str, field_ref: Optional[str], alias: Optional[str]) -> "MemoryAggregationQuery":
+        alias = alias or f"field_{len(self._aggregations) + 1}"
+        self._aggregations.append((kind, alias, field_ref))
+        return self
+
+    def count(self, alias: Optional[str] = None) -> "MemoryAggregationQuery":
+        return self._add("count", None, alias)
+
+    def sum(self, field_ref: str, alias: Optional[str] = None) -> "MemoryAggregationQuery":
+        return self._add("sum", field_ref, alias)
+
+    def avg(self, field_ref: str, alias: Optional[str] = None) -> "MemoryAggregationQuery":
+        return self._add("avg", field_ref, alias)
+
+    def _compute(self) -> List[AggregationResult]:
+        # Документы не копируются: на сервере агрегация тоже не передаёт их клиенту
+        items = self._query._results()
+        results = []
+        for kind, alias, field_ref in self._aggregations:
+            if kind == "count":
+                results.append(AggregationResult(alias, len(items)))
+                continue
+            values = [v for _, data in items if _is_number(v := _get_field(data, field_ref))]
+            if kind == "sum":
+                results.append(AggregationResult(alias, sum(values)))
+            else:
+                results.append(AggregationResult(alias, sum(values) / len(values) if values else None))
+        return results
+
+    async def stream(self, transaction: Any = None, **kwargs: Any) -> AsyncIterator[List[AggregationResult]]:
+        await self._query._client._rpc()
+        yield self._compute()
+
+    async def get(self, transaction: Any = None, **kwargs: Any) -> List[List[AggregationResult]]:
+        return [result async for result in self.stream(transaction=transaction)]
+
+
+class MemoryCollectionReference(MemoryQuery):
+    def __init__(self, client: "MemoryFirestoreClient", collection_path: str):
+        super().__init__(client, collection_path)
+
+    @property
+    def id(self) -> str:
+        return self._collection_path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> Optional[MemoryDocumentReference]:
+        parts = self._collection_path.rsplit("/", 2)
+        if len(parts) < 3:
+            return None
+        return MemoryDocumentReference(self._client, parts[0], parts[1])
+
+    def document(self, document_id: Optional[str] = None) -> MemoryDocumentReference:
+        return MemoryDocumentReference(self._client, self._collection_path, document_id or uuid.uuid4().hex[:20])
+
+    async def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None, **kwargs: Any):
+        ref = self.document(document_id)
+        result = await ref.create(document_data)
+        return result.update_time, ref
+
+    async def list_documents(self, page_size: Optional[int] = None, **kwargs: Any) -> AsyncIterator[MemoryDocumentReference]:
+        await self._client._rpc()
+        for doc_id in list(self._client._store.documents(self._collection_path)):
+            yield MemoryDocumentReference(self._client, self._collection_path, doc_id)
+
+
+# ---------------------------------------------------------------------------
+# Batches
+# ---------------------------------------------------------------------------
+class MemoryWriteBatch:
+    """Collects writes and applies them all-or-nothing on ``commit``."""
+
+    def __init__(self, client: "MemoryFirestoreClient"):
+        self._client = client
+        self._writes: List[Tuple[str, MemoryDocumentReference, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def set(self, reference: MemoryDocumentReference, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._writes.append(("set_merge" if merge else "set", reference, copy.deepcopy(document_data)))
+
+    def create(self, reference: MemoryDocumentReference, document_data: Dict[str, Any]) -> None:
+        self._writes.append(("create", reference, copy.deepcopy(document_data)))
+
+    def update(self, reference: MemoryDocumentReference, field_updates: Dict[str, Any], **kwargs: Any) -> None:
+        self._writes.append(("update", reference, copy.deepcopy(field_updates)))
+
+    def delete(self, reference: MemoryDocumentReference, **kwargs: Any) -> None:
+        self._writes.append(("delete", reference, None))
+
+    def _apply(self) -> List[WriteResult]:
+        if len(self._writes) > MAX_BATCH_WRITES:
+            raise exceptions.InvalidArgument(f"maximum {MAX_BATCH_WRITES} writes allowed per request")
+        # Сначала проверяем предусловия всех операций, затем применяем их разом
+        exists: Dict[str, bool] = {}
+        for kind, ref, _ in self._writes:
+            present = exists.get(ref.path)
+            if present is None:
+                present = self._client._store.get(ref._collection_path, ref.id) is not None
+            if kind == "create" and present:
+                raise exceptions.AlreadyExists(f"Document already exists: {ref.path}")
+            if kind == "update" and not present:
+                raise exceptions.NotFound(f"No document to update: {ref.path}")
+            exists[ref.path] = kind != "delete"
+        results = []
+        for kind, ref, data in self._writes:
+            if kind in ("set", "create"):
+                results.append(ref._set(data, merge=False))
+            elif kind == "set_merge":
+                results.append(ref._set(data, merge=True))
+            elif kind == "update":
+                results.append(ref._update(data))
+            else:
+                results.append(ref._delete())
+        self._writes = []
+        return results
+
+    async def commit(self, **kwargs: Any) -> List[WriteResult]:
+        await self._client._rpc()
+        return self._apply()
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """Optimistic transaction compatible with ``async_transactional``.
+
+    Reads remember the version of every document they return; ``_commit``
+    raises ``Aborted`` if any of them changed since, and the decorator retries
+    the whole function.  Only documents actually returned are tracked, so a
+    query does not conflict with documents inserted into its range later.
+    """
+
+    def __init__(self, client: "MemoryFirestoreClient", max_attempts: int = MAX_TRANSACTION_ATTEMPTS,
+                 read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id: Optional[bytes] = None
+        self._read_versions: Dict[str, int] = {}
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    @property
+    def id(self) -> Optional[bytes]:
+        return self._id
+
+    def _record_read(self, reference: MemoryDocumentReference) -> None:
+        if self._writes:
+            raise ReadAfterWriteError("Attempted read after write in a transaction.")
+        self._read_versions.setdefault(reference.path, self._client._store.versions.get(reference.path, 0))
+
+    def _check_writable(self) -> None:
+        if self._read_only:
+            raise ValueError("Cannot perform write operation in read-only transaction.")
+
+    def set(self, reference: MemoryDocumentReference, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._check_writable()
+        super().set(reference, document_data, merge)
+
+    def create(self, reference: MemoryDocumentReference, document_data: Dict[str, Any]) -> None:
+        self._check_writable()
+        super().create(reference, document_data)
+
+    def update(self, reference: MemoryDocumentReference, field_updates: Dict[str, Any], **kwargs: Any) -> None:
+        self._check_writable()
+        super().update(reference, field_updates)
+
+    def delete(self, reference: MemoryDocumentReference, **kwargs: Any) -> None:
+        self._check_writable()
+        super().delete(reference)
+
+    def _clean_up(self) -> None:
+        self._writes = []
+        self._read_versions = {}
+        self._id = None
+
+    async def _begin(self, retry_id: Optional[bytes] = None) -> None:
+        if self.in_progress:
+            raise ValueError("The transaction has already begun.")
+        await self._client._rpc()
+        self._id = uuid.uuid4().bytes
+
+    async def _rollback(self) -> None:
+        if not self.in_progress:
+            raise ValueError("The transaction is not in progress.")
+        self._clean_up()
+
+    async def _commit(self) -> List[WriteResult]:
+        if not self.in_progress:
+            raise ValueError("The transaction is not in progress.")
+        await self._client._rpc()
+        versions = self._client._store.versions
+        for path, version in self._read_versions.items():
+            if versions.get(path, 0) != version:
+                self._clean_up()
+                raise exceptions.Aborted(f"Transaction conflict on {path}")
+        results = self._apply()
+        self._clean_up()
+        return results
+
+    async def get(self, ref_or_query: Any, **kwargs: Any) -> Any:
+        if isinstance(ref_or_query, MemoryDocumentReference):
+            return self._client.get_all([ref_or_query], transaction=self)
+        return ref_or_query.stream(transaction=self)
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+class MemoryFirestoreClient:
+    """Drop-in replacement for ``AsyncClient`` backed by a dict store."""
+
+    def __init__(self, project: str = "easytalk-memory", latency_ms: float = 0.0):
+        self.project = project
+        self._latency = latency_ms / 1000
+        self._store = _Store()
+        self.rpc_count = 0
+
+    async def _rpc(self) -> None:
+        self.rpc_count += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+    def collection(self, *collection_path: str) -> MemoryCollectionReference:
+        path = "/".join(collection_path)
+        if path.count("/") % 2:
+            raise ValueError(f"A collection path must have an odd number of segments: {path}")
+        return MemoryCollectionReference(self, path)
+
+    def document(self, *document_path: str) -> MemoryDocumentReference:
+        path = "/".join(document_path)
+        collection_path, _, doc_id = path.rpartition("/")
+        if not collection_path:
+            raise ValueError(f"A document path must have an even number of segments: {path}")
+        return MemoryDocumentReference(self, collection_path, doc_id)
+
+    def batch(self) -> MemoryWriteBatch:
+        return MemoryWriteBatch(self)
+
+    def transaction(self, max_attempts: int = MAX_TRANSACTION_ATTEMPTS, read_only: bool = False) -> MemoryTransaction:
+        return MemoryTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    async def get_all(self, references: Iterable[MemoryDocumentReference], field_paths: Any = None,
+                      transaction: Any = None, **kwargs: Any) -> AsyncIterator[MemoryDocumentSnapshot]:
+        await self._rpc()
+        seen = set()
+        for ref in references:
+            if ref.path in seen:
+                continue
+            seen.add(ref.path)
+            if transaction is not None:
+                transaction._record_read(ref)
+            yield ref._snapshot()
+
+    async def collections(self) -> AsyncIterator[MemoryCollectionReference]:
+        for path in list(self._store.collections):
+            if "/" not in path:
+                yield MemoryCollectionReference(self, path)
+
+    def reset(self) -> None:
+        """Drop all documents (used between tests and benchmark runs)."""
+        self._store = _Store()
+        self.rpc_count = 0
+
+    async def close(self) -> None:
+        return None
@@ -0,0 +1,200 @@
+"""Prometheus metrics for the API process.
+
+Exposed by ``routers/metrics_router.py`` at ``GET /metrics``.  Everything here
+is cheap enough for full production traffic: request and Firestore timings are
+single histogram observations, cache, executor and work-queue figures are read from their
+existing ``stats()`` counters only when ``/metrics`` is scraped, and event-loop
+lag is sampled by one background task.
+
+Route labels use the route template (``/api/content/animals/{animal_id}``),
+never the raw path, so label cardinality stays bounded.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable, Dict, Iterator, Mapping
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+from prometheus_client.registry import Collector
+from starlette.requests import Request
+
+from shared.firestore_stats import add_op_observer
+
+REQUEST_LATENCY = Histogram(
+    "easytalk_http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "easytalk_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+    ["method"],
+)
+FIRESTORE_CALL_LATENCY = Histogram(
+    "easytalk_firestore_call_duration_seconds",
+    "Latency of Firestore calls by repository method.",
+    ["op"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_LAG = Histogram(
+    "easytalk_event_loop_lag_seconds",
+    "How late the event loop woke up a sleeping task.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+EVENT_LOOP_LAG_LAST = Gauge(
+    "easytalk_event_loop_lag_last_seconds",
+    "Event loop lag measured by the latest sample.",
+)
+UNHANDLED_EXCEPTIONS = Counter(
+    "easytalk_http_unhandled_exceptions_total",
+    "Requests that ended with an unhandled exception.",
+    ["method", "route"],
+)
+
+add_op_observer(lambda name, elapsed: FIRESTORE_CALL_LATENCY.labels(name).observe(elapsed))
+
+
+def route_label(request: Request) -> str:
+    """Route template of the matched endpoint, or ``unmatched`` for 404s.
+
+    ``include_router`` copies routes with the router prefix in ``path_format``.
+    Newer FastAPI versions keep the router's own route in ``scope["route"]``
+    and the prefixed one in the effective route context, so that is preferred
+    when present.  Routes of a mounted sub-application get the mount path,
+    which Starlette keeps in ``root_path`` beyond the top-level ``app_root_path``.
+    The URL itself is never parsed, so parameter values cannot leak into labels.
+    """
+    context = request.scope.get("fastapi", {}).get("effective_route_context")
+    path_format = getattr(context, "path_format", None) or getattr(request.scope.get("route"), "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    root_path = request.scope.get("root_path", "")
+    mount_path = root_path[len(request.scope.get("app_root_path", root_path)):]
+    return mount_path + path_format
+
+
+StatsProvider = Callable[[], Mapping[str, float]]
+
+
+class CacheStatsCollector(Collector):
+    """Reports hits, misses, size and hit ratio of registered in-process caches."""
+
+    def __init__(self) -> None:
+        self._caches: Dict[str, StatsProvider] = {}
+
+    def register(self, name: str, stats: StatsProvider) -> None:
+        self._caches[name] = stats
+
+    def collect(self) -> Iterator:
+        hits = CounterMetricFamily("easytalk_cache_hits", "Cache hits.", labels=["cache"])
+        misses = CounterMetricFamily("easytalk_cache_misses", "Cache misses.", labels=["cache"])
+        size = GaugeMetricFamily("easytalk_cache_entries", "Entries currently cached.", labels=["cache"])
+        ratio = GaugeMetricFamily("easytalk_cache_hit_ratio", "Hits / lookups since start.", labels=["cache"])
+        for name, provider in self._caches.items():
+            stats = provider()
+            hits.add_metric([name], stats.get("hits", 0))
+            misses.add_metric([name], stats.get("misses", 0))
+            size.add_metric([name], stats.get("size", 0))
+            ratio.add_metric([name], stats.get("hit_ratio", 0.0))
+        yield from (hits, misses, size, ratio)
+
+
+class ExecutorStatsCollector(Collector):
+    """Queue depth and outcome counters of ``BoundedExecutor`` pools."""
+
+    def __init__(self) -> None:
+        self._executors: Dict[str, StatsProvider] = {}
+
+    def register(self, name: str, stats: StatsProvider) -> None:
+        self._executors[name] = stats
+
+    def collect(self) -> Iterator:
+        queued = GaugeMetricFamily("easytalk_executor_queued", "Calls waiting for a worker.", labels=["executor"])
+        running = GaugeMetricFamily("easytalk_executor_running", "Calls being executed.", labels=["executor"])
+        outcomes = CounterMetricFamily("easytalk_executor_calls", "Finished calls by outcome.",
+                                       labels=["executor", "outcome"])
+        for name, provider in self._executors.items():
+            stats = provider()
+            queued.add_metric([name], stats.get("queued", 0))
+            running.add_metric([name], stats.get("running", 0))
+            for outcome in ("completed", "failed", "timeouts", "rejected"):
+                outcomes.add_metric([name, outcome], stats.get(outcome, 0))
+        yield from (queued, running, outcomes)
+
+
+class QueueStatsCollector(Collector):
+    """Backlog and event counters of in-process work queues (``AchievementWorker``)."""
+
+    OUTCOMES = ("submitted", "deduplicated", "processed", "retried", "failed")
+
+    def __init__(self) -> None:
+        self._queues: Dict[str, StatsProvider] = {}
+
+    def register(self, name: str, stats: StatsProvider) -> None:
+        self._queues[name] = stats
+
+    def collect(self) -> Iterator:
+        backlog = GaugeMetricFamily("easytalk_queue_backlog", "Keys waiting to be processed.", labels=["queue"])
+        in_flight = GaugeMetricFamily("easytalk_queue_in_flight", "Keys being processed.", labels=["queue"])
+        batches = CounterMetricFamily("easytalk_queue_batches", "Processed batches.", labels=["queue"])
+        events = CounterMetricFamily("easytalk_queue_events", "Queue events by outcome.", labels=["queue", "outcome"])
+        for name, provider in self._queues.items():
+            stats = provider()
+            backlog.add_metric([name], stats.get("backlog", 0))
+            in_flight.add_metric([name], stats.get("in_flight", 0))
+            batches.add_metric([name], stats.get("batches", 0))
+            for outcome in self.OUTCOMES:
+                events.add_metric([name, outcome], stats.get(outcome, 0))
+        yield from (backlog, in_flight, batches, events)
+
+
+cache_collector = CacheStatsCollector()
+executor_collector = ExecutorStatsCollector()
+queue_collector = QueueStatsCollector()
+REGISTRY.register(cache_collector)
+REGISTRY.register(executor_collector)
+REGISTRY.register(queue_collector)
+
+
+def _register_builtin_sources() -> None:
+    from services.achievement_worker import achievement_worker
+    from services.live_sessions import live_sessions
+    from shared.achievement_check_cache import achievement_check_cache
+    from shared.active_session_cache import active_session_cache
+    from shared.blocking_executor import auth_executor
+    from shared.catalog_cache import achievement_catalog_cache
+    from shared.token_cache import revocation_cache, token_cache
+
+    cache_collector.register("auth_token", token_cache.stats)
+    cache_collector.register("auth_revocation", revocation_cache.stats)
+    cache_collector.register("achievement_check", achievement_check_cache.stats)
+    cache_collector.register("achievement_catalog", achievement_catalog_cache.stats)
+    cache_collector.register("active_session", active_session_cache.stats)
+    executor_collector.register(auth_executor.name, auth_executor.stats)
+    queue_collector.register("achievements", achievement_worker.stats)
+    queue_collector.register("live_sessions", live_sessions.stats)
+
+
+_register_builtin_sources()
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """Sample event-loop lag every ``interval`` seconds until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Serialized metrics and their content type for the ``/metrics`` response."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def observe_request(method: str, route: str, status: int, started: float) -> None:
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(time.perf_counter() - started)
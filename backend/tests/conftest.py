@@ -1,5 +1,12 @@
 # tests/conftest.py
 import os
+
+# По умолчанию тесты работают с Firestore в памяти процесса (shared/memory_firestore.py).
+# Для прогона на эмуляторе: FIRESTORE_BACKEND=firestore pytest
+# Переменная должна быть установлена до импорта shared.config.
+os.environ.setdefault("FIRESTORE_BACKEND", "memory")
+USE_MEMORY_FIRESTORE = os.environ["FIRESTORE_BACKEND"] == "memory"
+
 import pytest
 import pytest_asyncio
 # Импортируем новые функции из нашего firebase_client
@@ -53,9 +60,22 @@ def firestore_client_for_testing() -> GoogleFirestoreClient:
     return client
 
 @pytest.fixture(scope="function")
-def clean_firestore(firestore_client_for_testing: GoogleFirestoreClient):
+def memory_firestore():
+    """Общий для процесса Firestore в памяти (тот же, что отдаёт get_db), очищенный перед тестом."""
+    from shared.dependencies import get_memory_client
+    client = get_memory_client()
+    client.reset()
+    yield client
+    client.reset()
+
+@pytest.fixture(scope="function")
+def clean_firestore(request):
     print("[CONTEST_DEBUG] ENTERING clean_firestore fixture (setup)")
     """Очищаем коллекции перед тестом и после."""
+    if USE_MEMORY_FIRESTORE:
+        yield request.getfixturevalue("memory_firestore")
+        return
+    firestore_client_for_testing = request.getfixturevalue("firestore_client_for_testing")
     for collection_name in ["users","sessions","progress","achievements"]:
         for doc in firestore_client_for_testing.collection(collection_name).stream():
             doc.reference.delete()
@@ -146,7 +166,11 @@ def test_client_overridden_db(clean_firestore, mock_firestore_client, request):
 # Отдельный асинхронный клиент для тестов, требующих AsyncClient (репозиторий достижений)
 @pytest_asyncio.fixture(scope="function")
 async def async_firestore_client():
-    """Возвращает AsyncClient, настроенный на эмулятор"""
+    """Возвращает AsyncClient, настроенный на эмулятор (или Firestore в памяти)"""
+    if USE_MEMORY_FIRESTORE:
+        from shared.memory_firestore import MemoryFirestoreClient
+        yield MemoryFirestoreClient()
+        return
     from google.auth.credentials import AnonymousCredentials
     client = AsyncClient(project=_EMULATOR_PROJECT_ID, credentials=AnonymousCredentials())
     yield client
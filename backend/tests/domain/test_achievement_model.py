@@ -61,7 +61,7 @@ class TestAchievementModel:
             AchievementModel(
                 achievement_id="ach123",
                 user_id="user123",
-                type="invalid_type",  # Неверный тип
+                type="",  # Пустой ID определения каталога
                 earned_at=datetime.now()
             )
         
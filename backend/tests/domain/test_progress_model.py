@@ -1,9 +1,9 @@
 # tests/domain/test_progress_model.py
 import pytest
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from pydantic import ValidationError
 
-from domain.progress import ProgressRecord
+from domain.progress import ProgressRecord, UserProgressStats
 
 
 class TestProgressModel:
@@ -151,3 +151,108 @@ class TestProgressModel:
             time_spent=60
         )
         assert progress.success_rate == 0
+
+
+class TestUserProgressStats:
+    """Тесты для агрегата прогресса пользователя"""
+
+    @staticmethod
+    def _record(day: date, score: int) -> ProgressRecord:
+        return ProgressRecord(user_id="user123", date=day, score=score,
+                              correct_answers=1, total_answers=2, time_spent=10.0)
+
+    def test_apply_replaces_same_day(self):
+        """Повторная запись за день заменяет прежнюю, а не добавляется"""
+        day = date(2025, 6, 6)
+        stats = UserProgressStats(user_id="user123", window_days=7)
+        stats.apply(self._record(day, 10))
+        stats.apply(self._record(day, 30), previous=self._record(day, 10))
+
+        assert stats.total_score == 30
+        assert stats.total_answers == 2
+        assert stats.daily_scores == {"2025-06-06": 30}
+        assert stats.last_active_date == day
+
+    def test_window_pruning(self):
+        """Дни старше окна удаляются из daily_scores, но остаются в итогах"""
+        start = date(2025, 6, 1)
+        stats = UserProgressStats.from_records(
+            "user123", [self._record(start + timedelta(days=i), 10) for i in range(10)], window_days=7)
+
+        assert stats.total_score == 100
+        assert stats.total_answers == 20
+        assert len(stats.daily_scores) == 7
+        assert stats.window_start == date(2025, 6, 4)
+        assert stats.covers(date(2025, 6, 4))
+        assert not stats.covers(date(2025, 6, 3))
+        assert stats.score_since(date(2025, 6, 8)) == 30
+
+    def test_backdated_record_outside_window(self):
+        """Запись задним числом за пределами окна учитывается только в итогах"""
+        stats = UserProgressStats(user_id="user123", window_days=7)
+        stats.apply(self._record(date(2025, 6, 30), 10))
+        stats.apply(self._record(date(2025, 6, 1), 5))
+
+        assert stats.total_score == 15
+        assert stats.last_active_date == date(2025, 6, 30)
+        assert stats.daily_scores == {"2025-06-30": 10}
+
+    def test_streaks(self):
+        """Серия растёт на следующий день, повтор дня её не меняет, пропуск сбрасывает"""
+        start = date(2025, 6, 1)
+        stats = UserProgressStats(user_id="user123", window_days=7)
+        for offset in (0, 1, 1, 2, 5, 6):
+            stats.apply(self._record(start + timedelta(days=offset), 10))
+
+        assert stats.current_streak == 2
+        assert stats.streak_start == date(2025, 6, 6)
+        assert stats.longest_streak == 3
+        assert stats.longest_streak_start == start
+
+    def test_backdated_day_joins_streaks(self):
+        """День задним числом, закрывающий пропуск, объединяет серии"""
+        start = date(2025, 6, 1)
+        stats = UserProgressStats(user_id="user123", window_days=31)
+        for offset in (0, 1, 3, 4, 5):
+            stats.apply(self._record(start + timedelta(days=offset), 10))
+        assert stats.current_streak == 3
+
+        stats.apply(self._record(start + timedelta(days=2), 10))
+
+        assert stats.current_streak == 6
+        assert stats.streak_start == start
+        assert stats.longest_streak == 6
+        assert stats.last_active_date == date(2025, 6, 6)
+
+    def test_streak_initialized_for_existing_stats(self):
+        """Агрегат без полей серий: серия восстанавливается по daily_scores"""
+        stats = UserProgressStats.model_validate({
+            "user_id": "user123", "window_days": 7, "last_active_date": "2025-06-05",
+            "daily_scores": {"2025-06-01": 10, "2025-06-03": 5, "2025-06-04": 5, "2025-06-05": 5},
+        })
+
+        assert stats.current_streak == 3
+        assert stats.streak_start == date(2025, 6, 3)
+        assert stats.longest_streak == 3
+
+    def test_add_accumulates_same_day(self):
+        """Накопительная запись прибавляет очки дня и не меняет серию"""
+        day = date(2025, 6, 6)
+        stats = UserProgressStats(user_id="user123", window_days=7)
+        stats.add(self._record(day, 10))
+        stats.add(self._record(day, 5))
+
+        assert stats.total_score == 15
+        assert stats.total_answers == 4
+        assert stats.daily_scores == {"2025-06-06": 15}
+        assert stats.current_streak == 1
+
+    def test_combined_with(self):
+        """Сумма двух записей за день"""
+        day = date(2025, 6, 6)
+        combined = self._record(day, 10).combined_with(self._record(day, 5))
+
+        assert combined.score == 15
+        assert combined.correct_answers == 2
+        assert combined.total_answers == 4
+        assert combined.time_spent == 20.0
@@ -4,7 +4,7 @@ import pytest
 from datetime import date, datetime, timezone, timedelta
 import uuid
 from google.cloud.firestore_v1.base_query import FieldFilter
-from domain.achievement import AchievementModel, AchievementType
+from domain.achievement import AchievementModel, AchievementType, achievement_doc_id
 from repositories.achievement_repository import AchievementRepository
 
 
@@ -57,7 +57,7 @@ class TestAchievementRepository:
 
         achievement_data = doc.to_dict()
         assert achievement_data["user_id"] == sample_perfect_streak.user_id
-        assert achievement_data["type"] == sample_perfect_streak.type.value
+        assert achievement_data["type"] == sample_perfect_streak.type
         assert isinstance(achievement_data["earned_at"], str) 
         assert achievement_data["session_id"] == sample_perfect_streak.session_id
         print("[DEBUG] test_create_achievement: Тест завершен успешно")
@@ -75,7 +75,7 @@ class TestAchievementRepository:
         # Проверяем, что данные корректны
         achievement_data = doc.to_dict()
         assert achievement_data["user_id"] == sample_weekly_fifty.user_id
-        assert achievement_data["type"] == sample_weekly_fifty.type.value
+        assert achievement_data["type"] == sample_weekly_fifty.type
         assert isinstance(achievement_data["earned_at"], str)  # Дата сериализована в строку
         assert achievement_data["period_start_date"] == sample_weekly_fifty.period_start_date.isoformat()
 
@@ -109,15 +109,70 @@ class TestAchievementRepository:
         assert AchievementType.PERFECT_STREAK in achievement_types
         assert AchievementType.WEEKLY_FIFTY in achievement_types
         
+    @pytest.mark.asyncio
+    async def test_create_achievements(self, achievement_repository, sample_perfect_streak, sample_weekly_fifty, clean_firestore_async):
+        """Несколько достижений сохраняются одним batch"""
+        await achievement_repository.create_achievements([sample_perfect_streak, sample_weekly_fifty])
+        await achievement_repository.create_achievements([])
+
+        for achievement in (sample_perfect_streak, sample_weekly_fifty):
+            doc = await clean_firestore_async.collection("achievements").document(achievement.achievement_id).get()
+            assert doc.exists
+        achievements = await achievement_repository.get_user_achievements("test_user_123")
+        assert {a.type for a in achievements} == {AchievementType.PERFECT_STREAK, AchievementType.WEEKLY_FIFTY}
+
+    @pytest.mark.asyncio
+    async def test_create_if_absent(self, achievement_repository, clean_firestore_async):
+        """Повторная выдача достижения с тем же ID не перезаписывает документ"""
+        user_id = "test_user_321"
+        first = AchievementModel(
+            achievement_id=achievement_doc_id(user_id, AchievementType.TOTAL_SCORE_50),
+            user_id=user_id, type=AchievementType.TOTAL_SCORE_50, earned_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
+        )
+        second = first.model_copy(update={"earned_at": datetime(2025, 6, 2, tzinfo=timezone.utc)})
+        streak = AchievementModel(
+            achievement_id=achievement_doc_id(user_id, AchievementType.STREAK_7_DAYS),
+            user_id=user_id, type=AchievementType.STREAK_7_DAYS, earned_at=datetime.now(timezone.utc),
+        )
+
+        assert await achievement_repository.create_achievement(first) is True
+        assert await achievement_repository.create_achievement(second) is False
+        # Batch, в котором часть документов уже есть, создаёт только недостающие
+        assert await achievement_repository.create_achievements([second, streak]) == 1
+
+        doc = await clean_firestore_async.collection("achievements").document(first.achievement_id).get()
+        assert doc.to_dict()["earned_at"].startswith("2025-06-01")
+        assert await achievement_repository.exists_achievement(user_id, AchievementType.STREAK_7_DAYS)
+        assert await achievement_repository.get_existing_ids(
+            [first.achievement_id, streak.achievement_id, f"{user_id}_total_score_500"]
+        ) == {first.achievement_id, streak.achievement_id}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_awards_idempotent(self, achievement_repository, clean_firestore_async):
+        """Параллельные выдачи одного достижения создают один документ"""
+        import asyncio
+        user_id = "test_user_654"
+        achievement = AchievementModel(
+            achievement_id=achievement_doc_id(user_id, AchievementType.TOTAL_SCORE_100),
+            user_id=user_id, type=AchievementType.TOTAL_SCORE_100, earned_at=datetime.now(timezone.utc),
+        )
+
+        results = await asyncio.gather(*(achievement_repository.create_achievements([achievement]) for _ in range(5)))
+
+        assert sum(results) == 1
+        assert len(await achievement_repository.get_user_achievements(user_id)) == 1
+
     @pytest.mark.asyncio
     async def test_exists_weekly_achievement(self, achievement_repository, sample_weekly_fifty, clean_firestore_async):
         """Тест проверки существования еженедельного достижения"""
         user_id = "test_user_789"
         period_start = date.today() - timedelta(days=date.today().weekday())
         
-        # Создаем достижение с конкретным периодом
+        # Создаем достижение с конкретным периодом (ID — пользователь, тип и период)
         sample_weekly_fifty.user_id = user_id
         sample_weekly_fifty.period_start_date = period_start
+        sample_weekly_fifty.achievement_id = achievement_doc_id(
+            user_id, AchievementType.WEEKLY_FIFTY, period_start.isoformat())
         
         # Сохраняем достижение в БД
         await clean_firestore_async.collection("achievements").document(sample_weekly_fifty.achievement_id).set(
@@ -172,3 +227,40 @@ class TestAchievementRepository:
         docs_stream_after = query.stream()
         docs_after = [doc async for doc in docs_stream_after]
         assert len(docs_after) == 0
+
+    @pytest.mark.asyncio
+    async def test_get_catalog_from_process_cache(self, clean_firestore_async):
+        """С общим кэшем каталог не читается из Firestore в запросе"""
+        from shared.catalog_cache import CatalogCache
+        from shared.firestore_stats import begin_request, end_request
+        catalog_cache = CatalogCache(max_age=300)
+        catalog_cache.set([{"id": "weekly_fifty", "name": "Weekly Fifty"}])
+        repository = AchievementRepository(db=clean_firestore_async, catalog_cache=catalog_cache)
+
+        fs_stats, token = begin_request()
+        try:
+            catalog = await repository.get_catalog()
+        finally:
+            end_request(token)
+        assert catalog == [{"id": "weekly_fifty", "name": "Weekly Fifty"}]
+        assert fs_stats.query_docs == 0
+
+    @pytest.mark.asyncio
+    async def test_seeding_bumps_catalog_version(self, clean_firestore_async):
+        """Каждая запись сидера увеличивает версию каталога, повторный запуск без изменений — нет"""
+        from scripts.seed_achievements import seed_catalog_if_empty
+        db = clean_firestore_async
+        async for doc in db.collection("achievement_catalog").stream():
+            await doc.reference.delete()
+        await db.collection("maintenance").document("achievement_catalog").delete()
+        repository = AchievementRepository(db=db)
+        assert await repository.get_catalog_version() is None
+
+        await seed_catalog_if_empty(db)
+        assert await repository.get_catalog_version() == 1
+        await seed_catalog_if_empty(db)
+        assert await repository.get_catalog_version() == 1
+
+        await db.collection("achievement_catalog").document("weekly_fifty").delete()
+        await seed_catalog_if_empty(db)
+        assert await repository.get_catalog_version() == 2
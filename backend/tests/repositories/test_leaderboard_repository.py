@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+import pytest
+
+from domain.progress import ProgressRecord
+from repositories.leaderboard_repository import LeaderboardRepository
+from repositories.progress_repository import ProgressRepository
+
+DAY = date(2025, 6, 30)
+
+
+class TestLeaderboardRepository:
+    """Тесты для сохранений недельного рейтинга"""
+
+    @pytest.fixture
+    def leaderboard_repository(self, clean_firestore_async):
+        return LeaderboardRepository(db=clean_firestore_async)
+
+    @pytest.mark.asyncio
+    async def test_save_and_load_days(self, leaderboard_repository):
+        """Записи дня раскладываются по шардам и дописываются через merge"""
+        users = {f"u{i}": {"score": i, "level": "beginner"} for i in range(1, 21)}
+        await leaderboard_repository.save_days({DAY: users})
+        await leaderboard_repository.save_days({DAY: {"u1": {"score": 100}}})
+
+        loaded = await leaderboard_repository.load_days([DAY, DAY - timedelta(days=1)])
+        assert list(loaded) == [DAY]
+        assert len(loaded[DAY]) == 20
+        assert loaded[DAY]["u1"] == {"score": 100, "level": "beginner"}
+        assert loaded[DAY]["u2"] == {"score": 2, "level": "beginner"}
+
+    @pytest.mark.asyncio
+    async def test_delete_days(self, leaderboard_repository):
+        """Сохранения выпавших из окна дней удаляются"""
+        await leaderboard_repository.save_days({DAY: {"u1": {"score": 1}}})
+        await leaderboard_repository.delete_days([DAY])
+        assert await leaderboard_repository.load_days([DAY]) == {}
+
+    @pytest.mark.asyncio
+    async def test_scan_progress(self, leaderboard_repository, clean_firestore_async):
+        """Первое построение рейтинга читает progress только за окно"""
+        progress_repository = ProgressRepository(db=clean_firestore_async)
+        for offset, score in ((0, 10), (3, 20), (10, 30)):
+            await progress_repository.record_daily_score(ProgressRecord(
+                user_id="u1", date=DAY - timedelta(days=offset), score=score,
+                correct_answers=1, total_answers=1, time_spent=1.0))
+
+        rows = await leaderboard_repository.scan_progress(DAY - timedelta(days=6))
+        assert sorted(rows) == [("u1", DAY - timedelta(days=3), 20), ("u1", DAY, 10)]
@@ -5,6 +5,7 @@ from datetime import date, datetime, timedelta
 from unittest.mock import MagicMock, AsyncMock
 from domain.progress import ProgressRecord
 from repositories.progress_repository import ProgressRepository
+from google.cloud.firestore_v1.base_aggregation import AggregationResult
 
 
 class TestProgressRepository:
@@ -51,65 +52,39 @@ class TestProgressRepository:
 
     @pytest.mark.asyncio
     async def test_sum_scores_for_week(self, progress_repository, monkeypatch):
-        """Тест суммирования очков за неделю с использованием моков"""
+        """Тест суммирования очков за неделю агрегацией Firestore (с использованием моков)"""
         user_id = "test_user_456"
         end_date = date.today()
-        start_date = end_date - timedelta(days=6)  # Текущий день + 6 дней ранее = 7 дней
-        
-        # Создаем данные для моков
-        mock_scores = []
-        for days_ago in range(7):
-            current_date = end_date - timedelta(days=days_ago)
-            score = days_ago + 4  # Скоры: 4, 5, 6, 7, 8, 9, 10
-            
-            # Создаем запись для моделирования
-            mock_scores.append({
-                "user_id": user_id,
-                "date": current_date.isoformat(),
-                "score": score,
-                "correct_answers": 5,
-                "total_answers": 10,
-                "time_spent": 60.0
-            })
-        
+        scores = [days_ago + 4 for days_ago in range(7)]  # Скоры: 4, 5, 6, 7, 8, 9, 10
+
         # Создаем и настраиваем моки для Firestore
         collection_mock = MagicMock(name="collection_mock")
         where1_mock = MagicMock(name="where1_mock")
         where2_mock = MagicMock(name="where2_mock")
-        query_mock = MagicMock(name="query_mock")
-        stream_mock = AsyncMock(name="stream_mock")
-        
+
         # Связывание цепочки вызовов
         monkeypatch.setattr(progress_repository, "_collection", collection_mock)
         collection_mock.where.return_value = where1_mock
         where1_mock.where.return_value = where2_mock
-        where2_mock.stream = stream_mock
-        
-        # Создаем моки документов
-        doc_mocks = []
-        for record in mock_scores:
-            doc_mock = MagicMock()
-            doc_mock.to_dict.return_value = record
-            doc_mocks.append(doc_mock)
-        
-        # Сделаем синхронный генератор документов
-        async def mock_documents_generator():
-            for doc in doc_mocks:
-                yield doc
-                
-        # Изменяем stream на функцию, возвращающую async-генератор, как в real Firestore
-        where2_mock.stream = mock_documents_generator
-        
+
+        # Агрегация выполняется на сервере: документы клиенту не передаются
+        aggregation_mock = where2_mock.sum.return_value.count.return_value
+        aggregation_mock.get = AsyncMock(return_value=[[
+            AggregationResult("total_score", sum(scores)),
+            AggregationResult("days", len(scores)),
+        ]])
+        where2_mock.stream = MagicMock(side_effect=AssertionError("документы не должны читаться"))
+
         # Вызываем тестируемый метод
         # Преобразуем дату в объект datetime, как того ожидает метод
         end_datetime = datetime.combine(end_date, datetime.min.time())
         total = await progress_repository.sum_scores_for_week(user_id, end_datetime)
-        
+
         # Проверяем сумму: 4 + 5 + 6 + 7 + 8 + 9 + 10 = 49
         expected_total = sum(range(4, 11))
         assert total == expected_total
+        where2_mock.sum.assert_called_once_with("score", alias="total_score")
 
-        
     @pytest.mark.asyncio
     async def test_get_progress(self, progress_repository, monkeypatch):
         """Тест получения записей прогресса за указанный период с использованием моков"""
@@ -215,3 +190,249 @@ class TestProgressRepository:
             assert record.total_answers == expected.total_answers
             assert record.time_spent == expected.time_spent
             assert abs(record.success_rate - (record.correct_answers / record.total_answers)) < 0.001
+
+    @pytest.mark.asyncio
+    async def test_record_daily_score_updates_user_stats(self, progress_repository, sample_progress_record):
+        """Запись прогресса обновляет агрегат user_stats, повторная запись за день заменяет очки"""
+        await progress_repository.record_daily_score(sample_progress_record)
+        await progress_repository.record_daily_score(sample_progress_record.model_copy(update={"score": 25}))
+        next_day = sample_progress_record.model_copy(update={"date": sample_progress_record.date + timedelta(days=1)})
+        await progress_repository.record_daily_score(next_day)
+
+        stats = await progress_repository.get_user_stats(sample_progress_record.user_id)
+        assert stats.total_score == 35
+        assert stats.last_active_date == next_day.date
+        assert stats.daily_scores == {"2025-06-06": 25, "2025-06-07": 10}
+        assert await progress_repository.sum_total_score(sample_progress_record.user_id) == 35
+
+    @pytest.mark.asyncio
+    async def test_user_stats_backfilled_from_history(self, progress_repository, clean_firestore_async):
+        """Если агрегата нет, он строится по уже сохранённой истории"""
+        user_id = "test_user_backfill"
+        today = date.today()
+        for days_ago in range(1, 4):
+            day = today - timedelta(days=days_ago)
+            await clean_firestore_async.collection("progress").document(f"{user_id}_{day.isoformat()}").set({
+                "user_id": user_id, "date": day.isoformat(), "score": 10,
+                "correct_answers": 1, "total_answers": 1, "time_spent": 5.0,
+            })
+        assert await progress_repository.get_user_stats(user_id) is None
+        # Без агрегата суммы считаются по истории
+        assert await progress_repository.sum_total_score(user_id) == 30
+
+        await progress_repository.record_daily_score(ProgressRecord(
+            user_id=user_id, date=today, score=5, correct_answers=1, total_answers=1, time_spent=5.0))
+
+        stats = await progress_repository.get_user_stats(user_id)
+        assert stats.total_score == 35
+        assert stats.total_answers == 4
+        week_ago = datetime.combine(today - timedelta(days=2), datetime.min.time())
+        assert await progress_repository.sum_scores_for_week(user_id, week_ago) == 25
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_keep_stats_consistent(self):
+        """Параллельные записи одного пользователя не теряют обновлений агрегата"""
+        import asyncio
+        from shared.memory_firestore import MemoryFirestoreClient
+        # Задержка RPC нужна, чтобы транзакции действительно пересекались
+        progress_repository = ProgressRepository(db=MemoryFirestoreClient(latency_ms=1))
+        user_id = "test_user_concurrent"
+        start = date(2025, 6, 1)
+        await asyncio.gather(*(
+            progress_repository.record_daily_score(ProgressRecord(
+                user_id=user_id, date=start + timedelta(days=i), score=i,
+                correct_answers=0, total_answers=0, time_spent=0.0))
+            for i in range(5)
+        ))
+        stats = await progress_repository.get_user_stats(user_id)
+        assert stats.total_score == sum(range(5))
+        assert len(stats.daily_scores) == 5
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("sum_source", ["stats", "aggregate", "scan"])
+    async def test_sum_sources_agree(self, clean_firestore_async, sum_source):
+        """Все источники сумм очков дают одинаковый результат"""
+        user_id = f"test_user_sum_{sum_source}"
+        writer = ProgressRepository(db=clean_firestore_async)
+        today = date.today()
+        for days_ago in range(10):
+            await writer.record_daily_score(ProgressRecord(
+                user_id=user_id, date=today - timedelta(days=days_ago), score=days_ago + 1,
+                correct_answers=1, total_answers=1, time_spent=5.0))
+
+        repo = ProgressRepository(db=clean_firestore_async, sum_source=sum_source)
+        week_ago = datetime.combine(today - timedelta(days=6), datetime.min.time())
+        assert await repo.sum_total_score(user_id) == sum(range(1, 11))
+        assert await repo.sum_scores_for_week(user_id, week_ago) == sum(range(1, 8))
+
+    @pytest.mark.asyncio
+    async def test_record_daily_scores(self, progress_repository, sample_progress_record, clean_firestore_async):
+        """Несколько дней пишутся одним commit вместе с агрегатом"""
+        user_id = sample_progress_record.user_id
+        await progress_repository.record_daily_score(sample_progress_record)
+        records = [
+            sample_progress_record.model_copy(update={"date": sample_progress_record.date + timedelta(days=i), "score": 5})
+            for i in range(3)
+        ]
+        await progress_repository.record_daily_scores(user_id, records)
+
+        stats = await progress_repository.get_user_stats(user_id)
+        # Первый день перезаписан (10 -> 5), добавлены ещё два
+        assert stats.total_score == 15
+        assert stats.total_answers == 30
+        doc = await clean_firestore_async.collection("progress").document(f"{user_id}_2025-06-08").get()
+        assert doc.to_dict()["score"] == 5
+
+        with pytest.raises(ValueError):
+            await progress_repository.record_daily_scores(user_id, records * 200)
+
+    @pytest.mark.asyncio
+    async def test_accumulate_daily_score(self, progress_repository, sample_progress_record, clean_firestore_async):
+        """Накопительная запись прибавляет результаты игр за день, а не заменяет их"""
+        from shared.firestore_stats import begin_request, end_request
+        user_id = sample_progress_record.user_id
+        # Первая запись создаёт агрегат (по истории), последующие читают только его
+        await progress_repository.accumulate_daily_score(sample_progress_record)
+        fs_stats, token = begin_request()
+        try:
+            for _ in range(2):
+                await progress_repository.accumulate_daily_score(sample_progress_record)
+        finally:
+            end_request(token)
+        # Документ дня не читается: по одному чтению user_stats на запись
+        assert fs_stats.reads == 2
+        assert fs_stats.query_docs == 0
+        assert fs_stats.writes == 4
+
+        doc = await clean_firestore_async.collection("progress").document(f"{user_id}_2025-06-06").get()
+        data = doc.to_dict()
+        assert data["score"] == 30
+        assert data["correct_answers"] == 21
+        assert data["total_answers"] == 30
+        assert data["time_spent"] == pytest.approx(361.5)
+        assert "success_rate" not in data
+        records = await progress_repository.get_progress(user_id, "2025-06-06", "2025-06-06")
+        assert records[0].success_rate == pytest.approx(0.7)
+
+        # Обычная запись за день после накопительной по-прежнему заменяет итог
+        await progress_repository.record_daily_score(sample_progress_record)
+        stats = await progress_repository.get_user_stats(user_id)
+        assert stats.total_score == 10
+        assert stats.daily_scores == {"2025-06-06": 10}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_accumulate_keeps_day_totals(self):
+        """Параллельные накопительные записи с разных устройств не теряются"""
+        import asyncio
+        from shared.memory_firestore import MemoryFirestoreClient
+        progress_repository = ProgressRepository(db=MemoryFirestoreClient(latency_ms=1))
+        user_id = "test_user_accumulate"
+        day = date(2025, 6, 1)
+        games = [
+            ProgressRecord(user_id=user_id, date=day + timedelta(days=i % 2), score=i,
+                           correct_answers=1, total_answers=1, time_spent=1.0)
+            for i in range(10)
+        ]
+        await asyncio.gather(*(progress_repository.accumulate_daily_score(game) for game in games))
+
+        records = await progress_repository.get_progress(user_id, "2025-06-01", "2025-06-02")
+        assert {r.date: (r.score, r.total_answers) for r in records} == {
+            day: (0 + 2 + 4 + 6 + 8, 5), day + timedelta(days=1): (1 + 3 + 5 + 7 + 9, 5)}
+        stats = await progress_repository.get_user_stats(user_id)
+        assert stats.total_score == sum(range(10))
+        assert stats.total_answers == 10
+        assert stats.last_active_date == day + timedelta(days=1)
+        assert stats.daily_scores == {"2025-06-01": 20, "2025-06-02": 25}
+
+    @pytest.mark.asyncio
+    async def test_accumulate_prunes_daily_scores(self, progress_repository, monkeypatch):
+        """Дни, выпавшие из окна, удаляются из daily_scores без чтения агрегата"""
+        from shared import config
+        monkeypatch.setattr(config, "PROGRESS_STATS_WINDOW_DAYS", 3)
+        user_id = "test_user_accumulate_window"
+        start = date(2025, 6, 1)
+        for i in range(5):
+            await progress_repository.accumulate_daily_score(ProgressRecord(
+                user_id=user_id, date=start + timedelta(days=i), score=1,
+                correct_answers=0, total_answers=0, time_spent=0.0))
+
+        stats = await progress_repository.get_user_stats(user_id)
+        assert stats.total_score == 5
+        assert sorted(stats.daily_scores) == ["2025-06-03", "2025-06-04", "2025-06-05"]
+        assert stats.score_since(date(2025, 6, 3)) == 3
+
+    @pytest.mark.asyncio
+    async def test_monthly_docs_long_range(self, clean_firestore_async):
+        """Год истории читается помесячными документами: 12-13 чтений вместо 365"""
+        from shared.firestore_stats import begin_request, end_request
+        repo = ProgressRepository(db=clean_firestore_async, monthly_docs=True)
+        user_id = "test_user_monthly"
+        start = date(2024, 6, 1)
+        records = [
+            ProgressRecord(user_id=user_id, date=start + timedelta(days=i), score=i % 7,
+                           correct_answers=1, total_answers=2, time_spent=10.0)
+            for i in range(365)
+        ]
+        for chunk in range(0, len(records), 100):
+            await repo.record_daily_scores(user_id, records[chunk:chunk + 100])
+        await repo.accumulate_daily_score(records[-1])
+
+        fs_stats, token = begin_request()
+        try:
+            result = await repo.get_progress(user_id, "2024-06-01", "2025-05-31")
+        finally:
+            end_request(token)
+
+        assert fs_stats.query_docs == 0
+        assert fs_stats.reads == 13  # user_stats + 12 месяцев
+        assert len(result) == 365
+        assert [r.date for r in result] == [r.date for r in records]
+        assert result[-1].score == 2 * records[-1].score
+        assert result[-1].total_answers == 4
+        # Помесячные документы совпадают с обычной выборкой по дням
+        by_day = await ProgressRepository(db=clean_firestore_async, monthly_docs=False).get_progress(
+            user_id, "2025-05-01", "2025-05-31")
+        monthly = await repo.get_progress(user_id, "2025-05-01", "2025-05-31")
+        assert sorted((r.date, r.score, r.time_spent) for r in by_day) == [
+            (r.date, r.score, r.time_spent) for r in monthly]
+
+    @pytest.mark.asyncio
+    async def test_monthly_docs_backfilled_from_history(self, progress_repository, clean_firestore_async):
+        """История, записанная без помесячных документов, переносится при первом чтении"""
+        user_id = "test_user_monthly_backfill"
+        for day in (date(2025, 5, 30), date(2025, 6, 2)):
+            await progress_repository.record_daily_score(ProgressRecord(
+                user_id=user_id, date=day, score=5, correct_answers=1, total_answers=1, time_spent=5.0))
+        repo = ProgressRepository(db=clean_firestore_async, monthly_docs=True)
+
+        result = await repo.get_progress(user_id, "2025-05-01", "2025-06-30")
+
+        assert [(r.date, r.score) for r in result] == [(date(2025, 5, 30), 5), (date(2025, 6, 2), 5)]
+        assert (await repo.get_user_stats(user_id)).monthly_docs
+        doc = await clean_firestore_async.collection("progress_months").document(f"{user_id}_2025-06").get()
+        assert doc.to_dict()["score"] == {"02": 5}
+
+    @pytest.mark.asyncio
+    async def test_streak_counters(self, progress_repository):
+        """Серии дней обновляются в агрегате при каждой записи, в обоих режимах"""
+        user_id = "test_user_streak"
+        start = date(2025, 6, 1)
+        for offset in range(3):
+            await progress_repository.record_daily_score(ProgressRecord(
+                user_id=user_id, date=start + timedelta(days=offset), score=1,
+                correct_answers=0, total_answers=0, time_spent=0.0))
+        await progress_repository.accumulate_daily_score(ProgressRecord(
+            user_id=user_id, date=start + timedelta(days=3), score=1,
+            correct_answers=0, total_answers=0, time_spent=0.0))
+        await progress_repository.record_daily_scores(user_id, [
+            ProgressRecord(user_id=user_id, date=start + timedelta(days=offset), score=1,
+                           correct_answers=0, total_answers=0, time_spent=0.0)
+            for offset in (10, 9)
+        ])
+
+        stats = await progress_repository.get_user_stats(user_id)
+        assert stats.current_streak == 2
+        assert stats.streak_start == start + timedelta(days=9)
+        assert stats.longest_streak == 4
+        assert stats.longest_streak_start == start
+        assert stats.last_active_date == start + timedelta(days=10)
@@ -1,6 +1,7 @@
 # backend/tests/repositories/test_session_repository.py
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from domain.achievement import AchievementModel, AchievementType, achievement_doc_id
 from domain.session import SessionModel, RoundDetail, SessionStatus
 from repositories.session_repository import SessionRepository
 from unittest.mock import AsyncMock, MagicMock
@@ -70,7 +71,22 @@ class TestSessionRepository:
             assert session_data["end_time"] is None
         assert "score" not in session_data
         assert "details" not in session_data
-    
+
+        # Сессия сразу становится активной сессией пользователя
+        pointer = await clean_firestore_async.collection("active_sessions").document(sample_session.user_id).get()
+        assert pointer.to_dict()["session_id"] == sample_session.session_id
+
+    @pytest.mark.asyncio
+    async def test_get_active_session(self, session_repository, sample_session):
+        """Активная сессия читается по указателю пользователя"""
+        assert await session_repository.get_active_session(sample_session.user_id) is None
+        await session_repository.create_session(sample_session)
+
+        active = await session_repository.get_active_session(sample_session.user_id)
+        assert active.session_id == sample_session.session_id
+        assert active.status == SessionStatus.ACTIVE
+        assert active.game_type == sample_session.game_type
+
     @pytest.mark.asyncio
     async def test_get_session(self, session_repository, sample_session, clean_firestore_async):
         """Тест получения сессии по ID"""
@@ -97,37 +113,120 @@ class TestSessionRepository:
         assert session is None
     
     @pytest.mark.asyncio
-    async def test_update_session(self, session_repository, sample_session, sample_round_details, clean_firestore_async):
-        """Тест обновления сессии с деталями раундов"""
-        # Создаем сессию для теста
-        data = sample_session.model_dump(mode="json", exclude={"session_id", "end_time", "score", "details"})
-        await clean_firestore_async.collection("sessions").document(sample_session.session_id).set(data)
-        
-        # Обновляем сессию с деталями
-        end_time = datetime.now()
-        score = 10
-        await session_repository.update_session(
-            sample_session.session_id,
-            sample_round_details,
-            end_time,
-            score
+    async def test_finish_session(self, session_repository, sample_session, sample_round_details, clean_firestore_async):
+        """Сессия, указатель, достижения и счётчики пишутся одним commit"""
+        from shared.firestore_stats import begin_request, end_request
+        await session_repository.create_session(sample_session)
+        user_id, session_id = sample_session.user_id, sample_session.session_id
+        achievement = AchievementModel(
+            achievement_id=achievement_doc_id(user_id, AchievementType.PERFECT_STREAK, session_id),
+            user_id=user_id,
+            type=AchievementType.PERFECT_STREAK,
+            earned_at=datetime.now(),
+            session_id=session_id,
         )
-        
-        # Получаем обновленную сессию из БД
-        doc = await clean_firestore_async.collection("sessions").document(sample_session.session_id).get()
-        assert doc.exists
-        
-        # Проверяем, что данные обновлены корректно
-        session_data = doc.to_dict()
-        assert session_data["user_id"] == sample_session.user_id
-        assert session_data["game_type"] == sample_session.game_type
-        assert isinstance(session_data["start_time"], str)  # При сериализации с mode="json" дата сериализуется в строку
-        assert isinstance(session_data["ended_at"], str)  # Дата сериализована в ISO строку
-        assert session_data["score"] == score
-        
-        # Проверяем детали раундов
-        assert "details" in session_data
-        assert len(session_data["details"]) == len(sample_round_details)
-        assert session_data["details"][0]["question_id"] == sample_round_details[0].question_id
-        assert session_data["details"][0]["is_correct"] == sample_round_details[0].is_correct
-        assert session_data["details"][1]["answer"] == sample_round_details[1].answer
+
+        fs_stats, token = begin_request()
+        try:
+            cleared = await session_repository.finish_session(
+                session_id, user_id, sample_round_details, datetime.now(), 10, [achievement])
+        finally:
+            end_request(token)
+        assert cleared
+        assert fs_stats.batch_commits == 1
+
+        session_data = (await clean_firestore_async.collection("sessions").document(session_id).get()).to_dict()
+        assert session_data["status"] == SessionStatus.FINISHED.value
+        assert session_data["score"] == 10
+        assert len(session_data["details"]) == 2
+        assert await session_repository.get_active_session(user_id) is None
+        assert (await clean_firestore_async.collection("achievements").document(achievement.achievement_id).get()).exists
+        stats = (await clean_firestore_async.collection("session_stats").document(user_id).get()).to_dict()
+        assert stats["sessions_finished"] == 1
+        assert stats["rounds_played"] == 2
+        assert stats["correct_answers"] == 1
+
+        # Повторное завершение ничего не пишет
+        assert not await session_repository.finish_session(
+            session_id, user_id, sample_round_details, datetime.now(), 10, [])
+        stats = (await clean_firestore_async.collection("session_stats").document(user_id).get()).to_dict()
+        assert stats["sessions_finished"] == 1
+
+    @pytest.mark.asyncio
+    async def test_finish_session_not_found(self, session_repository, sample_session, sample_round_details):
+        """Чужая или несуществующая сессия не завершается"""
+        await session_repository.create_session(sample_session)
+        with pytest.raises(ValueError):
+            await session_repository.finish_session("missing", sample_session.user_id, sample_round_details,
+                                                     datetime.now(), 10, [])
+        with pytest.raises(ValueError):
+            await session_repository.finish_session(sample_session.session_id, "other_user", sample_round_details,
+                                                    datetime.now(), 10, [])
+        assert await session_repository.get_active_session(sample_session.user_id) is not None
+
+    @staticmethod
+    def _session(session_id, user_id, hours_ago):
+        return SessionModel(session_id=session_id, user_id=user_id, game_type="guess_animal",
+                            start_time=datetime.now(timezone.utc) - timedelta(hours=hours_ago),
+                            status=SessionStatus.ACTIVE)
+
+    @pytest.mark.asyncio
+    async def test_abandon_sessions_page(self, session_repository, clean_firestore_async):
+        """Старые активные сессии помечаются abandoned постранично, состояние прохода — в том же commit"""
+        from services.session_sweeper import _cutoff
+        from shared.firestore_stats import begin_request, end_request
+        for index in range(3):
+            await session_repository.create_session(self._session(f"old_{index}", f"user_{index}", 5 - index))
+        await session_repository.create_session(self._session("fresh", "user_fresh", 0))
+        # Указатель user_0 уже на другой (свежей) сессии — его не трогаем
+        await session_repository.create_session(self._session("new_0", "user_0", 0))
+        cutoff = _cutoff(3600)
+
+        fs_stats, token = begin_request()
+        try:
+            count = await session_repository.abandon_sessions_page(cutoff, 2)
+        finally:
+            end_request(token)
+        assert count == 2
+        assert fs_stats.batch_commits == 1
+        checkpoint = await session_repository.get_sweep_checkpoint()
+        assert checkpoint["cutoff"] == cutoff and checkpoint["in_progress"]
+
+        assert await session_repository.abandon_sessions_page(cutoff, 2) == 1
+        assert await session_repository.abandon_sessions_page(cutoff, 2) == 0
+        await session_repository.complete_sweep(cutoff)
+        assert not (await session_repository.get_sweep_checkpoint())["in_progress"]
+
+        for session_id in ("old_0", "old_1", "old_2"):
+            session = await session_repository.get_session(session_id)
+            assert session.status == SessionStatus.ABANDONED
+        assert (await session_repository.get_session("fresh")).status == SessionStatus.ACTIVE
+        assert (await session_repository.get_active_session("user_0")).session_id == "new_0"
+        assert await session_repository.get_active_session("user_1") is None
+        assert await session_repository.get_active_session("user_fresh") is not None
+
+    @pytest.mark.asyncio
+    async def test_finish_abandoned_session(self, session_repository, sample_round_details):
+        """Брошенную сессию ещё можно завершить, если игра прислала результат"""
+        from services.session_sweeper import _cutoff
+        await session_repository.create_session(self._session("old", "user_1", 5))
+        await session_repository.abandon_sessions_page(_cutoff(3600), 10)
+
+        await session_repository.finish_session("old", "user_1", sample_round_details, datetime.now(), 10, [])
+        assert (await session_repository.get_session("old")).status == SessionStatus.FINISHED
+
+    @pytest.mark.asyncio
+    async def test_abandon_sessions_same_start_time(self, session_repository):
+        """Сессии с одинаковым start_time на границе страницы не пропускаются"""
+        from services.session_sweeper import _cutoff
+        start_time = datetime.now(timezone.utc) - timedelta(hours=5)
+        for index in range(3):
+            await session_repository.create_session(SessionModel(
+                session_id=f"tied_{index}", user_id=f"user_{index}", game_type="guess_animal",
+                start_time=start_time, status=SessionStatus.ACTIVE))
+        cutoff = _cutoff(3600)
+
+        assert await session_repository.abandon_sessions_page(cutoff, 2) == 2
+        assert await session_repository.abandon_sessions_page(cutoff, 2) == 1
+        for index in range(3):
+            assert (await session_repository.get_session(f"tied_{index}")).status == SessionStatus.ABANDONED
@@ -0,0 +1,46 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.leaderboard_service import LeaderboardService
+from shared.auth import get_current_user_id
+from shared.dependencies import get_leaderboard_service
+
+TEST_USER_ID = "test_user_leaderboard_router"
+
+
+@pytest.fixture
+def client_with_auth_override(client: TestClient):
+    """Переопределяет зависимость get_current_user_id для тестового клиента."""
+    app.dependency_overrides[get_current_user_id] = lambda: TEST_USER_ID
+    yield client
+    app.dependency_overrides.clear()
+
+
+def test_get_leaderboard(client_with_auth_override: TestClient):
+    """GET /api/leaderboard передаёт уровень и limit в сервис"""
+    mock_service = MagicMock(spec=LeaderboardService)
+    mock_service.get_weekly = AsyncMock(return_value={
+        "period": "week",
+        "level": "beginner",
+        "since": "2025-06-24",
+        "entries": [{"rank": 1, "user_id": "u1", "display_name": "Ann", "score": 70}],
+        "me": None,
+    })
+    app.dependency_overrides[get_leaderboard_service] = lambda: mock_service
+
+    response = client_with_auth_override.get("/api/leaderboard?period=week&level=beginner&limit=5")
+
+    assert response.status_code == 200
+    assert response.json()["entries"][0]["score"] == 70
+    mock_service.get_weekly.assert_awaited_once_with(TEST_USER_ID, level="beginner", limit=5)
+
+
+def test_get_leaderboard_invalid_params(client_with_auth_override: TestClient):
+    """Неизвестный период и слишком большой limit отклоняются"""
+    app.dependency_overrides[get_leaderboard_service] = lambda: MagicMock(spec=LeaderboardService)
+
+    assert client_with_auth_override.get("/api/leaderboard?period=month").status_code == 422
+    assert client_with_auth_override.get("/api/leaderboard?limit=1000").status_code == 422
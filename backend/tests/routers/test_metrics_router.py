@@ -0,0 +1,56 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.progress_service import ProgressService
+from shared.auth import get_current_user_id
+from shared.dependencies import get_progress_service
+
+TEST_USER_ID = "test_user_metrics_router"
+
+
+@pytest.fixture
+def client_with_auth_override(client: TestClient):
+    """Переопределяет зависимость get_current_user_id для тестового клиента."""
+    app.dependency_overrides[get_current_user_id] = lambda: TEST_USER_ID
+    yield client
+    app.dependency_overrides.clear()
+
+
+def _sample(text: str, prefix: str) -> float:
+    """Значение первой строки метрики, начинающейся с prefix"""
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_exposition(client_with_auth_override: TestClient):
+    """GET /metrics отдаёт метрики в формате Prometheus без авторизации"""
+    app.dependency_overrides.pop(get_current_user_id)
+    response = client_with_auth_override.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "easytalk_http_requests_in_flight" in response.text
+    assert 'easytalk_cache_hit_ratio{cache="auth_token"}' in response.text
+    assert 'easytalk_executor_queued{executor="firebase-auth"}' in response.text
+
+
+def test_request_latency_uses_route_template(client_with_auth_override: TestClient):
+    """Метка route — шаблон маршрута, а не конкретный путь"""
+    mock_service = MagicMock(spec=ProgressService)
+    mock_service.get_progress = AsyncMock(return_value={"data": []})
+    app.dependency_overrides[get_progress_service] = lambda: mock_service
+    series = 'easytalk_http_request_duration_seconds_count{method="GET",route="/api/progress",status="200"}'
+
+    before = _sample(client_with_auth_override.get("/metrics").text, series)
+    assert client_with_auth_override.get("/api/progress", params={"days": 7}).status_code == 200
+    client_with_auth_override.get("/api/content/animals/some-animal-id")
+    after = client_with_auth_override.get("/metrics").text
+
+    assert _sample(after, series) == before + 1
+    assert 'route="/api/content/animals/{animal_id}"' in after
+    assert 'route="/api/content/animals/some-animal-id"' not in after
@@ -122,7 +122,7 @@ async def test_update_profile_success_full_update_existing_user(client_with_auth
     }
     original_user = UserModel(**original_user_data)
     mock_repo.get_user = AsyncMock(return_value=original_user)
-    mock_repo.create_or_update_user = AsyncMock()
+    mock_repo.update_user = AsyncMock()
 
     client_with_auth_override.app.dependency_overrides[get_user_repository] = lambda: mock_repo
 
@@ -146,8 +146,8 @@ async def test_update_profile_success_full_update_existing_user(client_with_auth
 
     mock_repo.get_user.assert_called_once_with(TEST_USER_ID)
     
-    assert mock_repo.create_or_update_user.call_count == 1
-    called_with_user = mock_repo.create_or_update_user.call_args[0][0]
+    assert mock_repo.update_user.call_count == 1
+    called_with_user = mock_repo.update_user.call_args[0][0]
     assert isinstance(called_with_user, UserModel)
     assert called_with_user.uid == TEST_USER_ID
     assert called_with_user.email == update_payload["email"]
@@ -173,7 +173,7 @@ async def test_update_profile_success_partial_update_existing_user(client_with_a
     }
     original_user = UserModel(**original_user_data)
     mock_repo.get_user = AsyncMock(return_value=original_user)
-    mock_repo.create_or_update_user = AsyncMock()
+    mock_repo.update_user = AsyncMock()
 
     client_with_auth_override.app.dependency_overrides[get_user_repository] = lambda: mock_repo
 
@@ -195,7 +195,7 @@ async def test_update_profile_success_partial_update_existing_user(client_with_a
 
     mock_repo.get_user.assert_called_once_with(TEST_USER_ID)
     
-    called_with_user = mock_repo.create_or_update_user.call_args[0][0]
+    called_with_user = mock_repo.update_user.call_args[0][0]
     assert isinstance(called_with_user, UserModel)
     assert called_with_user.uid == TEST_USER_ID
     assert called_with_user.email == original_user.email
@@ -211,7 +211,7 @@ async def test_update_profile_success_new_user(client_with_auth_override: TestCl
     """Тест успешного обновления (создания) профиля для нового пользователя PUT /api/profile"""
     mock_repo = MagicMock(spec=UserRepository)
     mock_repo.get_user = AsyncMock(return_value=None)
-    mock_repo.create_or_update_user = AsyncMock()
+    mock_repo.create_user = AsyncMock()
 
     client_with_auth_override.app.dependency_overrides[get_user_repository] = lambda: mock_repo
 
@@ -235,7 +235,7 @@ async def test_update_profile_success_new_user(client_with_auth_override: TestCl
 
     mock_repo.get_user.assert_called_once_with(TEST_USER_ID)
     
-    called_with_user = mock_repo.create_or_update_user.call_args[0][0]
+    called_with_user = mock_repo.create_user.call_args[0][0]
     assert isinstance(called_with_user, UserModel)
     assert called_with_user.uid == TEST_USER_ID
     assert called_with_user.email == update_payload["email"]
@@ -301,7 +301,7 @@ async def test_update_profile_get_user_exception(client_with_auth_override: Test
     mock_repo = MagicMock(spec=UserRepository)
     error_message = "Get user DB error"
     mock_repo.get_user = AsyncMock(side_effect=RuntimeError(error_message))
-    mock_repo.create_or_update_user = AsyncMock()
+    mock_repo.create_user = AsyncMock()
 
     client_with_auth_override.app.dependency_overrides[get_user_repository] = lambda: mock_repo
 
@@ -315,13 +315,13 @@ async def test_update_profile_get_user_exception(client_with_auth_override: Test
     assert f"Failed to update profile: {error_message}" == response_json["detail"]
     
     mock_repo.get_user.assert_called_once_with(TEST_USER_ID)
-    mock_repo.create_or_update_user.assert_not_called()
+    mock_repo.create_user.assert_not_called()
     client_with_auth_override.app.dependency_overrides.pop(get_user_repository, None)
 
 
 @pytest.mark.asyncio
-async def test_update_profile_create_or_update_user_exception(client_with_auth_override: TestClient):
-    """Тест обновления профиля, когда user_repository.create_or_update_user вызывает исключение"""
+async def test_update_profile_update_user_exception(client_with_auth_override: TestClient):
+    """Тест обновления профиля, когда user_repository.update_user вызывает исключение"""
     mock_repo = MagicMock(spec=UserRepository)
     original_user_data = {
         "uid": TEST_USER_ID, "email": "test@example.com", "created_at": datetime.now(timezone.utc)
@@ -329,7 +329,7 @@ async def test_update_profile_create_or_update_user_exception(client_with_auth_o
     mock_repo.get_user = AsyncMock(return_value=UserModel(**original_user_data))
     
     error_message = "Create/Update user DB error"
-    mock_repo.create_or_update_user = AsyncMock(side_effect=RuntimeError(error_message))
+    mock_repo.update_user = AsyncMock(side_effect=RuntimeError(error_message))
 
     client_with_auth_override.app.dependency_overrides[get_user_repository] = lambda: mock_repo
 
@@ -343,5 +343,28 @@ async def test_update_profile_create_or_update_user_exception(client_with_auth_o
     assert f"Failed to update profile: {error_message}" == response_json["detail"]
 
     mock_repo.get_user.assert_called_once_with(TEST_USER_ID)
-    mock_repo.create_or_update_user.assert_called_once()
+    mock_repo.update_user.assert_called_once()
     client_with_auth_override.app.dependency_overrides.pop(get_user_repository, None)
+
+
+@pytest.mark.asyncio
+async def test_update_profile_level_moves_leaderboard(client_with_auth_override: TestClient):
+    """Смена уровня в PUT /api/profile переносит игрока в рейтинг нового уровня"""
+    from services.leaderboard import WeeklyLeaderboard
+    from shared.dependencies import get_leaderboard
+
+    mock_repo = MagicMock(spec=UserRepository)
+    mock_repo.get_user = AsyncMock(return_value=UserModel(
+        uid=TEST_USER_ID, email="test@example.com", display_name="Player", level="beginner",
+        created_at=datetime.now(timezone.utc)))
+    mock_repo.update_user = AsyncMock()
+    leaderboard = MagicMock(spec=WeeklyLeaderboard)
+    client_with_auth_override.app.dependency_overrides[get_user_repository] = lambda: mock_repo
+    client_with_auth_override.app.dependency_overrides[get_leaderboard] = lambda: leaderboard
+
+    response = client_with_auth_override.put("/api/profile", json={"level": "intermediate"})
+
+    assert response.status_code == 200
+    assert response.json()["level"] == "intermediate"
+    mock_repo.update_user.assert_awaited_once()
+    leaderboard.update_profile.assert_called_once_with(TEST_USER_ID, "intermediate", "Player")
@@ -7,6 +7,7 @@ from main import app
 from shared.auth import get_current_user_id
 from shared.dependencies import get_progress_service
 from services.progress_service import ProgressService
+from shared import config
 
 TEST_USER_ID = "test_user_progress_router"
 
@@ -161,7 +162,7 @@ def test_get_progress_success(client_with_auth_override: TestClient):
     response_json = response.json()
     assert response_json == expected_api_response
     
-    mock_service.get_progress.assert_called_once_with(TEST_USER_ID, 7)
+    mock_service.get_progress.assert_called_once_with(TEST_USER_ID, 7, "day")
 
     client_with_auth_override.app.dependency_overrides.pop(get_progress_service, None)
 
@@ -178,13 +179,38 @@ def test_get_progress_invalid_days_param(client_with_auth_override: TestClient):
     assert "detail" in response_json
     assert any("days" in err["loc"] and "query" in err["loc"] for err in response_json["detail"] if "type" in err and "greater_than_equal" in err["type"])
 
-    # Случай 2: days > 30
-    response = client_with_auth_override.get("/api/progress?days=31")
+    # Случай 2: days > PROGRESS_MAX_DAYS
+    response = client_with_auth_override.get(f"/api/progress?days={config.PROGRESS_MAX_DAYS + 1}")
     assert response.status_code == 422
     response_json = response.json()
     assert "detail" in response_json
     assert any("days" in err["loc"] and "query" in err["loc"] for err in response_json["detail"] if "type" in err and "less_than_equal" in err["type"])
 
+    # Случай 3: неизвестная детализация
+    response = client_with_auth_override.get("/api/progress?days=7&resolution=year")
+    assert response.status_code == 422
+
+
+def test_get_progress_long_range_downsampled(client_with_auth_override: TestClient):
+    """
+    Тест выборки за год с детализацией по месяцам GET /api/progress?days=365&resolution=month
+    """
+    mock_service = MagicMock(spec=ProgressService)
+    mock_service.get_progress = AsyncMock(return_value={
+        "data": [{"date": "2025-05-01", "score": 300, "success_rate": 0.5,
+                  "correct_answers": 50, "total_answers": 100, "time_spent": 600.0}],
+        "total_score": 300, "average_score": 10.0, "success_rate": 0.5,
+    })
+    client_with_auth_override.app.dependency_overrides[get_progress_service] = lambda: mock_service
+
+    response = client_with_auth_override.get("/api/progress?days=365&resolution=month")
+
+    assert response.status_code == 200
+    assert response.json()["data"][0]["daily_score"] == 300
+    mock_service.get_progress.assert_called_once_with(TEST_USER_ID, 365, "month")
+
+    client_with_auth_override.app.dependency_overrides.pop(get_progress_service, None)
+
 
 def test_get_weekly_summary_success(client_with_auth_override: TestClient):
     """
@@ -314,3 +340,66 @@ def test_get_weekly_summary_service_exception(client_with_auth_override: TestCli
     mock_service.get_weekly_summary.assert_called_once()
 
     client_with_auth_override.app.dependency_overrides.pop(get_progress_service, None)
+
+
+def test_save_progress_batch(client_with_auth_override: TestClient):
+    """
+    Тест пакетного сохранения прогресса POST /api/progress/batch
+    """
+    mock_service = MagicMock(spec=ProgressService)
+    mock_service.record_progress_batch = AsyncMock(return_value=[
+        {"index": 0, "date": "2024-01-14", "status": "saved", "progress_id": f"{TEST_USER_ID}_2024-01-14", "error": None},
+        {"index": 1, "date": "bad", "status": "error", "progress_id": None, "error": "invalid date"},
+    ])
+    client_with_auth_override.app.dependency_overrides[get_progress_service] = lambda: mock_service
+
+    items = [
+        {"score": 10, "correct_answers": 1, "total_answers": 2, "time_spent": 5.0, "date": "2024-01-14"},
+        {"score": 10, "correct_answers": 1, "total_answers": 2, "time_spent": 5.0, "date": "bad"},
+    ]
+    response = client_with_auth_override.post("/api/progress/batch", json={"items": items})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["saved"] == 1
+    assert body["failed"] == 1
+    assert body["results"][0]["progress_id"] == f"{TEST_USER_ID}_2024-01-14"
+    assert body["results"][1]["status"] == "error"
+    mock_service.record_progress_batch.assert_called_once_with(user_id=TEST_USER_ID, items=items)
+
+    client_with_auth_override.app.dependency_overrides.pop(get_progress_service, None)
+
+
+def test_save_progress_batch_empty(client_with_auth_override: TestClient):
+    """
+    Пустая пачка отклоняется валидацией
+    """
+    response = client_with_auth_override.post("/api/progress/batch", json={"items": []})
+    assert response.status_code == 422
+
+
+def test_get_progress_analytics(client_with_auth_override: TestClient):
+    """
+    Тест получения аналитики прогресса GET /api/progress/analytics
+    """
+    from services.progress_analytics import compute_analytics
+
+    start = datetime.date(2025, 6, 1)
+    mock_service = MagicMock(spec=ProgressService)
+    mock_service.get_analytics = AsyncMock(return_value=compute_analytics([], start, start + datetime.timedelta(days=13)))
+    client_with_auth_override.app.dependency_overrides[get_progress_service] = lambda: mock_service
+
+    response = client_with_auth_override.get("/api/progress/analytics?days=14&window=3")
+
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["days_played"] == 0
+    assert len(response_json["series"]["dates"]) == 14
+    assert response_json["series"]["accuracy"][0] is None
+    mock_service.get_analytics.assert_called_once_with(TEST_USER_ID, 14, 3)
+
+    # Период длиннее PROGRESS_ANALYTICS_MAX_DAYS отклоняется
+    response = client_with_auth_override.get(f"/api/progress/analytics?days={config.PROGRESS_ANALYTICS_MAX_DAYS + 1}")
+    assert response.status_code == 422
+
+    client_with_auth_override.app.dependency_overrides.pop(get_progress_service, None)
@@ -124,10 +124,10 @@ async def test_finish_session_success(client_with_auth_override: TestClient):
     assert response.status_code == 200
     assert response.json() == {"message": "Session finished successfully"}
     mock_service.finish_session.assert_called_once_with(
-        TEST_USER_ID,
-        session_id_to_finish,
-        [RoundDetail(question_id="q1_id", answer="a1", is_correct=True, time_spent=5.5)],
-        request_data["score"]
+        session_id=session_id_to_finish,
+        user_id=TEST_USER_ID,
+        details=[RoundDetail(question_id="q1_id", answer="a1", is_correct=True, time_spent=5.5)],
+        score=request_data["score"]
     )
     client_with_auth_override.app.dependency_overrides.pop(get_session_service, None)
 
@@ -268,3 +268,85 @@ async def test_get_active_session_service_exception(client_with_auth_override: T
     assert f"Failed to get active session: {error_message}" in response_json["detail"]
     mock_service.get_active_session.assert_called_once_with(TEST_USER_ID)
     client_with_auth_override.app.dependency_overrides.pop(get_session_service, None)
+
+
+# --- Тесты для WebSocket /api/session/ws ---
+
+@pytest.fixture
+def ws_client(client: TestClient):
+    """Клиент с заглушками проверки токена, сервиса сессий и отдельным хранилищем раундов."""
+    from services.auth_service import AuthService
+    from services.live_sessions import LiveSessionStore
+    from shared.dependencies import get_live_sessions
+
+    auth_service = MagicMock(spec=AuthService)
+    auth_service.verify_token = AsyncMock(return_value=TEST_USER_ID)
+    session_service = MagicMock(spec=SessionService)
+    session_service.get_active_session = AsyncMock(return_value=SessionModel(
+        session_id="ws_session", user_id=TEST_USER_ID, game_type="guess_animal",
+        start_time=datetime.now(timezone.utc), status=SessionStatus.ACTIVE))
+    session_service.finish_session = AsyncMock(return_value=None)
+    store = LiveSessionStore()
+    client.app.dependency_overrides[AuthService] = lambda: auth_service
+    client.app.dependency_overrides[get_session_service] = lambda: session_service
+    client.app.dependency_overrides[get_live_sessions] = lambda: store
+    yield client, session_service, store
+    client.app.dependency_overrides.clear()
+
+
+def _round(question_id: str, is_correct: bool = True) -> dict:
+    return {"question_id": question_id, "answer": "a", "is_correct": is_correct, "time_spent": 1.0}
+
+
+def test_session_websocket_rounds_and_finish(ws_client):
+    """Раунды приходят по одному и пишутся одним finish_session при завершении"""
+    client, session_service, store = ws_client
+    with client.websocket_connect("/api/session/ws?session_id=ws_session") as ws:
+        ws.send_json({"type": "auth", "token": "token"})
+        assert ws.receive_json() == {"type": "ready", "session_id": "ws_session", "rounds": 0}
+        ws.send_json({"type": "round", "round": _round("q1"), "score": 1})
+        assert ws.receive_json() == {"type": "ack", "rounds": 1}
+        ws.send_json({"type": "round", "round": {"question_id": "q2"}})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "round", "round": _round("q2", False), "score": 1})
+        assert ws.receive_json() == {"type": "ack", "rounds": 2}
+        session_service.finish_session.assert_not_awaited()
+
+        ws.send_json({"type": "finish", "score": 5})
+        assert ws.receive_json() == {"type": "finished", "rounds": 2}
+
+    session_service.finish_session.assert_awaited_once()
+    kwargs = session_service.finish_session.await_args.kwargs
+    assert kwargs["session_id"] == "ws_session"
+    assert kwargs["user_id"] == TEST_USER_ID
+    assert [detail.question_id for detail in kwargs["details"]] == ["q1", "q2"]
+    assert kwargs["score"] == 5
+    assert len(store) == 0
+
+
+def test_session_websocket_resume(ws_client):
+    """После отключения раунды остаются в памяти, переподключение их продолжает"""
+    client, session_service, store = ws_client
+    with client.websocket_connect("/api/session/ws?session_id=ws_session") as ws:
+        ws.send_json({"type": "auth", "token": "token"})
+        ws.receive_json()
+        ws.send_json({"type": "round", "round": _round("q1")})
+        ws.receive_json()
+
+    assert len(store) == 1
+    session_service.finish_session.assert_not_awaited()
+    with client.websocket_connect("/api/session/ws?session_id=ws_session") as ws:
+        ws.send_json({"type": "auth", "token": "token"})
+        assert ws.receive_json()["rounds"] == 1
+
+
+def test_session_websocket_foreign_session(ws_client):
+    """К чужой или неактивной сессии подключиться нельзя"""
+    from starlette.websockets import WebSocketDisconnect
+    client, session_service, store = ws_client
+    with client.websocket_connect("/api/session/ws?session_id=other_session") as ws:
+        ws.send_json({"type": "auth", "token": "token"})
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_json()
+    assert exc_info.value.code == 1008
+    assert len(store) == 0
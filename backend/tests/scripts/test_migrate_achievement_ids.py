@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scripts.migrate_achievement_ids import migrate
+from shared.memory_firestore import MemoryFirestoreClient
+
+
+class TestMigrateAchievementIds:
+    """Тесты переноса достижений на детерминированные ID"""
+
+    @pytest.mark.asyncio
+    async def test_commits_stay_under_write_limit(self):
+        """Группа дубликатов больше commit делится, остальные не переполняют commit"""
+        db = MemoryFirestoreClient()
+        achievements = db.collection("achievements")
+        earned_at = datetime(2025, 6, 1, tzinfo=timezone.utc)
+        for i in range(7):
+            await achievements.document(f"old_total_{i}").set({
+                "achievement_id": f"old_total_{i}", "user_id": "u1", "type": "total_score_50",
+                "earned_at": (earned_at + timedelta(days=i)).isoformat(),
+            })
+        for user_id in ("u2", "u3"):
+            await achievements.document(f"old_{user_id}").set({
+                "achievement_id": f"old_{user_id}", "user_id": user_id, "type": "total_score_100",
+                "earned_at": earned_at.isoformat(),
+            })
+
+        commits = []
+        make_batch = db.batch
+
+        def recording_batch():
+            batch = make_batch()
+            commit = batch.commit
+
+            async def recorded_commit(**kwargs):
+                commits.append(len(batch))
+                return await commit(**kwargs)
+
+            batch.commit = recorded_commit
+            return batch
+
+        db.batch = recording_batch
+
+        assert await migrate(db, writes_per_commit=3) == (3, 6)
+        assert commits and max(commits) <= 3
+        assert sum(commits) == 3 + 9
+
+        docs = {doc.id: doc.to_dict() async for doc in achievements.stream()}
+        assert set(docs) == {"u1_total_score_50", "u2_total_score_100", "u3_total_score_100"}
+        assert docs["u1_total_score_50"]["earned_at"] == earned_at.isoformat()
+        assert await migrate(db, writes_per_commit=3) == (0, 0)
@@ -0,0 +1,131 @@
+from datetime import date, timedelta
+
+import pytest
+
+from domain.achievement import AchievementType, achievement_doc_id
+from domain.achievement_catalog import DEFAULT_CATALOG
+from domain.progress import UserProgressStats
+from domain.session import RoundDetail
+from services.achievement_rules import (
+    AchievementRules,
+    MetricsSnapshot,
+    compile_rule,
+    compile_rules,
+    evaluate,
+    progress_snapshot,
+    session_snapshot,
+)
+
+TODAY = date(2025, 6, 30)
+
+
+def _earned(ach_type, period=None):
+    return achievement_doc_id("u1", ach_type, period)
+
+
+class TestCompileRules:
+    """Тесты компиляции правил из каталога"""
+
+    def test_default_catalog_compiles(self):
+        """Каждое определение каталога по умолчанию — правило"""
+        rules = compile_rules(DEFAULT_CATALOG)
+        assert {rule.type for rule in rules} == {AchievementType(item["id"]) for item in DEFAULT_CATALOG}
+
+    def test_catalog_overrides_and_legacy_fields(self):
+        """Поля каталога важнее значений по умолчанию; старые определения без правила дополняются"""
+        custom = compile_rule({"id": "total_score_500", "metric": "score", "comparator": ">", "threshold": 200})
+        assert custom.threshold == 200
+        assert custom.passes(MetricsSnapshot(values={("score", None): 201}))
+        assert not custom.passes(MetricsSnapshot(values={("score", None): 200}))
+
+        legacy = compile_rule({"id": "weekly_fifty", "name": "50 очков за неделю", "threshold": 50})
+        assert (legacy.metric, legacy.window) == ("score", 7)
+
+    def test_new_catalog_id_compiles(self):
+        """Новое определение каталога — правило без значения AchievementType"""
+        rule = compile_rule({"id": "total_score_1000", "metric": "score", "threshold": 1000})
+        assert rule.type == "total_score_1000"
+        [achievement] = evaluate([rule], MetricsSnapshot(values={("score", None): 1000}), "u1", TODAY)
+        assert achievement.type == "total_score_1000"
+        assert achievement.achievement_id == "u1_total_score_1000"
+
+    def test_invalid_definitions_rejected(self):
+        """Неизвестные comparator и метрика, нечисловой порог — ошибка; в compile_rules — пропуск"""
+        for item in (
+            {"id": "total_score_50", "comparator": "=>", "threshold": 1},
+            {"id": "custom", "metric": "scroe", "threshold": 1},
+            {"id": "custom", "metric": "score", "threshold": "10"},
+            {"id": "custom", "metric": "score", "threshold": 10, "window": 0},
+            {"metric": "score", "threshold": 10},
+        ):
+            with pytest.raises(ValueError):
+                compile_rule(item)
+        assert compile_rules([{"id": "custom", "metric": "scroe", "threshold": 1}]) == []
+        # Определение без правила — только для отображения
+        assert compile_rule({"id": "custom", "name": "Без правила"}) is None
+
+    def test_compiled_once_per_catalog(self):
+        """Правила перекомпилируются, только когда каталог меняется"""
+        rules = AchievementRules()
+        catalog = [dict(item) for item in DEFAULT_CATALOG]
+        first = rules.for_catalog(catalog)
+        assert rules.for_catalog([dict(item) for item in DEFAULT_CATALOG]) is first
+        catalog[2]["threshold"] = 10
+        assert rules.for_catalog(catalog) is not first
+        # Пустой каталог — правила по умолчанию
+        assert len(rules.for_catalog([])) == len(DEFAULT_CATALOG)
+
+
+class TestEvaluate:
+    """Тесты проверки правил по снимку метрик"""
+
+    def test_progress_rules_single_pass(self):
+        """Счёт, серии и недельные очки проверяются за один проход, полученные не выдаются"""
+        stats = UserProgressStats(
+            user_id="u1", total_score=120, last_active_date=TODAY, current_streak=8,
+            streak_start=TODAY - timedelta(days=7), longest_streak=8,
+            longest_streak_start=TODAY - timedelta(days=7),
+            daily_scores={(TODAY - timedelta(days=i)).isoformat(): 10 for i in range(8)},
+        )
+        rules = [rule for rule in compile_rules(DEFAULT_CATALOG) if not rule.per_session]
+        snapshot = progress_snapshot(stats, TODAY, {rule.window for rule in rules})
+        assert snapshot.values[("score", 7)] == 80
+
+        new = evaluate(rules, snapshot, "u1", TODAY, {_earned(AchievementType.TOTAL_SCORE_50)})
+
+        by_type = {a.type: a for a in new}
+        assert set(by_type) == {AchievementType.WEEKLY_FIFTY, AchievementType.TOTAL_SCORE_100,
+                                AchievementType.STREAK_7_DAYS}
+        assert by_type[AchievementType.WEEKLY_FIFTY].period_start_date == TODAY - timedelta(days=7)
+        assert by_type[AchievementType.STREAK_7_DAYS].period_start_date == TODAY - timedelta(days=7)
+        assert by_type[AchievementType.TOTAL_SCORE_100].period_start_date is None
+        # ID документа: пользователь, тип и период (для правил с окном)
+        assert by_type[AchievementType.TOTAL_SCORE_100].achievement_id == "u1_total_score_100"
+        assert by_type[AchievementType.STREAK_7_DAYS].achievement_id == "u1_streak_7_days"
+        assert by_type[AchievementType.WEEKLY_FIFTY].achievement_id == "u1_weekly_fifty_2025-06-23"
+
+    def test_windowed_rule_once_per_period(self):
+        """Правило с окном выдаётся повторно только в новом периоде"""
+        rules = compile_rules([{"id": "weekly_fifty"}])
+        snapshot = MetricsSnapshot(values={("score", 7): 60})
+        this_period = _earned(AchievementType.WEEKLY_FIFTY, (TODAY - timedelta(days=7)).isoformat())
+        last_period = _earned(AchievementType.WEEKLY_FIFTY, (TODAY - timedelta(days=8)).isoformat())
+
+        assert evaluate(rules, snapshot, "u1", TODAY, {this_period}) == []
+        assert len(evaluate(rules, snapshot, "u1", TODAY, {last_period})) == 1
+
+    def test_session_rule(self):
+        """Сессионное правило выдаётся за каждую безошибочную сессию и только по снимку сессии"""
+        rules = compile_rules(DEFAULT_CATALOG)
+        details = [RoundDetail(question_id=f"q{i}", answer="a", is_correct=True, time_spent=1.0)
+                   for i in range(3)]
+
+        [achievement] = evaluate(rules, session_snapshot("s1", details), "u1", TODAY,
+                                 {_earned(AchievementType.PERFECT_STREAK, "s0")})
+        assert achievement.type == AchievementType.PERFECT_STREAK
+        assert achievement.session_id == "s1"
+        assert achievement.achievement_id == "u1_perfect_streak_s1"
+
+        details[0] = RoundDetail(question_id="q0", answer="b", is_correct=False, time_spent=1.0)
+        assert evaluate(rules, session_snapshot("s2", details), "u1", TODAY) == []
+        assert evaluate(rules, MetricsSnapshot(values={("session_accuracy", None): 1.0}), "u1", TODAY) == []
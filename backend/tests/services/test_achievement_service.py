@@ -1,26 +1,39 @@
 import pytest
 from unittest.mock import AsyncMock, patch
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
 
 from repositories.achievement_repository import AchievementRepository
 from repositories.progress_repository import ProgressRepository
 from services.achievement_service import AchievementService
-from domain.achievement import AchievementModel, AchievementType
+from domain.achievement import AchievementModel, AchievementType, achievement_doc_id
+from services.progress_service import ProgressService
+from shared.achievement_check_cache import achievement_check_cache
 
 
 class TestAchievementService:
     """Тесты для сервиса достижений"""
 
+    @pytest.fixture(autouse=True)
+    def clear_check_cache(self):
+        """Отметки проверок общие для процесса — очищаем их между тестами"""
+        achievement_check_cache.clear()
+        yield
+        achievement_check_cache.clear()
+
     @pytest.fixture
     def achievement_repository_mock(self):
         """Мок для AchievementRepository"""
         mock = AsyncMock(spec=AchievementRepository)
+        mock.get_existing_ids.return_value = set()
+        mock.get_catalog.return_value = []  # каталог не заполнен — правила по умолчанию
         return mock
 
     @pytest.fixture
     def progress_repository_mock(self):
         """Мок для ProgressRepository"""
         mock = AsyncMock(spec=ProgressRepository)
+        mock.get_user_stats.return_value = None  # агрегата нет — суммы считает репозиторий
+        mock.sum_total_score.return_value = 0
         return mock
 
     @pytest.fixture
@@ -32,15 +45,13 @@ class TestAchievementService:
         )
 
     @pytest.mark.asyncio
-    @patch('uuid.uuid4', return_value='achievement-uuid-123')
-    async def test_check_weekly_achievement_earned(self, mock_uuid, achievement_service, 
+    async def test_check_weekly_achievement_earned(self, achievement_service, 
                                            achievement_repository_mock, progress_repository_mock):
         """Тест проверки и создания еженедельного достижения, когда оно заработано"""
         user_id = "test_user_123"
         
         # Настраиваем моки
         progress_repository_mock.sum_scores_for_week.return_value = 75  # Больше 50, должно создать достижение
-        achievement_repository_mock.exists_weekly_achievement.return_value = False  # Достижение еще не существует
         
         # Вызываем тестируемый метод
         await achievement_service.check_weekly_achievement(user_id)
@@ -51,17 +62,16 @@ class TestAchievementService:
         assert args[0] == user_id
         assert isinstance(args[1], datetime)  # week_ago
         
-        # Проверяем, что вызвался метод exists_weekly_achievement
-        achievement_repository_mock.exists_weekly_achievement.assert_awaited_once()
-        args = achievement_repository_mock.exists_weekly_achievement.call_args[0]
-        assert args[0] == user_id
-        assert isinstance(args[1], date)  # week_start
+        # Выданные достижения проверяются одним get_all по ID
+        week_start = datetime.now(timezone.utc).date() - timedelta(days=7)
+        weekly_id = achievement_doc_id(user_id, AchievementType.WEEKLY_FIFTY, week_start.isoformat())
+        achievement_repository_mock.get_existing_ids.assert_awaited_once_with([weekly_id])
         
         # Проверяем, что достижение было создано
-        achievement_repository_mock.create_achievement.assert_awaited_once()
-        achievement = achievement_repository_mock.create_achievement.await_args.args[0]
+        achievement_repository_mock.create_achievements.assert_awaited_once()
+        [achievement] = achievement_repository_mock.create_achievements.await_args.args[0]
         assert isinstance(achievement, AchievementModel)
-        assert achievement.achievement_id == "achievement-uuid-123"
+        assert achievement.achievement_id == weekly_id
         assert achievement.user_id == user_id
         assert achievement.type == AchievementType.WEEKLY_FIFTY
         assert isinstance(achievement.earned_at, datetime)
@@ -82,11 +92,8 @@ class TestAchievementService:
         # Проверяем, что вызвался метод sum_scores_for_week
         progress_repository_mock.sum_scores_for_week.assert_awaited_once()
         
-        # Проверяем, что метод exists_weekly_achievement не вызывался
-        achievement_repository_mock.exists_weekly_achievement.assert_not_awaited()
-        
         # Проверяем, что достижение не было создано
-        achievement_repository_mock.create_achievement.assert_not_awaited()
+        achievement_repository_mock.create_achievements.assert_not_awaited()
 
     @pytest.mark.asyncio
     async def test_check_weekly_achievement_already_exists(self, achievement_service, 
@@ -96,7 +103,10 @@ class TestAchievementService:
         
         # Настраиваем моки
         progress_repository_mock.sum_scores_for_week.return_value = 100  # Достаточно очков
-        achievement_repository_mock.exists_weekly_achievement.return_value = True  # Но достижение уже существует
+        # Но достижение за этот период уже существует
+        week_start = datetime.now(timezone.utc).date() - timedelta(days=7)
+        achievement_repository_mock.get_existing_ids.return_value = {
+            achievement_doc_id(user_id, AchievementType.WEEKLY_FIFTY, week_start.isoformat())}
         
         # Вызываем тестируемый метод
         await achievement_service.check_weekly_achievement(user_id)
@@ -104,8 +114,35 @@ class TestAchievementService:
         # Проверяем, что вызвался метод sum_scores_for_week
         progress_repository_mock.sum_scores_for_week.assert_awaited_once()
         
-        # Проверяем, что вызвался метод exists_weekly_achievement
-        achievement_repository_mock.exists_weekly_achievement.assert_awaited_once()
-        
         # Проверяем, что достижение не было создано (т.к. оно уже существует)
-        achievement_repository_mock.create_achievement.assert_not_awaited()
+        achievement_repository_mock.create_achievements.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_check_skipped_until_new_progress(self, achievement_service,
+                                                    achievement_repository_mock, progress_repository_mock):
+        """Повторная проверка за день пропускается, пока не записан новый прогресс"""
+        user_id = "test_user_123"
+        progress_repository_mock.sum_scores_for_week.return_value = 30
+
+        await achievement_service.check_weekly_achievement(user_id)
+        await achievement_service.check_weekly_achievement(user_id)
+        progress_repository_mock.sum_scores_for_week.assert_awaited_once()
+        achievement_repository_mock.get_catalog.assert_awaited_once()
+
+        progress_service = ProgressService(progress_repo=progress_repository_mock,
+                                           achievement_repo=achievement_repository_mock)
+        await progress_service.record_progress(user_id, 10, 5, 10, 60.0)
+        progress_repository_mock.sum_scores_for_week.reset_mock()
+
+        await achievement_service.check_weekly_achievement(user_id)
+        progress_repository_mock.sum_scores_for_week.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_check_not_marked(self, achievement_service, progress_repository_mock):
+        """Неудачная проверка не оставляет отметку"""
+        progress_repository_mock.get_user_stats.side_effect = RuntimeError("unavailable")
+
+        with pytest.raises(RuntimeError):
+            await achievement_service.check_weekly_achievement("test_user_123")
+
+        assert not achievement_check_cache.checked("test_user_123")
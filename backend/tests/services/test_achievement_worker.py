@@ -0,0 +1,123 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from domain.achievement import AchievementType
+from domain.progress import UserProgressStats
+from repositories.achievement_repository import AchievementRepository
+from repositories.progress_repository import ProgressRepository
+from services.achievement_worker import AchievementWorker
+from services.progress_service import ProgressService
+
+
+@pytest.fixture
+def progress_repository_mock():
+    mock = AsyncMock(spec=ProgressRepository)
+    mock.get_user_stats.side_effect = lambda user_id: UserProgressStats(user_id=user_id, total_score=60)
+    return mock
+
+
+@pytest.fixture
+def achievement_repository_mock():
+    mock = AsyncMock(spec=AchievementRepository)
+    mock.get_existing_ids.return_value = set()
+    mock.create_achievements.side_effect = lambda achievements: len(achievements)
+    mock.get_catalog.return_value = []
+    return mock
+
+
+def _worker(progress_repo, achievement_repo, **kwargs):
+    options = dict(concurrency=2, batch_size=10, dedup_seconds=0.02, max_attempts=3, retry_delay=0.01)
+    options.update(kwargs)
+    return AchievementWorker(repositories=lambda: (progress_repo, achievement_repo), **options)
+
+
+class TestAchievementWorker:
+    """Тесты для фоновой проверки достижений"""
+
+    @pytest.mark.asyncio
+    async def test_events_deduplicated_and_batched(self, progress_repository_mock, achievement_repository_mock):
+        """События одного пользователя объединяются, достижения пачки пишутся одним вызовом"""
+        worker = _worker(progress_repository_mock, achievement_repository_mock)
+        worker.start()
+        for _ in range(3):
+            worker.submit("u1")
+        worker.submit("u2")
+        await asyncio.sleep(0.1)
+        await worker.drain(timeout=1)
+
+        assert progress_repository_mock.get_user_stats.await_count == 2
+        achievement_repository_mock.create_achievements.assert_awaited_once()
+        created = achievement_repository_mock.create_achievements.await_args.args[0]
+        assert sorted((a.user_id, a.type) for a in created) == [
+            ("u1", AchievementType.TOTAL_SCORE_50), ("u2", AchievementType.TOTAL_SCORE_50)]
+        stats = worker.stats()
+        assert stats["submitted"] == 4
+        assert stats["deduplicated"] == 2
+        assert stats["processed"] == 2
+        assert stats["batches"] == 1
+        assert stats["awarded"] == 2
+        assert stats["backlog"] == 0
+
+    @pytest.mark.asyncio
+    async def test_retry_then_success(self, progress_repository_mock, achievement_repository_mock):
+        """Неудачная проверка повторяется с задержкой"""
+        achievement_repository_mock.create_achievements.side_effect = [RuntimeError("unavailable"), 1]
+        worker = _worker(progress_repository_mock, achievement_repository_mock, dedup_seconds=0)
+        worker.start()
+        worker.submit("u1")
+        await asyncio.sleep(0.1)
+        await worker.drain(timeout=1)
+
+        assert achievement_repository_mock.create_achievements.await_count == 2
+        stats = worker.stats()
+        assert stats["retried"] == 1
+        assert stats["failed"] == 0
+        assert stats["processed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_dropped_after_max_attempts(self, progress_repository_mock, achievement_repository_mock):
+        """После max_attempts неудач событие отбрасывается и учитывается как failed"""
+        progress_repository_mock.get_user_stats.side_effect = RuntimeError("unavailable")
+        worker = _worker(progress_repository_mock, achievement_repository_mock, dedup_seconds=0)
+        worker.start()
+        worker.submit("u1")
+        await asyncio.sleep(0.1)
+        await worker.drain(timeout=1)
+
+        assert progress_repository_mock.get_user_stats.await_count == 3
+        stats = worker.stats()
+        assert stats["retried"] == 2
+        assert stats["failed"] == 1
+        assert stats["backlog"] == 0
+
+    @pytest.mark.asyncio
+    async def test_drain_ignores_dedup_window(self, progress_repository_mock, achievement_repository_mock):
+        """При остановке очередь обрабатывается сразу, не дожидаясь окна объединения"""
+        worker = _worker(progress_repository_mock, achievement_repository_mock, dedup_seconds=60)
+        worker.start()
+        worker.submit("u1")
+        assert worker.running
+
+        await asyncio.wait_for(worker.drain(timeout=1), timeout=2)
+
+        assert not worker.running
+        achievement_repository_mock.create_achievements.assert_awaited_once()
+        assert worker.stats()["backlog"] == 0
+
+    @pytest.mark.asyncio
+    async def test_service_only_submits(self, progress_repository_mock, achievement_repository_mock):
+        """С работающим воркером запрос делает только основную запись"""
+        worker = _worker(progress_repository_mock, achievement_repository_mock, dedup_seconds=60)
+        worker.start()
+        service = ProgressService(progress_repo=progress_repository_mock,
+                                  achievement_repo=achievement_repository_mock, achievement_worker=worker)
+
+        await service.record_progress("u1", 10, 5, 10, 60.0)
+
+        progress_repository_mock.record_daily_score.assert_awaited_once()
+        progress_repository_mock.get_user_stats.assert_not_awaited()
+        achievement_repository_mock.get_existing_ids.assert_not_awaited()
+        assert worker.stats()["backlog"] == 1
+        await worker.drain(timeout=1)
@@ -7,6 +7,8 @@ from domain.user import UserModel
 from services.auth_service import AuthService
 from repositories.user_repository import UserRepository
 from google.cloud.firestore import Client
+from firebase_admin import auth as firebase_auth
+from shared.token_cache import token_cache, revocation_cache
 
 
 class TestAuthService:
@@ -22,6 +24,15 @@ class TestAuthService:
         """Мок для UserRepository. Используется для проверки вызовов к нему."""
         return AsyncMock(spec=UserRepository)
 
+    @pytest.fixture(autouse=True)
+    def clear_token_caches(self):
+        """Кэши токенов общие для процесса — очищаем их между тестами"""
+        token_cache.clear()
+        revocation_cache.clear()
+        yield
+        token_cache.clear()
+        revocation_cache.clear()
+
     @pytest.fixture
     def auth_service(self, db_mock, user_repository_mock):
         """Создание экземпляра сервиса с моком для db и UserRepository."""
@@ -141,3 +152,39 @@ class TestAuthService:
             
         # Проверяем сообщение об ошибке
         assert "Token verification failed" in str(e)
+
+    @pytest.mark.asyncio
+    @patch('firebase_admin.auth.verify_id_token')
+    @patch('os.environ.get')
+    async def test_verify_token_uses_cache(self, mock_env_get, mock_verify_token, auth_service):
+        """Повторная проверка того же токена не вызывает Firebase Auth до истечения exp"""
+        mock_env_get.return_value = 'False'
+        future_exp = datetime.now().timestamp() + 3600
+        mock_verify_token.return_value = {"uid": "firebase_uid_123", "exp": future_exp}
+
+        first = await auth_service.verify_token("cached_token")
+        second = await auth_service.verify_token("cached_token")
+
+        assert first == second == "firebase_uid_123"
+        mock_verify_token.assert_called_once_with("cached_token")
+        assert token_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    @patch('firebase_admin.auth.get_user')
+    @patch('firebase_admin.auth.verify_id_token')
+    @patch('os.environ.get')
+    async def test_verify_token_revoked(self, mock_env_get, mock_verify_token, mock_get_user, auth_service):
+        """При включённой проверке отзыва токен, выданный до отзыва, отклоняется"""
+        mock_env_get.return_value = 'False'
+        now = datetime.now().timestamp()
+        mock_verify_token.return_value = {"uid": "firebase_uid_123", "iat": now - 100, "exp": now + 3600}
+        mock_get_user.return_value = MagicMock(tokens_valid_after_timestamp=(now - 10) * 1000, disabled=False)
+
+        with patch('services.auth_service.config.AUTH_CHECK_REVOKED', True):
+            with pytest.raises(firebase_auth.RevokedIdTokenError):
+                await auth_service.verify_token("revoked_token")
+            with pytest.raises(firebase_auth.RevokedIdTokenError):
+                await auth_service.verify_token("revoked_token")
+
+        # Состояние отзыва берётся из кэша при повторной проверке
+        mock_get_user.assert_called_once_with("firebase_uid_123")
@@ -0,0 +1,131 @@
+from datetime import date, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from domain.user import UserModel
+from repositories.user_repository import UserRepository
+from services.leaderboard import WeeklyLeaderboard
+from services.leaderboard_service import LeaderboardService
+
+TODAY = date(2025, 6, 30)
+
+
+class FakeToday:
+    """Управляемая текущая дата"""
+
+    def __init__(self, today: date = TODAY):
+        self.today = today
+
+    def __call__(self) -> date:
+        return self.today
+
+
+class TestWeeklyLeaderboard:
+    """Тесты для недельного рейтинга в памяти"""
+
+    @pytest.fixture
+    def today(self):
+        return FakeToday()
+
+    @pytest.fixture
+    def leaderboard(self, today):
+        return WeeklyLeaderboard(days=7, today=today)
+
+    def test_top_and_rank(self, leaderboard):
+        """Игроки упорядочены по сумме очков за неделю, равные очки делят место"""
+        leaderboard.record("u1", TODAY, 30)
+        leaderboard.record("u1", TODAY - timedelta(days=1), 20)
+        leaderboard.record("u2", TODAY, 70)
+        leaderboard.record("u3", TODAY, 50)
+
+        assert leaderboard.top(10) == [(1, "u2", 70), (2, "u1", 50), (2, "u3", 50)]
+        assert leaderboard.top(1) == [(1, "u2", 70)]
+        assert leaderboard.rank("u3") == (2, 50)
+        assert leaderboard.rank("nobody") is None
+
+    def test_replace_and_accumulate(self, leaderboard):
+        """replace заменяет очки дня, без него — прибавляет"""
+        leaderboard.record("u1", TODAY, 30)
+        leaderboard.record("u1", TODAY, 10)
+        assert leaderboard.rank("u1") == (1, 10)
+        leaderboard.record("u1", TODAY, 5, replace=False)
+        assert leaderboard.rank("u1") == (1, 15)
+        leaderboard.record("u1", TODAY, 0)
+        assert leaderboard.top(10) == []
+
+    def test_days_outside_window_ignored(self, leaderboard):
+        """Дни старше окна не учитываются"""
+        leaderboard.record("u1", TODAY - timedelta(days=7), 100)
+        leaderboard.record("u1", TODAY - timedelta(days=6), 10)
+        assert leaderboard.rank("u1") == (1, 10)
+
+    def test_week_rolls_over(self, leaderboard, today):
+        """Со сменой дня корзина, выпавшая из окна, вычитается без пересчёта прогресса"""
+        leaderboard.record("u1", TODAY - timedelta(days=6), 40)
+        leaderboard.record("u1", TODAY, 10)
+        leaderboard.record("u2", TODAY - timedelta(days=6), 5)
+        leaderboard.checkpoint_entries()
+
+        today.today = TODAY + timedelta(days=1)
+        assert leaderboard.top(10) == [(1, "u1", 10)]
+        assert leaderboard.take_expired() == [TODAY - timedelta(days=6)]
+        assert leaderboard.window_start == TODAY - timedelta(days=5)
+
+    def test_level_filter(self, leaderboard):
+        """Рейтинг по уровню и перенос игрока при смене уровня"""
+        leaderboard.record("u1", TODAY, 30)
+        leaderboard.record("u2", TODAY, 20)
+        leaderboard.set_profile("u1", "beginner")
+        leaderboard.set_profile("u2", "intermediate")
+        assert leaderboard.top(10, "beginner") == [(1, "u1", 30)]
+        assert leaderboard.rank("u2", "beginner") is None
+
+        leaderboard.update_profile("u2", "beginner", "Bob")
+        leaderboard.update_profile("u9", "beginner")
+        assert leaderboard.top(10, "beginner") == [(1, "u1", 30), (2, "u2", 20)]
+        assert leaderboard.top(10, "intermediate") == []
+        assert leaderboard.profile("u9") is None
+
+    def test_checkpoint_roundtrip(self, leaderboard, today):
+        """Сохранённые изменения восстанавливают рейтинг в новом процессе"""
+        leaderboard.record("u1", TODAY, 30)
+        leaderboard.set_profile("u1", "beginner", "Ann")
+        leaderboard.record("u2", TODAY - timedelta(days=1), 20)
+
+        entries = leaderboard.checkpoint_entries()
+        assert entries[TODAY] == {"u1": {"score": 30, "level": "beginner", "display_name": "Ann"}}
+        assert entries[TODAY - timedelta(days=1)] == {"u2": {"score": 20}}
+        assert leaderboard.checkpoint_entries() == {}
+
+        restored = WeeklyLeaderboard(days=7, today=today)
+        restored.restore(entries)
+        assert restored.top(10) == leaderboard.top(10)
+        assert restored.top(10, "beginner") == [(1, "u1", 30)]
+        assert restored.unresolved() == ["u2"]
+
+
+class TestLeaderboardService:
+    """Тесты для сервиса рейтинга"""
+
+    @pytest.mark.asyncio
+    async def test_get_weekly_resolves_profiles_once(self):
+        """Уровни новых игроков читаются одним get_all и дальше берутся из памяти"""
+        leaderboard = WeeklyLeaderboard(days=7, today=FakeToday())
+        leaderboard.record("u1", TODAY, 30)
+        leaderboard.record("u2", TODAY, 20)
+        user_repo = AsyncMock(spec=UserRepository)
+        user_repo.get_users.return_value = {
+            "u1": UserModel(uid="u1", email="u1@example.com", display_name="Ann", level="beginner")}
+        service = LeaderboardService(leaderboard=leaderboard, user_repo=user_repo)
+
+        result = await service.get_weekly("u2", level=None, limit=10)
+        assert [entry["user_id"] for entry in result["entries"]] == ["u1", "u2"]
+        assert result["entries"][0]["display_name"] == "Ann"
+        assert result["me"] == {"rank": 2, "score": 20}
+        assert result["since"] == (TODAY - timedelta(days=6)).isoformat()
+
+        result = await service.get_weekly("u2", level="beginner", limit=10)
+        assert [entry["user_id"] for entry in result["entries"]] == ["u1"]
+        assert result["me"] is None
+        user_repo.get_users.assert_awaited_once()
@@ -0,0 +1,85 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from domain.session import RoundDetail
+from services.live_sessions import LiveSessionLimitError, LiveSessionStore, flush_all, flush_sessions
+from services.session_service import SessionService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _detail(question_id: str, is_correct: bool = True) -> RoundDetail:
+    return RoundDetail(question_id=question_id, answer="a", is_correct=is_correct, time_spent=1.0)
+
+
+@pytest.fixture
+def session_service_mock():
+    return AsyncMock(spec=SessionService)
+
+
+class TestLiveSessionStore:
+    """Тесты для хранилища раундов WebSocket-сессий"""
+
+    def test_limits(self):
+        """Сверх лимитов подключения и раунды отклоняются, накопленное не вытесняется"""
+        store = LiveSessionStore(max_sessions=1, max_rounds=1)
+        session = store.attach("s1", "u1")
+        store.add_round(session, _detail("q1"))
+
+        with pytest.raises(LiveSessionLimitError):
+            store.add_round(session, _detail("q2"))
+        with pytest.raises(LiveSessionLimitError):
+            store.attach("s2", "u2")
+        with pytest.raises(ValueError):
+            store.attach("s1", "other_user")
+        assert len(session.details) == 1
+        assert store.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_sessions_flushed_once(self, session_service_mock):
+        """Сессия, к которой не вернулись за resume_seconds, пишется одним finish_session"""
+        clock = FakeClock()
+        store = LiveSessionStore(resume_seconds=60, clock=clock)
+        session = store.attach("s1", "u1")
+        store.add_round(session, _detail("q1"))
+        store.add_round(session, _detail("q2", False))
+        store.detach(session)
+
+        clock.now += 30
+        assert store.take_expired() == []
+        # Переподключение до истечения — сессия продолжается
+        assert store.attach("s1", "u1") is session
+        store.detach(session)
+        clock.now += 60
+        expired = store.take_expired()
+
+        assert await flush_sessions(store, expired, session_service_mock) == 1
+        session_service_mock.finish_session.assert_awaited_once_with(
+            session_id="s1", user_id="u1", details=session.details, score=1)
+        assert len(store) == 0
+        assert store.stats()["processed"] == 1
+        with pytest.raises(ValueError):
+            store.add_round(session, _detail("q3"))
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_restored(self, session_service_mock):
+        """Неудачная запись возвращает сессию в хранилище, при остановке — нет"""
+        session_service_mock.finish_session.side_effect = RuntimeError("unavailable")
+        store = LiveSessionStore(resume_seconds=0)
+        session = store.attach("s1", "u1")
+        store.detach(session)
+
+        assert await flush_sessions(store, store.take_expired(), session_service_mock) == 0
+        assert len(store) == 1
+        assert store.stats()["retried"] == 1
+
+        assert await flush_all(store, lambda: session_service_mock) == 0
+        assert len(store) == 0
+        assert store.stats()["failed"] == 1
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from domain.progress import ProgressRecord
+from services.progress_analytics import (
+    compute_analytics,
+    daily_arrays,
+    moving_average,
+    trend_slope,
+    weekly_totals,
+)
+
+
+def _record(day: date, score: int, correct: int = 1, total: int = 2, time_spent: float = 10.0) -> ProgressRecord:
+    return ProgressRecord(user_id="user123", date=day, score=score,
+                          correct_answers=correct, total_answers=total, time_spent=time_spent)
+
+
+class TestProgressAnalytics:
+    """Тесты для векторной аналитики прогресса"""
+
+    def test_daily_arrays(self):
+        """Записи раскладываются по дням периода, записи вне периода отбрасываются"""
+        start = date(2025, 6, 1)
+        arrays = daily_arrays([
+            _record(start, 5),
+            _record(start + timedelta(days=2), 7),
+            _record(start + timedelta(days=2), 3),   # вторая запись за тот же день
+            _record(start - timedelta(days=1), 100),
+            _record(start + timedelta(days=10), 100),
+        ], start, start + timedelta(days=3))
+
+        assert arrays["score"].tolist() == [5, 0, 10, 0]
+        assert arrays["total"].tolist() == [2, 0, 4, 0]
+        assert arrays["played"].tolist() == [True, False, True, False]
+
+    def test_moving_average(self):
+        """Скользящее среднее с неполным окном в начале"""
+        result = moving_average(np.array([2, 4, 6, 8]), window=2)
+        assert result.tolist() == [2.0, 3.0, 5.0, 7.0]
+
+    def test_trend_slope(self):
+        """Наклон считается только по дням с данными"""
+        assert trend_slope(np.array([1.0, np.nan, 3.0, 4.0])) == pytest.approx(1.0)
+        assert trend_slope(np.array([np.nan, 1.0])) is None
+
+    def test_weekly_totals(self):
+        """Недели выровнены по концу периода; неполная неделя в начале не учитывается"""
+        start = date(2025, 6, 1)
+        weekly = weekly_totals(np.arange(16), start)
+
+        assert weekly == [
+            {"week_start": "2025-06-03", "score": sum(range(2, 9)), "delta": None},
+            {"week_start": "2025-06-10", "score": sum(range(9, 16)), "delta": 49},
+        ]
+
+    def test_compute_analytics(self):
+        """Сводка и ряды за период"""
+        start = date(2025, 6, 1)
+        end = start + timedelta(days=13)
+        records = [_record(start + timedelta(days=i), score=i, correct=i % 3, total=2) for i in range(0, 14, 2)]
+
+        result = compute_analytics(records, start, end, window=7)
+
+        assert result["days_played"] == 7
+        assert result["total_score"] == sum(range(0, 14, 2))
+        assert result["average_score"] == 6.0
+        assert result["score_percentiles"]["p50"] == 6.0
+        assert result["score_trend"] == pytest.approx(1.0)
+        assert result["time_per_answer"] == 5.0
+        assert result["week_over_week"] == {"current": 8 + 10 + 12, "previous": 0 + 2 + 4 + 6,
+                                            "delta": 18, "delta_pct": 1.5}
+        series = result["series"]
+        assert len(series["dates"]) == 14
+        assert series["dates"][0] == "2025-06-01" and series["dates"][-1] == "2025-06-14"
+        assert series["accuracy"][1] is None
+        assert series["accuracy"][2] == 1.0
+
+    def test_compute_analytics_empty(self):
+        """Пустой период: нули и null вместо статистик"""
+        start = date(2025, 6, 1)
+        result = compute_analytics([], start, start + timedelta(days=2))
+
+        assert result["days_played"] == 0
+        assert result["average_score"] == 0.0
+        assert result["score_percentiles"]["p90"] is None
+        assert result["accuracy"] is None
+        assert result["weekly"] == []
+        assert result["series"]["moving_average"] == [0.0, 0.0, 0.0]
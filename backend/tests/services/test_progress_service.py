@@ -3,8 +3,9 @@ from unittest.mock import AsyncMock, patch
 from datetime import date, datetime, timedelta
 from typing import List
 
-from domain.progress import ProgressRecord
+from domain.progress import ProgressRecord, UserProgressStats
 from repositories.progress_repository import ProgressRepository
+from repositories.achievement_repository import AchievementRepository
 from services.progress_service import ProgressService
 
 
@@ -15,12 +16,21 @@ class TestProgressService:
     def progress_repository_mock(self):
         """Мок для ProgressRepository"""
         mock = AsyncMock(spec=ProgressRepository)
+        mock.get_user_stats.return_value = UserProgressStats(user_id="test_user_123")
         return mock
 
     @pytest.fixture
-    def progress_service(self, progress_repository_mock):
-        """Создание экземпляра сервиса с моком для ProgressRepository"""
-        return ProgressService(progress_repo=progress_repository_mock)
+    def achievement_repository_mock(self):
+        """Мок для AchievementRepository"""
+        mock = AsyncMock(spec=AchievementRepository)
+        mock.get_catalog.return_value = []
+        mock.get_existing_ids.return_value = set()
+        return mock
+
+    @pytest.fixture
+    def progress_service(self, progress_repository_mock, achievement_repository_mock):
+        """Создание экземпляра сервиса с моками репозиториев прогресса и достижений"""
+        return ProgressService(progress_repo=progress_repository_mock, achievement_repo=achievement_repository_mock)
 
     @pytest.fixture
     def sample_record(self):
@@ -91,6 +101,9 @@ class TestProgressService:
         # Проверяем возвращаемый ID
         assert progress_id == f"{user_id}_{test_date.isoformat()}"
 
+        # Достижения проверяются по агрегату сразу после записи
+        progress_repository_mock.get_user_stats.assert_awaited_once_with(user_id)
+
     @pytest.mark.asyncio
     async def test_record_progress_default_date(self, progress_service, progress_repository_mock):
         """Тест сохранения прогресса пользователя с датой по умолчанию"""
@@ -176,6 +189,44 @@ class TestProgressService:
         assert result["average_score"] == 0
         assert result["success_rate"] == 0
 
+    @pytest.mark.asyncio
+    async def test_get_progress_downsampled(self, progress_service, progress_repository_mock):
+        """Суммы по неделям и месяцам; date — первый день периода"""
+        progress_repository_mock.get_progress.return_value = [
+            ProgressRecord(user_id="test_user", date=day, score=10,
+                           correct_answers=1, total_answers=2, time_spent=30.0)
+            for day in (date(2025, 6, 1), date(2025, 6, 2), date(2025, 6, 3), date(2025, 7, 1))
+        ]
+
+        weekly = await progress_service.get_progress("test_user", 365, "week")
+        monthly = await progress_service.get_progress("test_user", 365, "month")
+
+        # 1 июня 2025 — воскресенье, 2 и 3 июня — следующая неделя
+        assert [(d["date"], d["score"]) for d in weekly["data"]] == [
+            ("2025-05-26", 10), ("2025-06-02", 20), ("2025-06-30", 10)]
+        assert [(d["date"], d["score"], d["total_answers"]) for d in monthly["data"]] == [
+            ("2025-06-01", 30, 6), ("2025-07-01", 10, 2)]
+        assert monthly["data"][0]["success_rate"] == 0.5
+        assert monthly["data"][0]["time_spent"] == 90.0
+        # Итоги не зависят от детализации
+        assert monthly["total_score"] == 40
+        assert monthly["average_score"] == 10
+
+    @pytest.mark.asyncio
+    async def test_get_analytics(self, progress_service, progress_repository_mock, sample_records_list):
+        """Аналитика читает записи за период одним вызовом репозитория"""
+        progress_repository_mock.get_progress.return_value = sample_records_list
+
+        result = await progress_service.get_analytics("test_user_123", days=30, window=7)
+
+        today = date.today()
+        progress_repository_mock.get_progress.assert_called_once_with(
+            "test_user_123", (today - timedelta(days=29)).isoformat(), today.isoformat())
+        assert result["end_date"] == today.isoformat()
+        assert result["days_played"] == 5
+        assert result["total_score"] == 350
+        assert len(result["series"]["score"]) == 30
+
     @pytest.mark.asyncio
     async def test_get_weekly_summary(self, progress_service, progress_repository_mock):
         """Тест получения суммарных данных за неделю"""
@@ -197,3 +248,119 @@ class TestProgressService:
         
         # Проверяем результат
         assert result == expected_score
+
+    @pytest.mark.asyncio
+    async def test_record_progress_batch(self, progress_repository_mock):
+        """Пакетная загрузка: записи одним commit, достижения проверяются один раз"""
+        achievement_repository_mock = AsyncMock(spec=AchievementRepository)
+        achievement_repository_mock.get_existing_ids.return_value = set()
+        service = ProgressService(progress_repo=progress_repository_mock, achievement_repo=achievement_repository_mock)
+        progress_repository_mock.get_user_stats.return_value = UserProgressStats(user_id="test_user_123")
+        item = {"score": 10, "correct_answers": 5, "total_answers": 10, "time_spent": 60.0}
+
+        results = await service.record_progress_batch("test_user_123", [
+            {**item, "date": "2025-06-01"},
+            {**item, "date": "2025-06-02"},
+            {**item, "date": "2025-06-01", "score": 20},   # перекрывает первый элемент
+            {**item, "date": "06/03/2025"},                  # неверный формат даты
+            {**item, "date": "2025-06-03", "correct_answers": 11},  # correct > total
+        ])
+
+        assert [r["status"] for r in results] == ["skipped", "saved", "saved", "error", "error"]
+        assert results[1]["progress_id"] == "test_user_123_2025-06-02"
+        assert results[3]["error"]
+        progress_repository_mock.record_daily_scores.assert_called_once()
+        user_id, records = progress_repository_mock.record_daily_scores.call_args[0]
+        assert user_id == "test_user_123"
+        assert [(r.date, r.score) for r in records] == [(date(2025, 6, 1), 20), (date(2025, 6, 2), 10)]
+        # Достижения — один раз на всю пачку, по агрегату, без чтения истории
+        progress_repository_mock.get_user_stats.assert_called_once_with("test_user_123")
+        achievement_repository_mock.get_existing_ids.assert_not_called()  # ни одно правило не выполнено
+        progress_repository_mock.sum_total_score.assert_not_called()
+        progress_repository_mock.get_progress.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_record_progress_batch_chunks(self, progress_repository_mock, monkeypatch):
+        """Дни пишутся блоками; ошибка блока отмечается только у его элементов"""
+        from shared import config
+        monkeypatch.setattr(config, "PROGRESS_BATCH_CHUNK_SIZE", 2)
+        achievement_repository_mock = AsyncMock(spec=AchievementRepository)
+        achievement_repository_mock.get_existing_ids.return_value = set()
+        service = ProgressService(progress_repo=progress_repository_mock, achievement_repo=achievement_repository_mock)
+        progress_repository_mock.get_user_stats.return_value = UserProgressStats(user_id="test_user_123")
+        progress_repository_mock.record_daily_scores.side_effect = [None, RuntimeError("deadline exceeded"), None]
+        start = date(2025, 6, 1)
+        items = [
+            {"score": 1, "correct_answers": 0, "total_answers": 0, "time_spent": 0.0,
+             "date": start + timedelta(days=i)}
+            for i in range(5)
+        ]
+
+        results = await service.record_progress_batch("test_user_123", items)
+
+        assert progress_repository_mock.record_daily_scores.call_count == 3
+        assert [r["status"] for r in results] == ["saved", "saved", "error", "error", "saved"]
+        assert "deadline exceeded" in results[2]["error"]
+
+    @pytest.mark.asyncio
+    async def test_record_progress_accumulate_mode(self, progress_repository_mock, monkeypatch):
+        """В режиме accumulate результаты игр прибавляются, элементы за одну дату не пропускаются"""
+        from shared import config
+        monkeypatch.setattr(config, "PROGRESS_WRITE_MODE", "accumulate")
+        achievement_repository_mock = AsyncMock(spec=AchievementRepository)
+        achievement_repository_mock.get_existing_ids.return_value = set()
+        service = ProgressService(progress_repo=progress_repository_mock, achievement_repo=achievement_repository_mock)
+        progress_repository_mock.get_user_stats.return_value = UserProgressStats(user_id="test_user_123")
+        item = {"score": 10, "correct_answers": 5, "total_answers": 10, "time_spent": 60.0, "date": "2025-06-01"}
+
+        progress_id = await service.record_progress("test_user_123", 10, 5, 10, 60.0, date(2025, 6, 1))
+        results = await service.record_progress_batch("test_user_123", [item, {**item, "score": 20}])
+
+        assert progress_id == "test_user_123_2025-06-01"
+        progress_repository_mock.accumulate_daily_score.assert_called_once()
+        progress_repository_mock.record_daily_score.assert_not_called()
+        assert [r["status"] for r in results] == ["saved", "saved"]
+        _, records = progress_repository_mock.accumulate_daily_scores.call_args[0]
+        assert [r.score for r in records] == [10, 20]
+        progress_repository_mock.record_daily_scores.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_streak_achievements_from_stats(self, progress_repository_mock):
+        """Достижения за серии выдаются по счётчикам агрегата, без чтения истории"""
+        from domain.achievement import AchievementType
+        from domain.progress import UserProgressStats
+        achievement_repository_mock = AsyncMock(spec=AchievementRepository)
+        achievement_repository_mock.get_existing_ids.return_value = {"test_user_123_streak_7_days"}
+        service = ProgressService(progress_repo=progress_repository_mock, achievement_repo=achievement_repository_mock)
+        progress_repository_mock.get_user_stats.return_value = UserProgressStats(
+            user_id="test_user_123", last_active_date=date(2025, 6, 30), current_streak=30,
+            streak_start=date(2025, 6, 1), longest_streak=30, longest_streak_start=date(2025, 6, 1))
+
+        await service.record_progress("test_user_123", 10, 5, 10, 60.0, date(2025, 6, 30))
+
+        progress_repository_mock.get_progress.assert_not_called()
+        achievement_repository_mock.exists_achievement.assert_not_called()
+        achievement_repository_mock.create_achievements.assert_awaited_once()
+        created = achievement_repository_mock.create_achievements.await_args.args[0]
+        assert [a.type for a in created] == [AchievementType.STREAK_30_DAYS]
+        assert created[0].period_start_date == date(2025, 6, 1)
+
+    @pytest.mark.asyncio
+    async def test_progress_achievements_single_batch(self, progress_repository_mock):
+        """Все новые достижения за счёт и серии сохраняются одним вызовом"""
+        from domain.achievement import AchievementType
+        from domain.progress import UserProgressStats
+        achievement_repository_mock = AsyncMock(spec=AchievementRepository)
+        achievement_repository_mock.get_existing_ids.return_value = {"test_user_123_total_score_50"}
+        service = ProgressService(progress_repo=progress_repository_mock, achievement_repo=achievement_repository_mock)
+        progress_repository_mock.get_user_stats.return_value = UserProgressStats(
+            user_id="test_user_123", total_score=150, last_active_date=date(2025, 6, 7), current_streak=7,
+            streak_start=date(2025, 6, 1), longest_streak=7, longest_streak_start=date(2025, 6, 1))
+
+        await service.record_progress("test_user_123", 10, 5, 10, 60.0, date(2025, 6, 7))
+
+        achievement_repository_mock.create_achievement.assert_not_called()
+        created = achievement_repository_mock.create_achievements.await_args.args[0]
+        assert [a.type for a in created] == [AchievementType.TOTAL_SCORE_100, AchievementType.STREAK_7_DAYS]
+        assert created[0].period_start_date is None
+        assert created[1].period_start_date == date(2025, 6, 1)
@@ -8,11 +8,19 @@ from domain.achievement import AchievementModel, AchievementType
 from repositories.session_repository import SessionRepository
 from repositories.achievement_repository import AchievementRepository
 from services.session_service import SessionService
+from shared.active_session_cache import active_session_cache
 
 
 class TestSessionService:
     """Тесты для сервиса управления сессиями"""
 
+    @pytest.fixture(autouse=True)
+    def clear_active_session_cache(self):
+        """Кэш активных сессий общий для процесса — очищаем его между тестами"""
+        active_session_cache.clear()
+        yield
+        active_session_cache.clear()
+
     @pytest.fixture
     def session_repository_mock(self):
         """Мок для SessionRepository"""
@@ -97,21 +105,23 @@ class TestSessionService:
         # Вызываем тестируемый метод
         await session_service.finish_session(session_id, user_id, sample_round_details_some_incorrect, score)
         
-        # Проверяем, что update_session вызван с правильными параметрами
-        session_repository_mock.update_session.assert_awaited_once()
-        args = session_repository_mock.update_session.await_args.args
+        # Сессия, указатель, достижения и счётчики пишутся одним вызовом репозитория
+        session_repository_mock.finish_session.assert_awaited_once()
+        args = session_repository_mock.finish_session.await_args.args
         assert args[0] == session_id
-        assert args[1] == sample_round_details_some_incorrect
-        assert isinstance(args[2], datetime)  # end_time
-        assert args[3] == score
+        assert args[1] == user_id
+        assert args[2] == sample_round_details_some_incorrect
+        assert isinstance(args[3], datetime)  # end_time
+        assert args[4] == score
         
-        # Проверяем, что create_achievement не вызывался
+        # Проверяем, что достижения не выдавались
+        assert args[5] == []
         achievement_repository_mock.create_achievement.assert_not_awaited()
+        achievement_repository_mock.create_achievements.assert_not_awaited()
 
     @pytest.mark.asyncio
-    @patch('uuid.uuid4', return_value='achievement-uuid-123')
     async def test_finish_session_with_achievement(
-        self, mock_uuid, session_service, session_repository_mock, 
+        self, session_service, session_repository_mock, 
         achievement_repository_mock, sample_round_details_all_correct
     ):
         """Тест завершения сессии с достижением Perfect Streak"""
@@ -122,20 +132,45 @@ class TestSessionService:
         # Вызываем тестируемый метод
         await session_service.finish_session(session_id, user_id, sample_round_details_all_correct, score)
         
-        # Проверяем, что update_session вызван с правильными параметрами
-        session_repository_mock.update_session.assert_awaited_once()
-        args = session_repository_mock.update_session.await_args.args
+        # Проверяем, что finish_session вызван с правильными параметрами
+        session_repository_mock.finish_session.assert_awaited_once()
+        args = session_repository_mock.finish_session.await_args.args
         assert args[0] == session_id
-        assert args[1] == sample_round_details_all_correct
-        assert isinstance(args[2], datetime)  # end_time
-        assert args[3] == score
+        assert args[2] == sample_round_details_all_correct
+        assert args[4] == score
         
-        # Проверяем, что create_achievement вызван с правильными параметрами
-        achievement_repository_mock.create_achievement.assert_awaited_once()
-        achievement = achievement_repository_mock.create_achievement.await_args.args[0]
+        # Достижение пишется в том же commit, отдельной записи нет
+        achievement_repository_mock.create_achievements.assert_not_awaited()
+        [achievement] = args[5]
         assert isinstance(achievement, AchievementModel)
-        assert achievement.achievement_id == "achievement-uuid-123"
+        # Одно достижение на сессию: ID из пользователя, типа и сессии
+        assert achievement.achievement_id == f"{user_id}_perfect_streak_{session_id}"
         assert achievement.user_id == user_id
         assert achievement.type == AchievementType.PERFECT_STREAK
         assert isinstance(achievement.earned_at, datetime)
         assert achievement.session_id == session_id
+
+    @pytest.mark.asyncio
+    async def test_get_active_session_cached(self, session_service, session_repository_mock):
+        """Активная сессия читается по указателю один раз, дальше — из кэша"""
+        session_repository_mock.get_active_session.return_value = None
+
+        assert await session_service.get_active_session("test_user_123") is None
+        assert await session_service.get_active_session("test_user_123") is None
+        session_repository_mock.get_active_session.assert_awaited_once_with("test_user_123")
+
+    @pytest.mark.asyncio
+    async def test_active_session_follows_start_and_finish(
+        self, session_service, session_repository_mock, sample_round_details_some_incorrect
+    ):
+        """Старт и завершение сессии обновляют кэш без чтения указателя"""
+        session_repository_mock.finish_session.return_value = True
+        user_id = "test_user_123"
+
+        session_id = await session_service.start_session(user_id, "guess_animal")
+        active = await session_service.get_active_session(user_id)
+        assert active.session_id == session_id
+
+        await session_service.finish_session(session_id, user_id, sample_round_details_some_incorrect, 80)
+        assert await session_service.get_active_session(user_id) is None
+        session_repository_mock.get_active_session.assert_not_awaited()
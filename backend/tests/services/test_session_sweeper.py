@@ -0,0 +1,47 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from repositories.session_repository import SessionRepository
+from services.session_sweeper import sweep_abandoned_sessions
+from shared.active_session_cache import active_session_cache
+
+
+@pytest.fixture
+def session_repository_mock():
+    mock = AsyncMock(spec=SessionRepository)
+    mock.get_sweep_checkpoint.return_value = {}
+    return mock
+
+
+class TestSessionSweeper:
+    """Тесты для фоновой очистки брошенных сессий"""
+
+    @pytest.mark.asyncio
+    async def test_pages_until_short_page(self, session_repository_mock):
+        """Страницы читаются, пока не придёт неполная; между ними — пауза по rate"""
+        session_repository_mock.abandon_sessions_page.side_effect = [2, 2, 1]
+        sleep = AsyncMock()
+        active_session_cache.put("u1", None)
+
+        swept = await sweep_abandoned_sessions(session_repository_mock, 3600, 2, rate=1, sleep=sleep)
+
+        assert swept == 5
+        cutoffs = {call.args[0] for call in session_repository_mock.abandon_sessions_page.await_args_list}
+        assert len(cutoffs) == 1
+        cutoff = cutoffs.pop()
+        session_repository_mock.complete_sweep.assert_awaited_once_with(cutoff)
+        assert sleep.await_count == 2
+        assert sleep.await_args.args[0] > 1
+        assert active_session_cache.get("u1") is None
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, session_repository_mock):
+        """Прерванный проход продолжается с сохранённым cutoff"""
+        session_repository_mock.get_sweep_checkpoint.return_value = {"cutoff": "c", "in_progress": True}
+        session_repository_mock.abandon_sessions_page.return_value = 0
+
+        assert await sweep_abandoned_sessions(session_repository_mock, 3600, 2, rate=1) == 0
+
+        session_repository_mock.abandon_sessions_page.assert_awaited_once_with("c", 2)
+        session_repository_mock.complete_sweep.assert_awaited_once_with("c")
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+import pytest
+
+from shared.achievement_check_cache import AchievementCheckCache
+
+
+class FakeToday:
+    """Управляемая текущая дата"""
+
+    def __init__(self, today: date = date(2025, 6, 30)):
+        self.today = today
+
+    def __call__(self) -> date:
+        return self.today
+
+
+class TestAchievementCheckCache:
+    """Тесты для отметок «достижения проверены сегодня»"""
+
+    @pytest.fixture
+    def today(self):
+        return FakeToday()
+
+    @pytest.fixture
+    def cache(self, today):
+        return AchievementCheckCache(max_entries=2, today=today)
+
+    def test_marked_until_day_ends(self, cache, today):
+        """Отметка действует до конца дня"""
+        assert not cache.checked("u1")
+        cache.mark("u1")
+        assert cache.checked("u1")
+
+        today.today += timedelta(days=1)
+        assert not cache.checked("u1")
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+        assert cache.stats()["size"] == 0
+
+    def test_invalidate(self, cache):
+        """Новый прогресс снимает отметку"""
+        cache.mark("u1")
+        cache.invalidate("u1")
+        cache.invalidate("u2")
+        assert not cache.checked("u1")
+        assert cache.stats()["invalidations"] == 1
+
+    def test_lru_eviction(self, cache):
+        """При переполнении вытесняется давно не использованная отметка"""
+        cache.mark("u1")
+        cache.mark("u2")
+        cache.checked("u1")
+        cache.mark("u3")
+        assert not cache.checked("u2")
+        assert cache.checked("u1")
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from shared.blocking_executor import BoundedExecutor, ExecutorSaturatedError
+
+
+class TestBoundedExecutor:
+    """Тесты для пула потоков блокирующих вызовов"""
+
+    @pytest.mark.asyncio
+    async def test_run_off_event_loop(self):
+        """Функция выполняется в отдельном потоке и возвращает результат"""
+        executor = BoundedExecutor(name="test", max_workers=2, max_queue=10, timeout=5)
+        loop_thread = threading.get_ident()
+
+        result = await executor.run(lambda x, y=0: (x + y, threading.get_ident()), 1, y=2)
+
+        assert result[0] == 3
+        assert result[1] != loop_thread
+        assert executor.stats()["completed"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_not_blocked(self):
+        """Медленный вызов не задерживает другие корутины"""
+        executor = BoundedExecutor(name="test", max_workers=1, max_queue=10, timeout=5)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(executor.run(time.sleep, 0.2), ticker())
+
+        assert ticks[-1] - ticks[0] < 0.15
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """Вызов, не уложившийся в timeout, завершается TimeoutError"""
+        executor = BoundedExecutor(name="test", max_workers=1, max_queue=10, timeout=0.05)
+        with pytest.raises(TimeoutError):
+            await executor.run(time.sleep, 0.3)
+        assert executor.stats()["timeouts"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queue_limit_and_depth(self):
+        """Очередь ограничена, максимальная глубина фиксируется в метриках"""
+        executor = BoundedExecutor(name="test", max_workers=1, max_queue=2, timeout=5)
+        release = threading.Event()
+
+        first = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)  # первый вызов занял единственный поток
+        second = asyncio.ensure_future(executor.run(lambda: "queued"))
+        third = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(lambda: "rejected")
+
+        release.set()
+        assert await asyncio.gather(first, second, third) == [True, "queued", "queued"]
+        stats = executor.stats()
+        assert stats["max_queue_depth"] == 2
+        assert stats["rejected"] == 1
+        assert stats["queued"] == 0 and stats["running"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_failed_calls_counted(self):
+        """Исключение из функции пробрасывается и учитывается в метриках"""
+        executor = BoundedExecutor(name="test", max_workers=1, max_queue=10, timeout=5)
+
+        def boom():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await executor.run(boom)
+        assert executor.stats()["failed"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_queued_calls_release_queue(self):
+        """Вызовы, не дождавшиеся потока до timeout, освобождают места в очереди"""
+        executor = BoundedExecutor(name="test", max_workers=1, max_queue=3, timeout=0.1)
+
+        results = await asyncio.gather(*(executor.run(time.sleep, 0.5) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, TimeoutError) for result in results)
+        assert executor.stats()["queued"] == 0
+
+        await asyncio.sleep(0.5)  # первый вызов занимал поток
+        assert await executor.run(lambda: "ok") == "ok"
+        stats = executor.stats()
+        assert stats["queued"] == 0 and stats["running"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_releases_queue(self):
+        """shutdown отменяет ожидающие вызовы и освобождает их места"""
+        executor = BoundedExecutor(name="test", max_workers=1, max_queue=3, timeout=5)
+        release = threading.Event()
+        first = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0)
+
+        executor.shutdown(wait=False)
+        release.set()
+        await asyncio.gather(first, queued, return_exceptions=True)
+        assert executor.stats()["queued"] == 0
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from domain.achievement_catalog import DEFAULT_CATALOG
+from shared.catalog_cache import CatalogCache
+
+
+class FakeClock:
+    """Управляемые часы для проверки возраста каталога"""
+
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeLoader:
+    """Загрузчик каталога и его версии: считает вызовы, может ждать или падать"""
+
+    def __init__(self):
+        self.calls = 0
+        self.version_calls = 0
+        self.catalog = [{"id": "weekly_fifty", "name": "v1"}]
+        self.version = None
+        self.error = None
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return list(self.catalog)
+
+    async def load_version(self):
+        self.version_calls += 1
+        return self.version
+
+
+class TestCatalogCache:
+    """Тесты для общего кэша каталога достижений"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def loader(self):
+        return FakeLoader()
+
+    @pytest.fixture
+    def cache(self, clock, loader):
+        return CatalogCache(max_age=60, loader=loader, version_loader=loader.load_version, clock=clock)
+
+    @pytest.mark.asyncio
+    async def test_defaults_until_loaded(self, cache, loader):
+        """До первой загрузки отдаётся DEFAULT_CATALOG, загрузка идёт в фоне"""
+        loader.release.clear()
+        assert cache.get() is DEFAULT_CATALOG
+        assert cache.get() is DEFAULT_CATALOG
+        loader.release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert loader.calls == 1
+        assert cache.get() == [{"id": "weekly_fifty", "name": "v1"}]
+        assert cache.stats()["misses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self, cache, loader, clock):
+        """Устаревший каталог отдаётся сразу, перезагрузка одна и в фоне"""
+        assert await cache.refresh()
+        loader.catalog = [{"id": "weekly_fifty", "name": "v2"}]
+        loader.release.clear()
+
+        clock.now += 61
+        assert cache.get()[0]["name"] == "v1"
+        assert cache.get()[0]["name"] == "v1"
+        loader.release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert loader.calls == 2
+        assert cache.get()[0]["name"] == "v2"
+        stats = cache.stats()
+        assert stats["stale"] == 2
+        assert stats["refreshes"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_copy(self, cache, loader, clock):
+        """Сбой перезагрузки оставляет прежнюю копию и повторяется не раньше max_age"""
+        assert await cache.refresh()
+        loader.error = RuntimeError("unavailable")
+        assert not await cache.refresh()
+        assert cache.get()[0]["name"] == "v1"
+
+        clock.now += 30
+        cache.get()
+        await asyncio.sleep(0)
+        assert loader.calls == 2
+        assert cache.stats()["refresh_failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unchanged_version_skips_reload(self, cache, loader, clock):
+        """При той же версии каталог не перечитывается, при новой — перечитывается"""
+        loader.version = 1
+        assert await cache.refresh()
+        loader.catalog = [{"id": "weekly_fifty", "name": "v2"}]
+
+        clock.now += 61
+        assert await cache.refresh()
+        assert loader.calls == 1
+        assert cache.get()[0]["name"] == "v1"
+        assert cache.stats()["unchanged"] == 1
+        assert cache.stats()["age_seconds"] == 0
+
+        loader.version = 2
+        assert await cache.refresh()
+        assert loader.calls == 2
+        assert cache.get()[0]["name"] == "v2"
+
+    @pytest.mark.asyncio
+    async def test_reload_without_version(self, cache, loader):
+        """Без документа версии каталог перечитывается целиком"""
+        assert await cache.refresh()
+        assert await cache.refresh()
+        assert loader.calls == 2
+        assert loader.version_calls == 2
@@ -0,0 +1,45 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from shared.firestore_pool import FirestoreClientPool
+
+
+class TestFirestoreClientPool:
+    """Тесты для пула Firestore-клиентов"""
+
+    @pytest.fixture
+    def factory(self):
+        """Фабрика, создающая отдельный мок-клиент на каждый вызов"""
+        return MagicMock(side_effect=lambda: MagicMock(spec=["close"], close=AsyncMock()))
+
+    def test_open_creates_clients_once(self, factory):
+        """Пул создаёт ровно size клиентов, повторный open ничего не делает"""
+        pool = FirestoreClientPool(factory=factory, size=3)
+        pool.open()
+        pool.open()
+        assert factory.call_count == 3
+        assert pool.is_open
+
+    def test_get_round_robin(self, factory):
+        """Клиенты выдаются по кругу и переиспользуются между запросами"""
+        pool = FirestoreClientPool(factory=factory, size=2)
+        clients = [pool.get() for _ in range(4)]
+        assert clients[0] is clients[2]
+        assert clients[1] is clients[3]
+        assert clients[0] is not clients[1]
+        assert factory.call_count == 2
+
+    def test_invalid_size(self, factory):
+        """Размер пула должен быть положительным"""
+        with pytest.raises(ValueError):
+            FirestoreClientPool(factory=factory, size=0)
+
+    @pytest.mark.asyncio
+    async def test_close(self, factory):
+        """close закрывает все клиенты, следующий get открывает пул заново"""
+        pool = FirestoreClientPool(factory=factory, size=2)
+        first = pool.get()
+        await pool.close()
+        first.close.assert_awaited_once()
+        assert not pool.is_open
+        assert pool.get() is not first
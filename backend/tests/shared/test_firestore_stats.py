@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+
+from domain.progress import ProgressRecord
+from repositories.progress_repository import ProgressRepository
+from shared.firestore_stats import begin_request, current_stats, end_request, track_op
+from shared.memory_firestore import MemoryFirestoreClient
+
+
+class TestTrackOp:
+    """Тесты для учёта операций Firestore в рамках запроса"""
+
+    def test_counts_added_to_current_request(self):
+        """Счётчики вызова попадают в статистику текущего запроса"""
+        stats, token = begin_request()
+        try:
+            with track_op("Repo.read") as op:
+                op.reads += 1
+            with track_op("Repo.query") as op:
+                op.query_docs += 3
+            with track_op("Repo.query") as op:
+                op.writes += 1
+                op.batch_commits += 1
+        finally:
+            end_request(token)
+
+        fields = stats.as_log_fields()
+        assert fields["fs_reads"] == 1
+        assert fields["fs_query_docs"] == 3
+        assert fields["fs_writes"] == 1
+        assert fields["fs_batch_commits"] == 1
+        assert fields["fs_calls"] == 3
+        assert fields["fs_ops"] == {"Repo.read": 1, "Repo.query": 2}
+        assert fields["fs_ms"] >= 0
+        assert current_stats() is None
+
+    def test_outside_request_is_noop(self):
+        """Вне запроса track_op работает, но ничего не записывает"""
+        with track_op("Repo.read") as op:
+            op.reads += 1
+        assert current_stats() is None
+
+    def test_counted_when_call_raises(self):
+        """Время и счётчики учитываются и при исключении"""
+        stats, token = begin_request()
+        try:
+            with pytest.raises(RuntimeError):
+                with track_op("Repo.fail") as op:
+                    op.reads += 1
+                    raise RuntimeError("boom")
+        finally:
+            end_request(token)
+        assert stats.reads == 1
+        assert stats.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_progress_repository_query_docs(self):
+        """sum_total_score читает один документ-агрегат, а не всю историю пользователя"""
+        repo = ProgressRepository(db=MemoryFirestoreClient())
+        start = datetime.date(2025, 5, 1)
+        for i in range(5):
+            await repo.record_daily_score(ProgressRecord(
+                user_id="u1", date=start + datetime.timedelta(days=i), score=10,
+                correct_answers=1, total_answers=1, time_spent=1.0,
+            ))
+
+        stats, token = begin_request()
+        try:
+            assert await repo.sum_total_score("u1") == 50
+        finally:
+            end_request(token)
+        assert stats.query_docs == 0
+        assert stats.reads == 1
+        assert stats.ops == {"ProgressRepository.get_user_stats": 1}
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+
+from shared.lru_cache import LRUCache, TTLCache
+
+
+class FakeClock:
+    """Управляемые часы"""
+
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass(frozen=True)
+class Entry:
+    value: str
+    checked_at: float
+
+
+class TestLRUCache:
+    """Тесты для общего ограниченного LRU-кэша"""
+
+    def test_evicts_least_recently_used(self):
+        """При переполнении вытесняется запись, к которой дольше всего не обращались"""
+        cache = LRUCache(max_entries=2)
+        cache._store("a", 1)
+        cache._store("b", 2)
+        assert cache.get("a") == 1
+        cache._store("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+        assert len(cache) == 2
+
+    def test_invalidate_and_clear(self):
+        """invalidate считает только удалённые записи, clear очищает кэш"""
+        cache = LRUCache()
+        cache._store("a", 1)
+        cache.invalidate("a")
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        assert cache.stats()["invalidations"] == 1
+
+        cache._store("b", 2)
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_ttl_expiry(self):
+        """Запись TTLCache действует ttl_seconds после checked_at и удаляется при промахе"""
+        clock = FakeClock()
+        cache = TTLCache(ttl_seconds=30, clock=clock)
+        cache._store("u1", Entry("x", checked_at=clock()))
+
+        clock.now += 29
+        assert cache.get("u1").value == "x"
+        clock.now += 1
+        assert cache.get("u1") is None
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 0)
+        assert stats["hit_ratio"] == 0.5
@@ -0,0 +1,191 @@
+import pytest
+from google.api_core import exceptions
+from google.cloud import firestore
+from google.cloud.firestore_v1.async_transaction import async_transactional
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from shared.memory_firestore import MemoryFirestoreClient, DESCENDING
+
+
+class TestMemoryFirestore:
+    """Тесты для Firestore в памяти процесса"""
+
+    @pytest.fixture
+    def db(self):
+        return MemoryFirestoreClient()
+
+    @pytest.mark.asyncio
+    async def test_set_get_update_delete(self, db):
+        """Базовые операции с документом"""
+        ref = db.collection("users").document("u1")
+        assert not (await ref.get()).exists
+
+        await ref.set({"uid": "u1", "level": "beginner", "stats": {"a": 1}})
+        await ref.update({"level": "advanced", "stats.b": 2})
+        snapshot = await ref.get()
+        assert snapshot.exists
+        assert snapshot.id == "u1"
+        assert snapshot.to_dict() == {"uid": "u1", "level": "advanced", "stats": {"a": 1, "b": 2}}
+
+        await ref.delete()
+        assert not (await ref.get()).exists
+
+    @pytest.mark.asyncio
+    async def test_update_missing_document(self, db):
+        """update несуществующего документа завершается NotFound"""
+        with pytest.raises(exceptions.NotFound):
+            await db.collection("users").document("missing").update({"level": "x"})
+
+    @pytest.mark.asyncio
+    async def test_create_existing_document(self, db):
+        """create не перезаписывает существующий документ"""
+        ref = db.collection("achievements").document("a1")
+        await ref.create({"type": "x"})
+        with pytest.raises(exceptions.AlreadyExists):
+            await ref.create({"type": "y"})
+
+    @pytest.mark.asyncio
+    async def test_set_merge_and_transforms(self, db):
+        """set(merge=True) объединяет словари и применяет трансформации"""
+        ref = db.collection("stats").document("u1")
+        await ref.set({"total": firestore.Increment(5), "daily": {"d1": 5}}, merge=True)
+        await ref.set({"total": firestore.Increment(3), "daily": {"d2": 3}, "best": firestore.Maximum(7)}, merge=True)
+        await ref.set({"daily": {"d1": firestore.DELETE_FIELD}}, merge=True)
+        assert (await ref.get()).to_dict() == {"total": 8, "daily": {"d2": 3}, "best": 7}
+
+    @pytest.mark.asyncio
+    async def test_set_merge_keys_are_literal(self, db):
+        """Ключи set(merge=True) — имена полей; пути через точку разбирает только update()"""
+        ref = db.collection("stats").document("u1")
+        await ref.set({"daily": {"d1": 1}})
+        await ref.set({"daily.d2": 2}, merge=True)
+        assert (await ref.get()).to_dict() == {"daily": {"d1": 1}, "daily.d2": 2}
+
+        await ref.update({"daily.d3": 3})
+        assert (await ref.get()).to_dict() == {"daily": {"d1": 1, "d3": 3}, "daily.d2": 2}
+
+    @pytest.mark.asyncio
+    async def test_subcollections(self, db):
+        """Подколлекции вида content/animals/items изолированы друг от друга"""
+        animals = db.collection("content").document("animals").collection("items")
+        sentences = db.collection("content").document("sentences").collection("items")
+        await animals.document("lion").set({"difficulty": 1})
+        await sentences.document("s1").set({"difficulty": 1})
+
+        assert [doc.id async for doc in animals.stream()] == ["lion"]
+        assert (await db.document("content/animals/items/lion").get()).exists
+
+    @pytest.mark.asyncio
+    async def test_where_filters_order_and_limit(self, db):
+        """where(FieldFilter)/where(поле, оп, значение), order_by и limit"""
+        progress = db.collection("progress")
+        for day, score in [("2025-06-01", 10), ("2025-06-02", 30), ("2025-06-03", 20)]:
+            await progress.document(f"u1_{day}").set({"user_id": "u1", "date": day, "score": score})
+        await progress.document("u2_2025-06-02").set({"user_id": "u2", "date": "2025-06-02", "score": 99})
+
+        query = (
+            progress
+            .where(filter=FieldFilter("user_id", "==", "u1"))
+            .where("date", ">=", "2025-06-02")
+        )
+        assert sorted(doc.id for doc in await query.get()) == ["u1_2025-06-02", "u1_2025-06-03"]
+
+        top = progress.where(filter=FieldFilter("user_id", "==", "u1")).order_by("score", direction=DESCENDING).limit(2)
+        assert [doc.to_dict()["score"] async for doc in top.stream()] == [30, 20]
+
+    @pytest.mark.asyncio
+    async def test_start_after_cursor(self, db):
+        """Постраничная выборка через start_after"""
+        sessions = db.collection("sessions")
+        for i in range(5):
+            await sessions.document(f"s{i}").set({"start_time": f"2025-06-0{i + 1}"})
+
+        first_page = await sessions.order_by("start_time").limit(2).get()
+        second_page = await sessions.order_by("start_time").start_after(first_page[-1]).limit(2).get()
+        assert [doc.id for doc in first_page] == ["s0", "s1"]
+        assert [doc.id for doc in second_page] == ["s2", "s3"]
+
+    @pytest.mark.asyncio
+    async def test_batch_is_atomic(self, db):
+        """Batch применяется целиком или не применяется вовсе"""
+        users = db.collection("users")
+        batch = db.batch()
+        batch.set(users.document("u1"), {"uid": "u1"})
+        batch.update(users.document("missing"), {"level": "x"})
+        with pytest.raises(exceptions.NotFound):
+            await batch.commit()
+        assert not (await users.document("u1").get()).exists
+
+        batch = db.batch()
+        batch.set(users.document("u1"), {"uid": "u1"})
+        batch.update(users.document("u1"), {"level": "beginner"})
+        batch.delete(users.document("u2"))
+        await batch.commit()
+        assert (await users.document("u1").get()).to_dict() == {"uid": "u1", "level": "beginner"}
+
+    @pytest.mark.asyncio
+    async def test_get_all(self, db):
+        """get_all возвращает снимки, в том числе несуществующих документов"""
+        users = db.collection("users")
+        await users.document("u1").set({"uid": "u1"})
+        snapshots = [s async for s in db.get_all([users.document("u1"), users.document("u2")])]
+        assert {s.id: s.exists for s in snapshots} == {"u1": True, "u2": False}
+
+    @pytest.mark.asyncio
+    async def test_returned_data_is_a_copy(self, db):
+        """Изменение полученного словаря не меняет хранимый документ"""
+        ref = db.collection("users").document("u1")
+        await ref.set({"tags": ["a"]})
+        data = (await ref.get()).to_dict()
+        data["tags"].append("b")
+        assert (await ref.get()).to_dict() == {"tags": ["a"]}
+
+    @pytest.mark.asyncio
+    async def test_transaction_retries_on_conflict(self, db):
+        """Транзакция перезапускается, если прочитанный документ изменился до commit"""
+        ref = db.collection("counters").document("c1")
+        await ref.set({"value": 0})
+        attempts = []
+
+        @async_transactional
+        async def increment(transaction):
+            snapshot = await ref.get(transaction=transaction)
+            if not attempts:
+                # Конкурирующая запись между чтением и commit
+                await ref.set({"value": 100})
+            attempts.append(1)
+            transaction.update(ref, {"value": snapshot.get("value") + 1})
+
+        await increment(db.transaction())
+        assert len(attempts) == 2
+        assert (await ref.get()).to_dict() == {"value": 101}
+
+    @pytest.mark.asyncio
+    async def test_transaction_read_after_write(self, db):
+        """Чтение после записи в транзакции запрещено, изменения откатываются"""
+        ref = db.collection("counters").document("c1")
+
+        @async_transactional
+        async def bad(transaction):
+            transaction.set(ref, {"value": 1})
+            await ref.get(transaction=transaction)
+
+        with pytest.raises(firestore.ReadAfterWriteError):
+            await bad(db.transaction())
+        assert not (await ref.get()).exists
+
+    @pytest.mark.asyncio
+    async def test_aggregation_queries(self, db):
+        """count/sum/avg считаются по результатам запроса"""
+        for i, score in enumerate([10, 20, 30.5]):
+            await db.collection("progress").document(f"p{i}").set({"user_id": "u1", "score": score})
+        await db.collection("progress").document("other").set({"user_id": "u2", "score": 100})
+        await db.collection("progress").document("no_score").set({"user_id": "u1"})
+
+        query = db.collection("progress").where(filter=FieldFilter("user_id", "==", "u1"))
+        results = await query.sum("score", alias="total").count(alias="n").avg("score").get()
+        values = {r.alias: r.value for r in results[0]}
+        assert values == {"total": 60.5, "n": 4, "field_3": 60.5 / 3}
+
+        empty = await db.collection("progress").where(filter=FieldFilter("user_id", "==", "nobody")).avg("score").get()
+        assert empty[0][0].value is None
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+from prometheus_client import CollectorRegistry, generate_latest
+
+from shared import metrics
+from shared.firestore_stats import track_op
+
+
+class TestCollectors:
+    """Тесты для коллекторов кэшей и пулов потоков"""
+
+    def test_cache_collector(self):
+        """Счётчики кэша берутся из stats() в момент опроса"""
+        collector = metrics.CacheStatsCollector()
+        collector.register("catalog", lambda: {"hits": 3, "misses": 1, "size": 2, "hit_ratio": 0.75})
+        registry = CollectorRegistry()
+        registry.register(collector)
+
+        text = generate_latest(registry).decode()
+        assert 'easytalk_cache_hits_total{cache="catalog"} 3.0' in text
+        assert 'easytalk_cache_hit_ratio{cache="catalog"} 0.75' in text
+
+    def test_executor_collector(self):
+        """Глубина очереди и исходы вызовов пула"""
+        collector = metrics.ExecutorStatsCollector()
+        collector.register("pool", lambda: {"queued": 4, "running": 2, "rejected": 1})
+        registry = CollectorRegistry()
+        registry.register(collector)
+
+        text = generate_latest(registry).decode()
+        assert 'easytalk_executor_queued{executor="pool"} 4.0' in text
+        assert 'easytalk_executor_calls_total{executor="pool",outcome="rejected"} 1.0' in text
+
+    def test_queue_collector(self):
+        """Очередь фоновой обработки: backlog и события по исходам"""
+        collector = metrics.QueueStatsCollector()
+        collector.register("achievements", lambda: {"backlog": 5, "retried": 2, "batches": 3})
+        registry = CollectorRegistry()
+        registry.register(collector)
+
+        text = generate_latest(registry).decode()
+        assert 'easytalk_queue_backlog{queue="achievements"} 5.0' in text
+        assert 'easytalk_queue_batches_total{queue="achievements"} 3.0' in text
+        assert 'easytalk_queue_events_total{outcome="retried",queue="achievements"} 2.0' in text \
+            or 'easytalk_queue_events_total{queue="achievements",outcome="retried"} 2.0' in text
+
+
+def test_route_label_uses_route_template():
+    """Метка — шаблон маршрута с префиксом роутера и mount, значения параметров в неё не попадают"""
+    from fastapi import APIRouter, FastAPI, Request
+    from fastapi.testclient import TestClient
+
+    labels = []
+    router = APIRouter(prefix="/items")
+
+    @router.get("/{item_id}/files/{path:path}")
+    async def item_file(item_id: str, path: str, request: Request):
+        labels.append(metrics.route_label(request))
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    sub_app = FastAPI()
+    sub_app.include_router(router)
+    app.mount("/admin", sub_app)
+
+    with TestClient(app) as client:
+        # item_id совпадает со статическим сегментом, path содержит "/"
+        client.get("/api/items/files/files/a/b")
+        client.get("/admin/items/42/files/x")
+        client.get("/unknown")
+    assert labels == ["/api/items/{item_id}/files/{path}", "/admin/items/{item_id}/files/{path}"]
+
+
+def test_firestore_calls_observed():
+    """Каждый track_op попадает в гистограмму по имени метода"""
+    series = metrics.FIRESTORE_CALL_LATENCY.labels("TestRepo.method")
+    before = series._sum.get()
+    with track_op("TestRepo.method"):
+        pass
+    text = generate_latest(metrics.REGISTRY).decode()
+    assert 'easytalk_firestore_call_duration_seconds_count{op="TestRepo.method"}' in text
+    assert series._sum.get() >= before
+
+
+@pytest.mark.asyncio
+async def test_event_loop_lag_monitor():
+    """Блокирующий вызов в event loop виден как задержка"""
+    lag_before = metrics.EVENT_LOOP_LAG._sum.get()
+    task = asyncio.create_task(metrics.monitor_event_loop_lag(0.01))
+    await asyncio.sleep(0)
+    time.sleep(0.05)  # блокируем event loop
+    await asyncio.sleep(0.03)
+    task.cancel()
+    assert metrics.EVENT_LOOP_LAG._sum.get() - lag_before >= 0.03
@@ -0,0 +1,91 @@
+import pytest
+
+from shared.token_cache import VerifiedTokenCache, RevocationCache
+
+
+class FakeClock:
+    """Управляемые часы для проверки истечения срока"""
+
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestVerifiedTokenCache:
+    """Тесты для кэша проверенных токенов"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def cache(self, clock):
+        return VerifiedTokenCache(max_entries=2, clock=clock)
+
+    def test_hit_until_exp(self, cache, clock):
+        """Токен возвращается из кэша до момента exp"""
+        assert cache.put("token-a", {"uid": "u1", "iat": 900, "exp": 1_100}) is not None
+        entry = cache.get("token-a")
+        assert entry.uid == "u1"
+        assert entry.issued_at == 900
+
+        clock.now = 1_100
+        assert cache.get("token-a") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["size"] == 0
+
+    def test_tokens_without_exp_not_cached(self, cache):
+        """Токены без exp или уже истёкшие не кэшируются"""
+        assert cache.put("no-exp", {"uid": "u1"}) is None
+        assert cache.put("expired", {"uid": "u1", "exp": 10}) is None
+        assert cache.get("no-exp") is None
+
+    def test_raw_token_is_not_stored(self, cache):
+        """Ключом кэша служит хэш токена, а не сам токен"""
+        cache.put("secret-token", {"uid": "u1", "exp": 2_000})
+        assert all(isinstance(key, bytes) and key != b"secret-token" for key in cache._entries)
+
+    def test_lru_eviction(self, cache):
+        """При переполнении вытесняется давно не использованный токен"""
+        cache.put("t1", {"uid": "u1", "exp": 2_000})
+        cache.put("t2", {"uid": "u2", "exp": 2_000})
+        cache.get("t1")
+        cache.put("t3", {"uid": "u3", "exp": 2_000})
+        assert cache.get("t2") is None
+        assert cache.get("t1").uid == "u1"
+        assert cache.stats()["evictions"] == 1
+
+    def test_saved_verify_estimate(self, cache):
+        """Статистика оценивает сэкономленное время верификации"""
+        cache.record_verification(0.002)
+        cache.put("t1", {"uid": "u1", "exp": 2_000})
+        cache.get("t1")
+        cache.get("t1")
+        stats = cache.stats()
+        assert stats["avg_verify_ms"] == pytest.approx(2.0)
+        assert stats["saved_verify_ms"] == pytest.approx(4.0)
+
+
+class TestRevocationCache:
+    """Тесты для кэша проверок отзыва"""
+
+    def test_ttl(self):
+        """Состояние отзыва живёт ttl_seconds"""
+        clock = FakeClock()
+        cache = RevocationCache(ttl_seconds=60, clock=clock)
+        cache.put("u1", valid_after=500.0, disabled=False)
+        assert cache.get("u1").valid_after == 500.0
+        clock.now += 61
+        assert cache.get("u1") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_invalidate(self):
+        """invalidate удаляет запись пользователя"""
+        cache = RevocationCache(ttl_seconds=60)
+        cache.put("u1", valid_after=0.0, disabled=False)
+        cache.invalidate("u1")
+        assert cache.get("u1") is None
@@ -11,6 +11,7 @@ from fastapi import FastAPI, Depends
 # Импортируем напрямую из functions
 from routers.content_router import router as content_router, get_animal_by_id
 from shared.auth import get_current_user_id
+from shared.memory_firestore import MemoryFirestoreClient
 
 # Константы
 TEST_USER_ID = "test_user_123"
@@ -26,73 +27,38 @@ def override_get_current_user_id():
 
 app.dependency_overrides[get_current_user_id] = override_get_current_user_id
 
-# Функция для мокирования Firestore
-def setup_firestore_mock():
-    # Создаем мок для Firestore клиента
-    db_mock = MagicMock(name="db_mock")
-    
-    # Настраиваем цепочку вызовов для получения животного по ID
-    content_collection = MagicMock(name="content_collection")
-    db_mock.collection.return_value = content_collection
-    
-    animals_doc = MagicMock(name="animals_doc")
-    content_collection.document.return_value = animals_doc
-    
-    animals_collection = MagicMock(name="animals_collection")
-    animals_doc.collection.return_value = animals_collection
-    
-    animal_doc_ref = MagicMock(name="animal_doc_ref")
-    animals_collection.document.return_value = animal_doc_ref
-    
-    # Создаем мок для успешного получения документа
-    async def async_get_success():
-        doc_snapshot = MagicMock(name="doc_snapshot")
-        doc_snapshot.exists = True
-        doc_snapshot.to_dict.return_value = {
+# Функция для подготовки Firestore в памяти вместо цепочки MagicMock
+async def setup_firestore_fake():
+    db = MemoryFirestoreClient()
+    await (
+        db.collection("content").document("animals").collection("items")
+        .document(TEST_ANIMAL_ID)
+        .set({
             "name": "Лев",
             "english_name": "Lion",
             "difficulty": 2,
             "image_url": "https://example.com/lion.jpg",
             "sound_url": "https://example.com/lion.mp3"
-        }
-        doc_snapshot.id = TEST_ANIMAL_ID
-        return doc_snapshot
-    
-    # Настраиваем метод get() как асинхронный метод
-    animal_doc_ref.get = MagicMock()
-    animal_doc_ref.get.return_value = async_get_success()
-    
-    return db_mock
+        })
+    )
+    return db
 
 # Функция для тестирования успешного получения животного по ID
 @pytest.mark.asyncio
 async def test_get_animal_by_id_success():
-    # Настраиваем мок Firestore
-    db_mock = setup_firestore_mock()
-    
-    # Замена реальной функции получения Firestore на мок
-    import routers.content_router as content_router_module
-    old_get_firestore = content_router_module.get_firestore
-    content_router_module.get_firestore = lambda: db_mock
-    
-    try:
-        # Вызываем функцию напрямую, без использования TestClient
-        result = await get_animal_by_id(TEST_ANIMAL_ID, TEST_USER_ID)
-        
-        # Проверки результата
-        assert result["id"] == TEST_ANIMAL_ID
-        assert result["name"] == "Лев"
-        assert result["english_name"] == "Lion"
-        assert result["difficulty"] == 2
-        
-        print("✅ Тест get_animal_by_id_success успешно пройден")
-        return True
-    except Exception as e:
-        print(f"❌ Ошибка в тесте get_animal_by_id_success: {e}")
-        return False
-    finally:
-        # Восстанавливаем оригинальную функцию
-        content_router_module.get_firestore = old_get_firestore
+    db = await setup_firestore_fake()
+
+    # Вызываем функцию напрямую, без использования TestClient
+    result = await get_animal_by_id(TEST_ANIMAL_ID, TEST_USER_ID, db=db)
+
+    # Проверки результата
+    assert result.id == TEST_ANIMAL_ID
+    assert result.name == "Лев"
+    assert result.english_name == "Lion"
+    assert result.difficulty == 2
+
+    print("✅ Тест get_animal_by_id_success успешно пройден")
+    return True
 
 # Функция для имитации Firestore ошибки при получении .stream()
 @pytest.mark.asyncio